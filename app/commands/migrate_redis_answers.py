@@ -0,0 +1,13 @@
+import asyncio
+
+from app.db.database import get_redis_db
+from app.services.redis import RedisService
+
+
+async def migrate_redis_answers() -> int:
+    # one-shot move of answers written before the attempt layout, see RedisService
+    return await RedisService().migrate_legacy_answers(await get_redis_db())
+
+
+if __name__ == "__main__":
+    print(f"migrated {asyncio.run(migrate_redis_answers())} attempts")
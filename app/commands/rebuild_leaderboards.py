@@ -0,0 +1,17 @@
+import asyncio
+
+from app.db.database import get_redis_db
+from app.repositories.results import ResultsRepository
+from app.repositories.stats import UserCompanyStatsRepository
+from app.services.leaderboards import Leaderboards
+from app.utils.unit_of_work import UnitOfWork
+
+
+async def rebuild_leaderboards() -> int:
+    # repopulates the company and quiz leaderboards from PostgreSQL, e.g. after Redis was flushed
+    async with UnitOfWork():
+        return await Leaderboards().rebuild(await get_redis_db(), UserCompanyStatsRepository(), ResultsRepository())
+
+
+if __name__ == "__main__":
+    print(f"rebuilt {asyncio.run(rebuild_leaderboards())} leaderboards")
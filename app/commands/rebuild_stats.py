@@ -0,0 +1,20 @@
+import argparse
+import asyncio
+
+from app.repositories.stats import UserCompanyStatsRepository, UserStatsRepository
+from app.utils.unit_of_work import UnitOfWork
+
+
+async def rebuild_stats(user_id: int | None = None):
+    # recomputes the rating rollups from Result and QuizAttempt in one transaction
+    filter_by = {} if user_id is None else {"user_id": user_id}
+    async with UnitOfWork():
+        await UserCompanyStatsRepository().rebuild(**filter_by)
+        await UserStatsRepository().rebuild(**filter_by)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild per-user and per-company result rollups")
+    parser.add_argument("--user-id", type=int, default=None, help="rebuild the rows of one user only")
+    args = parser.parse_args()
+    asyncio.run(rebuild_stats(args.user_id))
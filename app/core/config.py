@@ -21,6 +21,17 @@ class DbSettings(BaseSettings):
     db_name: str = os.environ.get("DB_DATABASE")
     db_user: str = os.environ.get("DB_USERNAME")
     db_pass: str = os.environ.get("DB_PASSWORD")
+    db_echo: bool = os.environ.get("DB_ECHO", False)
+    db_pool_size: int = os.environ.get("DB_POOL_SIZE", 5)
+    db_max_overflow: int = os.environ.get("DB_MAX_OVERFLOW", 10)
+    db_pool_timeout: int = os.environ.get("DB_POOL_TIMEOUT", 30)
+    db_pool_recycle: int = os.environ.get("DB_POOL_RECYCLE", 1800)
+    db_pool_pre_ping: bool = os.environ.get("DB_POOL_PRE_PING", True)
+    db_statement_cache_size: int = os.environ.get("DB_STATEMENT_CACHE_SIZE", 100)
+    db_replica_host: str | None = os.environ.get("DB_REPLICA_HOST")
+    db_replica_port: int = os.environ.get("DB_REPLICA_PORT", 5432)
+    db_attempts_partitions_ahead: int = os.environ.get("DB_ATTEMPTS_PARTITIONS_AHEAD", 3)
+    db_attempts_retention_months: int = os.environ.get("DB_ATTEMPTS_RETENTION_MONTHS", 0)
 
 
 db_settings = DbSettings()
@@ -30,6 +41,15 @@ class RedisSettings(BaseSettings):
     redis_host: str = os.environ.get("REDIS_HOST")
     redis_port: int = os.environ.get("REDIS_PORT")
     expire_time: int = os.environ.get("REDIS_EXPIRE_TIME")
+    submissions_async: bool = os.environ.get("SUBMISSIONS_ASYNC", False)
+    submissions_stream: str = os.environ.get("SUBMISSIONS_STREAM", "submissions")
+    submissions_batch_size: int = os.environ.get("SUBMISSIONS_BATCH_SIZE", 100)
+    idempotency_ttl: int = os.environ.get("IDEMPOTENCY_TTL", 86400)
+    # has to outlast the slowest request, pool waits included, or a retry runs while the first is still going
+    idempotency_pending_ttl: int = os.environ.get("IDEMPOTENCY_PENDING_TTL", 300)
+    quiz_activity_flush_seconds: int = os.environ.get("QUIZ_ACTIVITY_FLUSH_SECONDS", 60)
+    analytics_cache_ttl: int = os.environ.get("ANALYTICS_CACHE_TTL", 300)
+    answer_keys_local_size: int = os.environ.get("ANSWER_KEYS_LOCAL_SIZE", 1000)
 
 redis_settings = RedisSettings()
 
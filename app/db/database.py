@@ -1,25 +1,90 @@
+import time
 from typing import AsyncGenerator
 
 from fastapi import Depends
 from redis import asyncio as aioredis, Redis
 
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, exc
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import db_settings, redis_settings
+from app.utils.metrics import LatencyStats
 
 DATABASE_URL = (f"postgresql+asyncpg://{db_settings.db_user}:{db_settings.db_pass}@{db_settings.db_host}:"
                 f"{db_settings.db_port}/{db_settings.db_name}")
 
+REPLICA_DATABASE_URL = (f"postgresql+asyncpg://{db_settings.db_user}:{db_settings.db_pass}@"
+                        f"{db_settings.db_replica_host}:{db_settings.db_replica_port}/{db_settings.db_name}")
+
 REDIS_URL = f"redis://{redis_settings.redis_host}:{redis_settings.redis_port}/0"
 
 Base = declarative_base()
 
 metadata = MetaData()
 
-async_engine = create_async_engine(DATABASE_URL, echo=True)
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    # records how long each checkout waited for a free (or newly opened) connection
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_latency = LatencyStats()
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.checkout_latency.observe(time.perf_counter() - start)
+
+
+def create_engine(url: str):
+    return create_async_engine(
+        url,
+        echo=db_settings.db_echo,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=db_settings.db_pool_size,
+        max_overflow=db_settings.db_max_overflow,
+        pool_timeout=db_settings.db_pool_timeout,
+        pool_recycle=db_settings.db_pool_recycle,
+        pool_pre_ping=db_settings.db_pool_pre_ping,
+        connect_args={"prepared_statement_cache_size": db_settings.db_statement_cache_size,
+                      "statement_cache_size": db_settings.db_statement_cache_size},
+    )
+
+
+async_engine = create_engine(DATABASE_URL)
 SessionLocal = async_sessionmaker(async_engine)
 
+# reads are routed to the streaming replica when one is configured
+replica_engine = create_engine(REPLICA_DATABASE_URL) if db_settings.db_replica_host else None
+ReplicaSessionLocal = async_sessionmaker(replica_engine) if replica_engine else None
+
+
+def get_pool_status() -> dict:
+    status = {"primary": _pool_status(async_engine)}
+    if replica_engine:
+        status["replica"] = _pool_status(replica_engine)
+    return status
+
+
+def _pool_status(engine) -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": db_settings.db_max_overflow,
+        "timeouts": pool.timeouts,
+        "checkout_wait": pool.checkout_latency.snapshot(),
+    }
+
+
 redis_pool = None
 
 
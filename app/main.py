@@ -1,18 +1,24 @@
+import logging
 import sys
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 import uvicorn
 from fastapi.security import OAuth2PasswordBearer
 
 from app.models.model import Base
-from app.routers.notifications import scheduler
+from app.services.scheduler import scheduler, maintain_attempt_partitions
 
 sys.path.append(".")
 from app.routers import (router, companies, auth_router, users, actions, quizzes, results, answers, analytics,
-                         notifications)
+                         notifications, leaderboards)
 from app.core.config import settings
 from app.db.database import async_engine
+from app.services.dependencies import unit_of_work
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+# function scope: the transaction is committed before the response is sent, so a failed
+# commit becomes an error response instead of a 200 for writes that were rolled back
+app = FastAPI(dependencies=[Depends(unit_of_work, scope="function")])
 
 app.include_router(router.router)
 app.include_router(users.router)
@@ -24,10 +30,17 @@ app.include_router(results.router)
 app.include_router(answers.router)
 app.include_router(analytics.router)
 app.include_router(notifications.router)
+app.include_router(leaderboards.router)
 
 
 @app.on_event("startup")
 async def start_scheduler():
+    # the partitions are kept months ahead and the scheduler retries daily, so a database that is
+    # briefly unavailable at startup does not keep the app from starting
+    try:
+        await maintain_attempt_partitions()
+    except Exception:
+        logger.exception("attempt partition maintenance failed at startup")
     scheduler.start()
 
 
@@ -1,6 +1,7 @@
 from datetime import datetime, timezone
-from sqlalchemy import Column, Integer, String, Boolean, TIMESTAMP, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, TIMESTAMP, ForeignKey, Index, UniqueConstraint, \
+    select, func
+from sqlalchemy.orm import relationship, column_property
 
 from app.db.database import Base
 from app.schemas.answers import AnswerSchema
@@ -11,7 +12,7 @@ from app.schemas.notifications import NotificationSchema
 from app.schemas.questions import QuestionSchema
 from app.schemas.quizzes import QuizSchema
 from app.schemas.requests import RequestSchema
-from app.schemas.result import ResultSchema
+from app.schemas.result import ResultSchema, QuizAttemptSchema, UserCompanyStatsSchema, UserStatsSchema
 from app.schemas.schema import UserSchema
 
 
@@ -19,7 +20,7 @@ class User(Base):
     __tablename__ = "User"
 
     id = Column(Integer, primary_key=True)
-    user_email = Column(String, nullable=False)
+    user_email = Column(String, nullable=False, unique=True, index=True)
     user_firstname = Column(String, nullable=False)
     user_lastname = Column(String, nullable=False)
     user_status = Column(Boolean, default=True, nullable=True)
@@ -50,8 +51,8 @@ class Company(Base):
     __tablename__ = "Company"
 
     id = Column(Integer, primary_key=True)
-    owner_id = Column(Integer, ForeignKey("User.id"))
-    company_name = Column(String, nullable=False)
+    owner_id = Column(Integer, ForeignKey("User.id"), index=True)
+    company_name = Column(String, nullable=False, index=True)
     company_title = Column(String, nullable=False)
     company_description = Column(String, nullable=False)
     company_city = Column(String, nullable=True)
@@ -59,6 +60,8 @@ class Company(Base):
     company_links = Column(String, nullable=True)
     company_avatar = Column(String, nullable=True)
     is_visible: bool = Column(Boolean, default=False, nullable=False)
+    # questions of the company's quizzes, kept up to date by the quiz service with QuestionStats
+    question_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     def to_read_model(self) -> CompanySchema:
         return CompanySchema(
@@ -80,6 +83,10 @@ class Company(Base):
 
 class Invitation(Base):
     __tablename__ = "Invitation"
+    __table_args__ = (
+        Index("ix_Invitation_user_id_company_id_is_accepted", "user_id", "company_id", "is_accepted"),
+        Index("ix_Invitation_company_id_is_accepted", "company_id", "is_accepted"),
+    )
 
     id = Column(Integer, primary_key=True)
     sender_id = Column(Integer, ForeignKey("User.id"))
@@ -99,6 +106,10 @@ class Invitation(Base):
 
 class Request(Base):
     __tablename__ = "Request"
+    __table_args__ = (
+        Index("ix_Request_sender_id_company_id_is_accepted", "sender_id", "company_id", "is_accepted"),
+        Index("ix_Request_company_id_is_accepted", "company_id", "is_accepted"),
+    )
 
     id = Column(Integer, primary_key=True)
     sender_id = Column(Integer, ForeignKey("User.id"))
@@ -116,6 +127,10 @@ class Request(Base):
 
 class Member(Base):
     __tablename__ = "Member"
+    __table_args__ = (
+        Index("ix_Member_user_id_company_id", "user_id", "company_id", unique=True),
+        Index("ix_Member_company_id_role", "company_id", "role"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("User.id"))
@@ -133,6 +148,10 @@ class Member(Base):
 # quiz_id, quiz_name, quiz_title, quiz_description, quiz_frequency, quiz_company_id, created_by, updated_by
 class Quiz(Base):
     __tablename__ = "Quiz"
+    __table_args__ = (
+        Index("ix_Quiz_company_id_quiz_name", "company_id", "quiz_name"),
+        Index("ix_Quiz_created_by", "created_by"),
+    )
 
     id = Column(Integer, primary_key=True)
     quiz_name = Column(String, nullable=False)
@@ -143,7 +162,11 @@ class Quiz(Base):
     created_by = Column(Integer, ForeignKey("User.id"))
     updated_by = Column(Integer, ForeignKey("User.id"))
     company_id = Column(Integer, ForeignKey("Company.id"))
+    # both are written by the quiz activity flusher from counters kept in Redis
     last_passed_at = Column(TIMESTAMP(timezone=True))
+    passes_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # id of the last flushed batch applied to the row, a batch flushed again is skipped
+    activity_batch = Column(String)
 
     questions = relationship("Question", back_populates="quiz", cascade="all,delete", lazy='selectin')
 
@@ -159,12 +182,17 @@ class Quiz(Base):
             updated_by=self.updated_by,
             company_id=self.company_id,
             last_passed_at=self.last_passed_at,
+            passes_count=self.passes_count,
             questions=[q.to_read_model() for q in self.questions],
         )
 
 
 class Question(Base):
     __tablename__ = "Question"
+    __table_args__ = (
+        Index("ix_Question_quiz_id_question_text", "quiz_id", "question_text"),
+        Index("ix_Question_company_id", "company_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     question_text = Column(String, nullable=False)
@@ -188,8 +216,19 @@ class Question(Base):
         )
 
 
+class QuestionStats(Base):
+    # a single row, id 1: questions of every company, kept up to date with Company.question_count
+    __tablename__ = "QuestionStats"
+
+    id = Column(Integer, primary_key=True)
+    question_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+
 class Answer(Base):
     __tablename__ = "Answer"
+    __table_args__ = (
+        Index("ix_Answer_question_id_answer_data", "question_id", "answer_data"),
+    )
 
     id = Column(Integer, primary_key=True)
     answer_data = Column(String, nullable=False)
@@ -209,8 +248,24 @@ class Answer(Base):
         )
 
 
+# counts for the "counts" loading profile, deferred so full loads do not run the subqueries
+Quiz.questions_count = column_property(
+    select(func.count(Question.id)).where(Question.quiz_id == Quiz.id).correlate_except(Question).scalar_subquery(),
+    deferred=True,
+)
+Question.answers_count = column_property(
+    select(func.count(Answer.id)).where(Answer.question_id == Question.id).correlate_except(Answer).scalar_subquery(),
+    deferred=True,
+)
+
+
 class Result(Base):
     __tablename__ = "Result"
+    __table_args__ = (
+        UniqueConstraint("user_id", "company_id", "quiz_id", name="uq_Result_user_id_company_id_quiz_id"),
+        Index("ix_Result_company_id_user_id", "company_id", "user_id"),
+        Index("ix_Result_quiz_id", "quiz_id"),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"))
@@ -232,8 +287,88 @@ class Result(Base):
         )
 
 
+class QuizAttempt(Base):
+    # every submission, range partitioned by month on created_at; partitions are created by
+    # QuizAttemptsRepository.ensure_partitions, the primary key has to include the partition key
+    __tablename__ = "QuizAttempt"
+    __table_args__ = (
+        Index("ix_QuizAttempt_company_id_user_id_created_at", "company_id", "user_id", "created_at"),
+        Index("ix_QuizAttempt_user_id_created_at", "user_id", "created_at"),
+        Index("ix_QuizAttempt_company_id_created_at", "company_id", "created_at"),
+        Index("ix_QuizAttempt_quiz_id_created_at", "quiz_id", "created_at"),
+        Index("uq_QuizAttempt_attempt_id_created_at", "attempt_id", "created_at", unique=True),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    created_at = Column(TIMESTAMP(timezone=True), primary_key=True, server_default=func.now())
+    user_id = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), nullable=False)
+    company_id = Column(Integer, ForeignKey("Company.id", ondelete="CASCADE"), nullable=False)
+    quiz_id = Column(Integer, ForeignKey("Quiz.id", ondelete="CASCADE"), nullable=False)
+    result_right_count = Column(Integer, nullable=False)
+    result_total_count = Column(Integer, nullable=False)
+    # id of the queued submission, null for submissions scored in the request
+    attempt_id = Column(String)
+
+    def to_read_model(self) -> QuizAttemptSchema:
+        return QuizAttemptSchema(
+            id=self.id,
+            user_id=self.user_id,
+            company_id=self.company_id,
+            quiz_id=self.quiz_id,
+            created_at=self.created_at,
+            result_right_count=self.result_right_count,
+            result_total_count=self.result_total_count,
+        )
+
+
+class UserCompanyStats(Base):
+    # rollup of Result per user and company, kept up to date by the scoring path with deltas
+    __tablename__ = "UserCompanyStats"
+
+    user_id = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), primary_key=True)
+    company_id = Column(Integer, ForeignKey("Company.id", ondelete="CASCADE"), primary_key=True)
+    right_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    total_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_attempt_at = Column(TIMESTAMP(timezone=True))
+
+    def to_read_model(self) -> UserCompanyStatsSchema:
+        return UserCompanyStatsSchema(
+            user_id=self.user_id,
+            company_id=self.company_id,
+            right_sum=self.right_sum,
+            total_sum=self.total_sum,
+            attempts=self.attempts,
+            last_attempt_at=self.last_attempt_at,
+        )
+
+
+class UserStats(Base):
+    # rollup of Result per user over every company
+    __tablename__ = "UserStats"
+
+    user_id = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"), primary_key=True)
+    right_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    total_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    last_attempt_at = Column(TIMESTAMP(timezone=True))
+
+    def to_read_model(self) -> UserStatsSchema:
+        return UserStatsSchema(
+            user_id=self.user_id,
+            right_sum=self.right_sum,
+            total_sum=self.total_sum,
+            attempts=self.attempts,
+            last_attempt_at=self.last_attempt_at,
+        )
+
+
 class Notification(Base):
     __tablename__ = "Notification"
+    __table_args__ = (
+        Index("ix_Notification_receiver_id_status_created_at", "receiver_id", "status", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True)
     receiver_id = Column(Integer, ForeignKey("User.id", ondelete="CASCADE"))
@@ -0,0 +1,109 @@
+import datetime
+
+from sqlalchemy import text, select, func, cast, literal_column, Float
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.models.model import QuizAttempt
+from app.schemas.result import TrendBucket
+from app.utils.repository import SQLAlchemyRepository
+
+
+def month_start(day: datetime.date, shift: int = 0) -> datetime.date:
+    month = day.year * 12 + day.month - 1 + shift
+    return datetime.date(month // 12, month % 12 + 1, 1)
+
+
+class QuizAttemptsRepository(SQLAlchemyRepository):
+    model = QuizAttempt
+
+    async def create_new(self, data: list[dict]) -> set[str]:
+        # rows whose (attempt_id, created_at) is already stored are skipped; returns the attempt ids
+        # of the rows inserted, rows without an attempt id are always inserted
+        if not data:
+            return set()
+        async with self.session() as session:
+            stmt = (pg_insert(QuizAttempt)
+                    .on_conflict_do_nothing(index_elements=["attempt_id", "created_at"])
+                    .returning(QuizAttempt.attempt_id))
+            res = await session.execute(stmt, data)
+            await self.commit(session)
+            return set(res.scalars().all())
+
+    async def trend(self, bucket: TrendBucket, **filter_by) -> list[dict]:
+        # one row per bucket that has attempts, aggregated in the database; the bucket size is
+        # inlined so the grouped expression and the selected one are the same
+        bucket_start = func.date_trunc(literal_column(f"'{TrendBucket(bucket).value}'"), QuizAttempt.created_at)
+        average = func.coalesce(cast(func.sum(QuizAttempt.result_right_count), Float)
+                                / cast(func.nullif(func.sum(QuizAttempt.result_total_count), 0), Float), 0)
+        stmt = (select(bucket_start.label("bucket_start"), func.count().label("attempts"),
+                       average.label("average_result"))
+                .where(*self.filters(**filter_by))
+                .group_by(bucket_start)
+                .order_by(bucket_start))
+        async with self.read_session() as session:
+            res = await session.execute(stmt)
+            return [dict(row._mapping) for row in res.all()]
+
+    def partition_name(self, month: datetime.date) -> str:
+        return f"{self.model.__tablename__}_{month:%Y_%m}"
+
+    @property
+    def default_partition_name(self) -> str:
+        return f"{self.model.__tablename__}_default"
+
+    async def ensure_partitions(self, start: datetime.date, months: int) -> dict[str, int]:
+        # creates the monthly partitions from start's month on, existing ones are left alone. A new
+        # partition is filled with its month's rows from the default partition before it is attached,
+        # since attaching fails while the default still holds rows in its range. Returns the number
+        # of rows moved per partition.
+        parent = self.model.__tablename__
+        default = self.default_partition_name
+        moved = {}
+        async with self.session() as session:
+            # concurrent runs, e.g. several instances starting at once, take turns
+            await session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:parent))"), {"parent": parent})
+            res = await session.execute(text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:parent AS regclass)"
+            ), {"parent": f'"{parent}"'})
+            attached = set(res.scalars().all())
+            for shift in range(months):
+                month = month_start(start, shift)
+                name = self.partition_name(month)
+                if name in attached:
+                    continue
+                start_at, end_at = (datetime.datetime.combine(day, datetime.time(), datetime.timezone.utc)
+                                    for day in (month, month_start(month, 1)))
+                await session.execute(text(
+                    f'CREATE TABLE "{name}" (LIKE "{parent}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS)'
+                ))
+                moved[name] = 0
+                if default in attached:
+                    res = await session.execute(text(
+                        f'WITH moved AS (DELETE FROM "{default}" WHERE created_at >= :start AND created_at < :end '
+                        f'RETURNING *) INSERT INTO "{name}" SELECT * FROM moved'
+                    ), {"start": start_at, "end": end_at})
+                    moved[name] = res.rowcount
+                await session.execute(text(f'ALTER TABLE "{parent}" ATTACH PARTITION "{name}" '
+                                           f"FOR VALUES FROM ('{start_at}') TO ('{end_at}')"))
+            await self.commit(session)
+        return moved
+
+    async def detach_partitions_before(self, month: datetime.date) -> list[str]:
+        # detached partitions stay in the database as plain tables, to be archived or dropped
+        detached = []
+        cutoff = self.partition_name(month_start(month))
+        async with self.session() as session:
+            res = await session.execute(text(
+                "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = CAST(:parent AS regclass)"
+            ), {"parent": f'"{self.model.__tablename__}"'})
+            for name in sorted(res.scalars().all()):
+                # names share one prefix and a zero padded year and month, so they sort by date
+                if name < cutoff and name != self.default_partition_name:
+                    await session.execute(text(
+                        f'ALTER TABLE "{self.model.__tablename__}" DETACH PARTITION "{name}"'
+                    ))
+                    detached.append(name)
+            await self.commit(session)
+        return detached
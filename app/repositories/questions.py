@@ -1,6 +1,32 @@
-from app.models.model import Question
+from sqlalchemy import select, update
+
+from app.models.model import Question, Company, QuestionStats
+from app.schemas.questions import QuestionShortSchema, QuestionCountsSchema
 from app.utils.repository import SQLAlchemyRepository
 
 
 class QuestionsRepository(SQLAlchemyRepository):
     model = Question
+    loading_profiles = {"none": QuestionShortSchema, "counts": QuestionCountsSchema, "full": None}
+
+    async def add_to_counts(self, company_id: int, delta: int):
+        # moves the company's question count and the total over every company by delta, in the
+        # transaction that creates or deletes the questions; the company row is locked first
+        if not delta:
+            return
+        async with self.session() as session:
+            await session.execute(update(Company).where(Company.id == company_id)
+                                  .values(question_count=Company.question_count + delta))
+            await session.execute(update(QuestionStats).where(QuestionStats.id == 1)
+                                  .values(question_count=QuestionStats.question_count + delta))
+            await self.commit(session)
+
+    async def count_in_scope(self, company_id: int | None = None) -> int:
+        # questions of the company, or of every company, read from the maintained counts
+        if company_id is None:
+            stmt = select(QuestionStats.question_count).where(QuestionStats.id == 1)
+        else:
+            stmt = select(Company.question_count).where(Company.id == company_id)
+        async with self.read_session() as session:
+            res = await session.execute(stmt)
+            return res.scalar_one_or_none() or 0
@@ -1,6 +1,28 @@
+from sqlalchemy import update, bindparam, func
+
 from app.models.model import Quiz
+from app.schemas.quizzes import QuizShortSchema, QuizCountsSchema
 from app.utils.repository import SQLAlchemyRepository
 
 
 class QuizzesRepository(SQLAlchemyRepository):
     model = Quiz
+    loading_profiles = {"none": QuizShortSchema, "counts": QuizCountsSchema, "full": None}
+
+    async def record_activity(self, rows: list[dict], batch: str):
+        # rows hold quiz_id, passed_at (may be None) and passes; one executemany, the time only moves forward.
+        # Quizzes that already have this batch applied are left alone, so a batch whose removal from
+        # Redis failed after the commit is not counted twice when it is flushed again.
+        if not rows:
+            return
+        table = self.model.__table__
+        stmt = (update(table)
+                .where(table.c.id == bindparam("quiz_id"),
+                       table.c.activity_batch.is_distinct_from(bindparam("batch")))
+                .values(last_passed_at=func.greatest(table.c.last_passed_at,
+                                                     bindparam("passed_at", type_=table.c.last_passed_at.type)),
+                        passes_count=table.c.passes_count + bindparam("passes"),
+                        activity_batch=bindparam("batch")))
+        async with self.session() as session:
+            await session.execute(stmt, [{**row, "batch": batch} for row in rows])
+            await self.commit(session)
@@ -1,6 +1,64 @@
-from app.models.model import Result
+from sqlalchemy import select, func, and_, tuple_, union, cast, Float
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.models.model import Result, Company, Member
+from app.schemas.result import CompanyAverageResultForUserListDetail
+from app.utils.pagination import encode_cursor, decode_cursor
 from app.utils.repository import SQLAlchemyRepository
 
 
 class ResultsRepository(SQLAlchemyRepository):
     model = Result
+
+    async def upsert_with_previous(self, data: list[dict]) -> dict[tuple[int, int, int], tuple[int, int, int]]:
+        # returns (user_id, company_id, quiz_id) -> (id, previous right count, previous total count),
+        # previous counts are 0 for new rows; data must hold one row per key.
+        # Every key is locked before its previous counts are read: missing rows are first inserted
+        # empty, in key order, so a concurrent first submission of the same key waits on the unique
+        # index instead of also reading no previous row; existing rows are locked with FOR UPDATE.
+        if not data:
+            return {}
+        keys = [Result.user_id, Result.company_id, Result.quiz_id]
+        index_elements = ["user_id", "company_id", "quiz_id"]
+        key_values = sorted(tuple(row[key] for key in index_elements) for row in data)
+        async with self.session() as session:
+            await session.execute(
+                pg_insert(Result).on_conflict_do_nothing(index_elements=index_elements),
+                [{**dict(zip(index_elements, key)), "result_right_count": 0, "result_total_count": 0}
+                 for key in key_values])
+            stmt = (select(*keys, Result.result_right_count, Result.result_total_count)
+                    .where(tuple_(*keys).in_(key_values))
+                    .order_by(*keys)
+                    .with_for_update())
+            res = await session.execute(stmt)
+            previous = {(user_id, company_id, quiz_id): (right, total)
+                        for user_id, company_id, quiz_id, right, total in res.all()}
+
+            res = await session.execute(self.upsert_statement(data, index_elements), data)
+            ids = list(res.scalars().all())
+            await self.commit(session)
+            return {key: (result_id, *previous.get(key, (0, 0)))
+                    for key, result_id in zip([tuple(row[key] for key in index_elements) for row in data], ids)}
+
+    async def get_members_averages_page(self, manager_id: int, limit: int, after: str | None = None, **filter_by):
+        # results of the current members of every company the manager owns or administers, one statement;
+        # keyset pagination by result id
+        managed = union(select(Company.id).where(Company.owner_id == manager_id),
+                        select(Member.company_id).where(Member.user_id == manager_id, Member.role != "member"))
+        average = func.coalesce(cast(Result.result_right_count, Float)
+                                / cast(func.nullif(Result.result_total_count, 0), Float), 0)
+        stmt = (select(Result.id, Result.user_id, Result.company_id, Result.quiz_id, average.label("average_result"))
+                .join(Member, and_(Member.company_id == Result.company_id, Member.user_id == Result.user_id))
+                .where(Result.company_id.in_(managed), *self.filters(**filter_by)))
+        if after is not None:
+            stmt = stmt.where(Result.id > decode_cursor(after, [Result.id])[0])
+        stmt = stmt.order_by(Result.id).limit(limit + 1)
+        async with self.read_session() as session:
+            res = await session.execute(stmt)
+            rows = res.all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1].id])
+        return [CompanyAverageResultForUserListDetail(**row._mapping) for row in rows], next_cursor
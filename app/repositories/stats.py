@@ -0,0 +1,82 @@
+from sqlalchemy import select, func, delete, and_, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.models.model import UserCompanyStats, UserStats, Result, QuizAttempt
+from app.utils.repository import SQLAlchemyRepository
+
+
+class RollupRepository(SQLAlchemyRepository):
+    # primary key columns of the rollup, the remaining columns are sums and the last attempt time
+    key_columns: list[str] = []
+
+    async def add_deltas(self, rows: list[dict]) -> list[dict]:
+        # rows hold the key columns plus right_sum, total_sum and attempts deltas and last_attempt_at;
+        # returns the keys with the updated right_sum and total_sum, and a version: the database clock
+        # read once the row is locked, so a later update of the same row always gets a later version
+        if not rows:
+            return []
+        table = self.model.__table__
+        async with self.session() as session:
+            stmt = pg_insert(self.model)
+            stmt = stmt.on_conflict_do_update(index_elements=self.key_columns, set_={
+                "right_sum": table.c.right_sum + stmt.excluded.right_sum,
+                "total_sum": table.c.total_sum + stmt.excluded.total_sum,
+                "attempts": table.c.attempts + stmt.excluded.attempts,
+                "last_attempt_at": func.greatest(table.c.last_attempt_at, stmt.excluded.last_attempt_at),
+            })
+            stmt = stmt.returning(*[table.c[key] for key in self.key_columns], table.c.right_sum, table.c.total_sum,
+                                  func.extract("epoch", func.clock_timestamp()).label("version"))
+            res = await session.execute(stmt, rows)
+            updated = [dict(row._mapping) for row in res.all()]
+            await self.commit(session)
+            return updated
+
+    async def iter_rows(self, batch_size: int = 1000):
+        # walks the whole table in primary key order, one batch of read models at a time
+        keys = [getattr(self.model, key) for key in self.key_columns]
+        last = None
+        while True:
+            stmt = select(self.model).order_by(*keys).limit(batch_size)
+            if last is not None:
+                stmt = stmt.where(tuple_(*keys) > tuple_(*last))
+            async with self.read_session() as session:
+                res = await session.execute(stmt)
+                rows = [row.to_read_model() for row in res.scalars().all()]
+            if not rows:
+                return
+            yield rows
+            last = [getattr(rows[-1], key) for key in self.key_columns]
+
+    async def rebuild(self, **filter_by):
+        # recomputes rows from Result and QuizAttempt; filter_by narrows it to some key values
+        keys = self.key_columns
+        attempts = (select(*[getattr(QuizAttempt, key) for key in keys],
+                           func.count().label("attempts"),
+                           func.max(QuizAttempt.created_at).label("last_attempt_at"))
+                    .where(*[getattr(QuizAttempt, key) == value for key, value in filter_by.items()])
+                    .group_by(*[getattr(QuizAttempt, key) for key in keys])
+                    .subquery())
+        totals = (select(*[getattr(Result, key) for key in keys],
+                         func.sum(Result.result_right_count).label("right_sum"),
+                         func.sum(Result.result_total_count).label("total_sum"))
+                  .where(*[getattr(Result, key) == value for key, value in filter_by.items()])
+                  .group_by(*[getattr(Result, key) for key in keys])
+                  .subquery())
+        rows = (select(*[totals.c[key] for key in keys], totals.c.right_sum, totals.c.total_sum,
+                       func.coalesce(attempts.c.attempts, 0), attempts.c.last_attempt_at)
+                .select_from(totals.outerjoin(attempts, and_(*[totals.c[key] == attempts.c[key] for key in keys]))))
+        async with self.session() as session:
+            await session.execute(delete(self.model).where(*self.filters(**filter_by)))
+            await session.execute(pg_insert(self.model).from_select(
+                [*keys, "right_sum", "total_sum", "attempts", "last_attempt_at"], rows))
+            await self.commit(session)
+
+
+class UserCompanyStatsRepository(RollupRepository):
+    model = UserCompanyStats
+    key_columns = ["user_id", "company_id"]
+
+
+class UserStatsRepository(RollupRepository):
+    model = UserStats
+    key_columns = ["user_id"]
@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from typing import Annotated
 
+from redis import Redis
 from starlette import status
 
 from app.auth.utils_auth import check_token
+from app.db.database import get_redis_db
 from app.schemas.actions import OwnerActionCreate, UserActionCreate
 from app.schemas.invitations import InvitationListResponse
 from app.schemas.members import MemberListResponse
 from app.schemas.requests import RequestListResponse
-from app.schemas.response import Response
+from app.schemas.response import Response, Page
 
 from app.services.owner_actions import OwnerActionHandler
 from app.services.auth import AuthService
@@ -24,9 +26,10 @@ async def create_owner_action(
         action_handler: Annotated[OwnerActionHandler, Depends(owner_actions_handler)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    res = await action_handler.handle_action(action, current_user)
+    res = await action_handler.handle_action(action, current_user, redis_client)
     return Response(
         status_code=status.HTTP_200_OK,
         detail="OK",
@@ -40,9 +43,10 @@ async def create_user_action(
         action_handler: Annotated[UserActionHandler, Depends(user_actions_handler)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    res = await action_handler.handle_action(action, current_user)
+    res = await action_handler.handle_action(action, current_user, redis_client)
     return Response(
         status_code=status.HTTP_200_OK,
         detail="OK",
@@ -50,65 +54,83 @@ async def create_user_action(
     )
 
 
-@router.get("/invitations", response_model=list[InvitationListResponse])
+@router.get("/invitations", response_model=Page[InvitationListResponse])
 async def get_user_invitations(
         action_handler: Annotated[UserActionHandler, Depends(user_actions_handler)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        after: str | None = None,
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    return await action_handler.get_all_invitations(current_user)
+    invitations, next_cursor = await action_handler.get_all_invitations(current_user, limit, after)
+    return Page(items=invitations, next_cursor=next_cursor)
 
 
-@router.get("/requests", response_model=list[RequestListResponse])
+@router.get("/requests", response_model=Page[RequestListResponse])
 async def get_user_requests(
         action_handler: Annotated[UserActionHandler, Depends(user_actions_handler)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        after: str | None = None,
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    return await action_handler.get_all_requests(current_user)
+    requests, next_cursor = await action_handler.get_all_requests(current_user, limit, after)
+    return Page(items=requests, next_cursor=next_cursor)
 
 
-@router.get("/companies/{company_id}/members", response_model=list[MemberListResponse])
+@router.get("/companies/{company_id}/members", response_model=Page[MemberListResponse])
 async def get_company_members(
         company_id: int,
         action_handler: Annotated[OwnerActionHandler, Depends(owner_actions_handler)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        after: str | None = None,
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    return await action_handler.get_all_members(company_id, current_user)
+    members, next_cursor = await action_handler.get_all_members(company_id, current_user, limit, after)
+    return Page(items=members, next_cursor=next_cursor)
 
 
-@router.get("/companies/{company_id}/admins", response_model=list[MemberListResponse])
+@router.get("/companies/{company_id}/admins", response_model=Page[MemberListResponse])
 async def get_company_admins(
         company_id: int,
         action_handler: Annotated[OwnerActionHandler, Depends(owner_actions_handler)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        after: str | None = None,
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    return await action_handler.get_all_admins(company_id, current_user)
+    admins, next_cursor = await action_handler.get_all_admins(company_id, current_user, limit, after)
+    return Page(items=admins, next_cursor=next_cursor)
 
 
-@router.get("/invitations/{company_id}", response_model=list[InvitationListResponse])
+@router.get("/invitations/{company_id}", response_model=Page[InvitationListResponse])
 async def get_invitations_for_company(
         company_id: int,
         action_handler: Annotated[OwnerActionHandler, Depends(owner_actions_handler)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        after: str | None = None,
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    return await action_handler.get_all_invitations(company_id, current_user)
+    invitations, next_cursor = await action_handler.get_all_invitations(company_id, current_user, limit, after)
+    return Page(items=invitations, next_cursor=next_cursor)
 
 
-@router.get("/requests/{company_id}", response_model=list[RequestListResponse])
+@router.get("/requests/{company_id}", response_model=Page[RequestListResponse])
 async def get_requests_for_company(
         company_id: int,
         action_handler: Annotated[OwnerActionHandler, Depends(owner_actions_handler)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        after: str | None = None,
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    return await action_handler.get_all_requests(company_id, current_user)
+    requests, next_cursor = await action_handler.get_all_requests(company_id, current_user, limit, after)
+    return Page(items=requests, next_cursor=next_cursor)
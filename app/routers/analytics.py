@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends
+import datetime
+
+from fastapi import APIRouter, Depends, Query
 from typing import Annotated
 
 from redis import Redis
@@ -6,9 +8,9 @@ from starlette import status
 from app.auth.utils_auth import check_token
 from app.db.database import get_redis_db
 from app.schemas.quizzes import QuizDateRequest
-from app.schemas.response import Response
+from app.schemas.response import Response, Page
 from app.schemas.result import AverageResultListDetail, CompanyAverageResultForUserListDetail, \
-    UserAverageResultDateListDetail, UserPassingDateListDetail
+    UserAverageResultDateListDetail, UserPassingDateListDetail, TrendBucket, TrendBucketDetail
 from app.schemas.user_answer import UserAnswerListSchema
 from app.services.auth import AuthService
 from app.services.dependencies import authentication_service, results_service
@@ -36,30 +38,39 @@ async def analytics_average_total(
 async def get_my_average_results_list(
         result_service: Annotated[ResultsService, Depends(results_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
         payload: Annotated[dict, Depends(check_token)],
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    return await result_service.get_average_results_list(current_user)
+    return await result_service.get_average_results_list(current_user, redis_client)
 
 
 @router.get("/analytics/quizzes", response_model=list[QuizDateRequest])
 async def get_quizzes_dates_list(
         result_service: Annotated[ResultsService, Depends(results_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
         payload: Annotated[dict, Depends(check_token)],
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    return await result_service.get_quizzes_dates_list(current_user)
+    return await result_service.get_quizzes_dates_list(current_user, redis_client)
 
 
-@router.get("/analytics/members_average", response_model=list[CompanyAverageResultForUserListDetail])
+@router.get("/analytics/members_average", response_model=Page[CompanyAverageResultForUserListDetail])
 async def get_members_average_results_list(
         result_service: Annotated[ResultsService, Depends(results_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
         payload: Annotated[dict, Depends(check_token)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        after: str | None = None,
+        company_id: int | None = None,
+        quiz_id: int | None = None,
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    return await result_service.get_all_members_averages(current_user)
+    averages, next_cursor = await result_service.get_all_members_averages(current_user, redis_client, limit, after,
+                                                                          company_id, quiz_id)
+    return Page(items=averages, next_cursor=next_cursor)
 
 
 @router.get("/analytics/{user_id}", response_model=list[UserAverageResultDateListDetail])
@@ -67,10 +78,11 @@ async def get_member_averages(
         user_id: int,
         result_service: Annotated[ResultsService, Depends(results_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
         payload: Annotated[dict, Depends(check_token)],
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    return await result_service.get_member_averages(user_id, current_user)
+    return await result_service.get_member_averages(user_id, current_user, redis_client)
 
 
 @router.get("/analytics/dates/{company_id}", response_model=list[UserPassingDateListDetail])
@@ -78,7 +90,60 @@ async def get_company_members_passing_dates(
         company_id: int,
         result_service: Annotated[ResultsService, Depends(results_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
+        payload: Annotated[dict, Depends(check_token)],
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+):
+    current_user = await auth_service.get_user_by_payload(payload)
+    return await result_service.get_company_members_passing_dates(company_id, current_user, redis_client,
+                                                                  since, until)
+
+
+@router.get("/analytics/trends/{company_id}", response_model=list[TrendBucketDetail])
+async def get_company_trend(
+        company_id: int,
+        result_service: Annotated[ResultsService, Depends(results_service)],
+        auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
+        payload: Annotated[dict, Depends(check_token)],
+        bucket: TrendBucket = TrendBucket.day,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+):
+    current_user = await auth_service.get_user_by_payload(payload)
+    return await result_service.get_trend(company_id, current_user, redis_client, bucket, since, until)
+
+
+@router.get("/analytics/trends/{company_id}/quizzes/{quiz_id}", response_model=list[TrendBucketDetail])
+async def get_quiz_trend(
+        company_id: int,
+        quiz_id: int,
+        result_service: Annotated[ResultsService, Depends(results_service)],
+        auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
+        payload: Annotated[dict, Depends(check_token)],
+        bucket: TrendBucket = TrendBucket.day,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
+):
+    current_user = await auth_service.get_user_by_payload(payload)
+    return await result_service.get_trend(company_id, current_user, redis_client, bucket, since, until,
+                                          quiz_id=quiz_id)
+
+
+@router.get("/analytics/trends/{company_id}/members/{user_id}", response_model=list[TrendBucketDetail])
+async def get_member_trend(
+        company_id: int,
+        user_id: int,
+        result_service: Annotated[ResultsService, Depends(results_service)],
+        auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
         payload: Annotated[dict, Depends(check_token)],
+        bucket: TrendBucket = TrendBucket.day,
+        since: datetime.datetime | None = None,
+        until: datetime.datetime | None = None,
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    return await result_service.get_company_members_passing_dates(company_id, current_user)
+    return await result_service.get_trend(company_id, current_user, redis_client, bucket, since, until,
+                                          user_id=user_id)
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from typing import Annotated
 
+from redis import Redis
 from starlette import status
 
 from app.auth.utils_auth import check_token
+from app.db.database import get_redis_db
 from app.schemas.companies import CompanyCreateRequest, CompanyUpdateRequest, CompaniesListResponse, CompanySchema
 from app.schemas.quizzes import QuizDetailsSchema
-from app.schemas.response import Response
+from app.schemas.response import Response, Page
 from app.services.auth import AuthService
 from app.services.companies import CompaniesService
 from app.services.dependencies import authentication_service, companies_service, quizzes_service
@@ -53,10 +55,11 @@ async def delete_company(
         company_id: int,
         company_service: Annotated[CompaniesService, Depends(companies_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
         payload: Annotated[dict, Depends(check_token)],
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    res = await company_service.delete_company(company_id, current_user)
+    res = await company_service.delete_company(company_id, current_user, redis_client)
     return Response(
         status_code=status.HTTP_200_OK,
         detail="OK",
@@ -64,11 +67,14 @@ async def delete_company(
     )
 
 
-@router.get("/companies", response_model=list[CompaniesListResponse])
+@router.get("/companies", response_model=Page[CompaniesListResponse])
 async def get_all_companies(
-        company_service: Annotated[CompaniesService, Depends(companies_service)]
+        company_service: Annotated[CompaniesService, Depends(companies_service)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        after: str | None = None,
 ):
-    return await company_service.get_all_companies()
+    companies, next_cursor = await company_service.get_all_companies(limit, after)
+    return Page(items=companies, next_cursor=next_cursor)
 
 
 @router.get("/companies/{company_id}", response_model=Response[CompanySchema])
@@ -84,13 +90,16 @@ async def read_item(
         )
 
 
-@router.get("/companies/{company_id}/quizzes", response_model=list[QuizDetailsSchema])
+@router.get("/companies/{company_id}/quizzes", response_model=Page[QuizDetailsSchema])
 async def add_quiz(
         company_id: int,
         quiz_service: Annotated[QuizzesService, Depends(quizzes_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        after: str | None = None,
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    return await quiz_service.get_all_quizzes(company_id, current_user)
+    quizzes, next_cursor = await quiz_service.get_all_quizzes(company_id, current_user, limit, after)
+    return Page(items=quizzes, next_cursor=next_cursor)
 
@@ -0,0 +1,91 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from redis import Redis
+
+from app.auth.utils_auth import check_token
+from app.db.database import get_redis_db
+from app.schemas.result import LeaderboardEntrySchema
+from app.services.auth import AuthService
+from app.services.dependencies import authentication_service, results_service
+from app.services.results import ResultsService
+
+router = APIRouter(tags=["leaderboards"])
+
+
+@router.get("/leaderboards/companies/{company_id}", response_model=list[LeaderboardEntrySchema])
+async def get_company_leaderboard(
+        company_id: int,
+        result_service: Annotated[ResultsService, Depends(results_service)],
+        auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
+        payload: Annotated[dict, Depends(check_token)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 10,
+):
+    current_user = await auth_service.get_user_by_payload(payload)
+    return await result_service.get_leaderboard_top(current_user, redis_client, limit, company_id=company_id)
+
+
+@router.get("/leaderboards/companies/{company_id}/around-me", response_model=list[LeaderboardEntrySchema])
+async def get_company_leaderboard_around_me(
+        company_id: int,
+        result_service: Annotated[ResultsService, Depends(results_service)],
+        auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
+        payload: Annotated[dict, Depends(check_token)],
+        radius: Annotated[int, Query(ge=0, le=50)] = 5,
+):
+    current_user = await auth_service.get_user_by_payload(payload)
+    return await result_service.get_leaderboard_around_me(current_user, redis_client, radius, company_id=company_id)
+
+
+@router.get("/leaderboards/companies/{company_id}/users/{user_id}", response_model=LeaderboardEntrySchema)
+async def get_company_leaderboard_rank(
+        company_id: int,
+        user_id: int,
+        result_service: Annotated[ResultsService, Depends(results_service)],
+        auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
+        payload: Annotated[dict, Depends(check_token)],
+):
+    current_user = await auth_service.get_user_by_payload(payload)
+    return await result_service.get_leaderboard_rank(current_user, redis_client, user_id, company_id=company_id)
+
+
+@router.get("/leaderboards/quizzes/{quiz_id}", response_model=list[LeaderboardEntrySchema])
+async def get_quiz_leaderboard(
+        quiz_id: int,
+        result_service: Annotated[ResultsService, Depends(results_service)],
+        auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
+        payload: Annotated[dict, Depends(check_token)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 10,
+):
+    current_user = await auth_service.get_user_by_payload(payload)
+    return await result_service.get_leaderboard_top(current_user, redis_client, limit, quiz_id=quiz_id)
+
+
+@router.get("/leaderboards/quizzes/{quiz_id}/around-me", response_model=list[LeaderboardEntrySchema])
+async def get_quiz_leaderboard_around_me(
+        quiz_id: int,
+        result_service: Annotated[ResultsService, Depends(results_service)],
+        auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
+        payload: Annotated[dict, Depends(check_token)],
+        radius: Annotated[int, Query(ge=0, le=50)] = 5,
+):
+    current_user = await auth_service.get_user_by_payload(payload)
+    return await result_service.get_leaderboard_around_me(current_user, redis_client, radius, quiz_id=quiz_id)
+
+
+@router.get("/leaderboards/quizzes/{quiz_id}/users/{user_id}", response_model=LeaderboardEntrySchema)
+async def get_quiz_leaderboard_rank(
+        quiz_id: int,
+        user_id: int,
+        result_service: Annotated[ResultsService, Depends(results_service)],
+        auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
+        payload: Annotated[dict, Depends(check_token)],
+):
+    current_user = await auth_service.get_user_by_payload(payload)
+    return await result_service.get_leaderboard_rank(current_user, redis_client, user_id, quiz_id=quiz_id)
@@ -1,11 +1,11 @@
 import datetime
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from typing import Annotated
 from starlette import status
 from app.auth.utils_auth import check_token
 from app.schemas.notifications import NotificationDetailSchema
-from app.schemas.response import Response
+from app.schemas.response import Response, Page
 from app.services.auth import AuthService
 from app.services.dependencies import authentication_service, notifications_service
 from app.services.notifications import NotificationsService
@@ -13,14 +13,17 @@ from app.services.notifications import NotificationsService
 router = APIRouter(tags=["notifications"])
 
 
-@router.get("/notifications", response_model=list[NotificationDetailSchema])
+@router.get("/notifications", response_model=Page[NotificationDetailSchema])
 async def get_notifications(
         notification_service: Annotated[NotificationsService, Depends(notifications_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        after: str | None = None,
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    return await notification_service.get_notification(current_user)
+    notifications, next_cursor = await notification_service.get_notification(current_user, limit, after)
+    return Page(items=notifications, next_cursor=next_cursor)
 
 
 @router.post("/notifications/{notification_id}", response_model=Response[int])
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, Query
 from typing import Annotated
+from redis import Redis
 from starlette import status
 from app.auth.utils_auth import check_token
+from app.db.database import get_redis_db
 from app.schemas.answers import AnswerCreateRequest, AnswerUpdateRequest
 from app.schemas.questions import QuestionCreateRequest, QuestionUpdateRequest
 from app.schemas.quizzes import QuizCreateRequest, QuizUpdateRequest
@@ -21,9 +23,10 @@ async def add_quiz(
         quiz_service: Annotated[QuizzesService, Depends(quizzes_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    res = await quiz_service.add_quiz(quiz, current_user)
+    res = await quiz_service.add_quiz(quiz, current_user, redis_client)
     return Response(
         status_code=status.HTTP_200_OK,
         detail="added",
@@ -37,9 +40,10 @@ async def delete_quiz(
         quiz_service: Annotated[QuizzesService, Depends(quizzes_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    res = await quiz_service.delete_quiz(quiz_id, current_user)
+    res = await quiz_service.delete_quiz(quiz_id, current_user, redis_client)
     return Response(
         status_code=status.HTTP_200_OK,
         detail="deleted",
@@ -71,9 +75,10 @@ async def add_question(
         quiz_service: Annotated[QuizzesService, Depends(quizzes_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    res = await quiz_service.add_question(quiz_id, question, current_user)
+    res = await quiz_service.add_question(quiz_id, question, current_user, redis_client)
     return Response(
         status_code=status.HTTP_200_OK,
         detail="added",
@@ -89,9 +94,10 @@ async def update_question(
         quiz_service: Annotated[QuizzesService, Depends(quizzes_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    res = await quiz_service.edit_question(quiz_id, question_id, question, current_user)
+    res = await quiz_service.edit_question(quiz_id, question_id, question, current_user, redis_client)
     return Response(
         status_code=status.HTTP_200_OK,
         detail="updated",
@@ -106,9 +112,10 @@ async def delete_question(
         quiz_service: Annotated[QuizzesService, Depends(quizzes_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    res = await quiz_service.delete_question(quiz_id, question_id, current_user)
+    res = await quiz_service.delete_question(quiz_id, question_id, current_user, redis_client)
     return Response(
         status_code=status.HTTP_200_OK,
         detail="deleted",
@@ -124,9 +131,10 @@ async def add_answer(
         quiz_service: Annotated[QuizzesService, Depends(quizzes_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    res = await quiz_service.add_answer(quiz_id, question_id, answer, current_user)
+    res = await quiz_service.add_answer(quiz_id, question_id, answer, current_user, redis_client)
     return Response(
         status_code=status.HTTP_200_OK,
         detail="added",
@@ -143,9 +151,10 @@ async def update_answer(
         quiz_service: Annotated[QuizzesService, Depends(quizzes_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    res = await quiz_service.edit_answer(quiz_id, question_id, answer_id, answer, current_user)
+    res = await quiz_service.edit_answer(quiz_id, question_id, answer_id, answer, current_user, redis_client)
     return Response(
         status_code=status.HTTP_200_OK,
         detail="updated",
@@ -161,9 +170,10 @@ async def delete_answer(
         quiz_service: Annotated[QuizzesService, Depends(quizzes_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         payload: Annotated[dict, Depends(check_token)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    res = await quiz_service.delete_answer(quiz_id, question_id, answer_id, current_user)
+    res = await quiz_service.delete_answer(quiz_id, question_id, answer_id, current_user, redis_client)
     return Response(
         status_code=status.HTTP_200_OK,
         detail="deleted",
@@ -1,34 +1,88 @@
-from fastapi import APIRouter, Depends
-from typing import Annotated
+from fastapi import APIRouter, Depends, Header, Query, Response as HTTPResponse
+from fastapi.responses import StreamingResponse
+from typing import Annotated, Literal
 
 from redis import Redis
 from starlette import status
 from app.auth.utils_auth import check_token
+from app.core.config import redis_settings
 from app.db.database import get_redis_db
 from app.schemas.response import Response
-from app.schemas.user_answer import UserAnswerListSchema
+from app.schemas.user_answer import UserAnswerListSchema, AttemptStatusSchema
 from app.services.auth import AuthService
 from app.services.dependencies import authentication_service, results_service
+from app.services.idempotency import IdempotencyStore
 from app.services.results import ResultsService
 
 router = APIRouter(tags=["results"])
+idempotency_store = IdempotencyStore()
 
 
-@router.post("/results/{quiz_id}", response_model=Response[int])
+@router.post("/results/{quiz_id}", response_model=Response[int | str])
 async def pass_quiz(
         quiz_id: int,
         company_id: int,
         user_answers: UserAnswerListSchema,
+        response: HTTPResponse,
+        result_service: Annotated[ResultsService, Depends(results_service)],
+        auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
+        payload: Annotated[dict, Depends(check_token)],
+        idempotency_key: Annotated[str | None, Header(alias="Idempotency-Key", max_length=255)] = None,
+):
+    key = None
+    if idempotency_key and payload:
+        # retries are answered from Redis before the user is loaded or anything is scored
+        key = idempotency_store.key(payload.get("user_email") or payload.get("sub"), idempotency_key)
+        fingerprint = idempotency_store.fingerprint(quiz_id, company_id, user_answers.model_dump())
+        stored = await idempotency_store.claim(redis_client, key, fingerprint)
+        if stored is not None:
+            response.status_code = stored["status_code"]
+            return Response(**stored)
+
+    try:
+        current_user = await auth_service.get_user_by_payload(payload)
+        if redis_settings.submissions_async:
+            # scored by the worker in app/workers/scoring.py, the result holds the attempt id to poll
+            attempt_id = await result_service.submit_result(company_id, quiz_id, user_answers, current_user,
+                                                            redis_client)
+            response.status_code = status.HTTP_202_ACCEPTED
+            res = Response(
+                status_code=status.HTTP_202_ACCEPTED,
+                detail="queued",
+                result=attempt_id
+            )
+        else:
+            result_id = await result_service.get_result(company_id, quiz_id, user_answers, current_user,
+                                                        redis_client)
+            res = Response(
+                status_code=status.HTTP_200_OK,
+                detail="passed",
+                result=result_id
+            )
+    except Exception:
+        if key:
+            await idempotency_store.release(redis_client, key)
+        raise
+
+    if key:
+        await idempotency_store.complete(redis_client, key, fingerprint, res.model_dump())
+    return res
+
+
+@router.get("/results/attempts/{attempt_id}", response_model=Response[AttemptStatusSchema])
+async def get_attempt_status(
+        attempt_id: str,
         result_service: Annotated[ResultsService, Depends(results_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         redis_client: Annotated[Redis, Depends(get_redis_db)],
         payload: Annotated[dict, Depends(check_token)],
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    res = await result_service.get_result(company_id, quiz_id, user_answers, current_user, redis_client)
+    res = await result_service.get_attempt_status(attempt_id, current_user, redis_client)
     return Response(
         status_code=status.HTTP_200_OK,
-        detail="passed",
+        detail="OK",
         result=res
     )
 
@@ -64,20 +118,35 @@ async def get_company_rating(
     )
 
 
-@router.get("/csv", response_model=Response[bool])
-async def get_results_csv(
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson", "json": "application/json"}
+
+
+@router.get("/export")
+async def export_results(
         result_service: Annotated[ResultsService, Depends(results_service)],
         auth_service: Annotated[AuthService, Depends(authentication_service)],
         redis_client: Annotated[Redis, Depends(get_redis_db)],
         payload: Annotated[dict, Depends(check_token)],
+        export_format: Annotated[Literal["csv", "ndjson", "json"], Query(alias="format")] = "csv",
 ):
     current_user = await auth_service.get_user_by_payload(payload)
-    res = await result_service.export_to_csv(redis_client, current_user)
-    return Response(
-        status_code=status.HTTP_200_OK,
-        detail="OK",
-        result=res
+    return StreamingResponse(
+        result_service.export_results(redis_client, current_user, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f"attachment; filename=results.{export_format}"},
     )
 
 
-
+@router.get("/csv")
+async def get_results_csv(
+        result_service: Annotated[ResultsService, Depends(results_service)],
+        auth_service: Annotated[AuthService, Depends(authentication_service)],
+        redis_client: Annotated[Redis, Depends(get_redis_db)],
+        payload: Annotated[dict, Depends(check_token)],
+):
+    current_user = await auth_service.get_user_by_payload(payload)
+    return StreamingResponse(
+        result_service.export_results(redis_client, current_user, "csv"),
+        media_type=EXPORT_MEDIA_TYPES["csv"],
+        headers={"Content-Disposition": "attachment; filename=results.csv"},
+    )
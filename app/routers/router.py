@@ -1,12 +1,17 @@
 from redis import Redis
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from functools import lru_cache
 from typing import Annotated
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.utils_auth import check_token
 from app.core.config import Settings
-from app.db.database import get_async_session, get_redis_db
+from app.db.database import get_async_session, get_redis_db, get_pool_status
+from app.services.analytics_cache import analytics_cache_stats
+from app.services.auth import AuthService
+from app.services.dependencies import authentication_service
+from app.services.redis import submission_write_latency
 
 
 router = APIRouter(tags=["default"])
@@ -51,6 +56,23 @@ async def redis_check(db: Redis = Depends(get_redis_db)):
         }
 
 
+@router.get("/redis/metrics")
+async def redis_metrics(
+        auth_service: Annotated[AuthService, Depends(authentication_service)],
+        payload: Annotated[dict, Depends(check_token)],
+):
+    # latency and cache internals are for operators only
+    current_user = await auth_service.get_user_by_payload(payload)
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return {
+        "status": 200,
+        "data": {"submission_writes": submission_write_latency.snapshot(),
+                 "analytics_cache": analytics_cache_stats.snapshot()},
+        "details": None
+    }
+
+
 @router.get("/postgresql")
 async def db_check(session: AsyncSession = Depends(get_async_session)):
     try:
@@ -66,3 +88,19 @@ async def db_check(session: AsyncSession = Depends(get_async_session)):
             "error_message": str(e),
             "details": None
         }
+
+
+@router.get("/postgresql/pool")
+async def db_pool_status(
+        auth_service: Annotated[AuthService, Depends(authentication_service)],
+        payload: Annotated[dict, Depends(check_token)],
+):
+    # pool internals are for operators only
+    current_user = await auth_service.get_user_by_payload(payload)
+    if not current_user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    return {
+        "status": 200,
+        "data": get_pool_status(),
+        "details": None
+    }
@@ -1,10 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from typing import Annotated
 
 from starlette import status
 
 from app.auth.utils_auth import check_token
-from app.schemas.response import Response
+from app.schemas.response import Response, Page
 from app.schemas.schema import UserSignUpRequest, UserUpdateRequest, UsersListResponse, UserSchema
 from app.services.auth import AuthService
 from app.services.dependencies import users_service, authentication_service
@@ -62,11 +62,14 @@ async def delete_user(
     )
 
 
-@router.get("/users", response_model=list[UsersListResponse])
+@router.get("/users", response_model=Page[UsersListResponse])
 async def get_all_users(
-        user_service: Annotated[UsersService, Depends(users_service)]
+        user_service: Annotated[UsersService, Depends(users_service)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        after: str | None = None,
 ):
-    return await user_service.get_all_users()
+    users, next_cursor = await user_service.get_all_users(limit, after)
+    return Page(items=users, next_cursor=next_cursor)
 
 
 @router.get("/users/{user_id}", response_model=Response[UserSchema])
@@ -16,6 +16,19 @@ class QuestionSchema(BaseModel):
     answers: list[AnswerSchema]
 
 
+class QuestionShortSchema(BaseModel):
+    id: int
+    question_text: str
+    quiz_id: int
+    company_id: int
+    created_by: int
+    updated_by: int
+
+
+class QuestionCountsSchema(QuestionShortSchema):
+    answers_count: int
+
+
 class QuestionDetailsSchema(BaseModel):
     question_text: str
     answers: list[AnswerDetailsSchema]
@@ -17,9 +17,28 @@ class QuizSchema(BaseModel):
     updated_by: int
     company_id: int
     last_passed_at: datetime.datetime | None
+    passes_count: int
     questions: list[QuestionSchema]
 
 
+class QuizShortSchema(BaseModel):
+    id: int
+    quiz_name: str
+    quiz_title: str
+    quiz_description: str
+    quiz_frequency: int
+    created_at: datetime.datetime
+    created_by: int
+    updated_by: int
+    company_id: int
+    last_passed_at: datetime.datetime | None
+    passes_count: int
+
+
+class QuizCountsSchema(QuizShortSchema):
+    questions_count: int
+
+
 class QuizDetailsSchema(BaseModel):
     quiz_name: str
     quiz_title: str
@@ -30,6 +49,7 @@ class QuizDetailsSchema(BaseModel):
     updated_by: int
     company_id: int
     last_passed_at: datetime.datetime | None
+    passes_count: int
     questions: list[QuestionDetailsSchema]
 
 
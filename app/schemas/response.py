@@ -11,6 +11,6 @@ class Response(BaseModel, Generic[DataT]):
     result: Any
 
 
-
-
-
+class Page(BaseModel, Generic[DataT]):
+    items: list[DataT]
+    next_cursor: str | None = None
@@ -1,4 +1,6 @@
 import datetime
+from enum import Enum
+
 from pydantic import BaseModel
 
 
@@ -12,6 +14,33 @@ class ResultSchema(BaseModel):
     result_total_count: int
 
 
+class QuizAttemptSchema(BaseModel):
+    id: int
+    user_id: int
+    company_id: int
+    quiz_id: int
+    created_at: datetime.datetime
+    result_right_count: int
+    result_total_count: int
+
+
+class UserCompanyStatsSchema(BaseModel):
+    user_id: int
+    company_id: int
+    right_sum: int
+    total_sum: int
+    attempts: int
+    last_attempt_at: datetime.datetime | None
+
+
+class UserStatsSchema(BaseModel):
+    user_id: int
+    right_sum: int
+    total_sum: int
+    attempts: int
+    last_attempt_at: datetime.datetime | None
+
+
 class ResultCreateRequest(BaseModel):
     user_id: int
     company_id: int
@@ -55,3 +84,22 @@ class UserAverageResultDateListDetail(BaseModel):
 class UserPassingDateListDetail(BaseModel):
     user_id: int
     last_passed_at: datetime.datetime
+
+
+class TrendBucket(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+class TrendBucketDetail(BaseModel):
+    bucket_start: datetime.datetime
+    attempts: int
+    average_result: float
+
+
+class LeaderboardEntrySchema(BaseModel):
+    user_id: int
+    rank: int
+    accuracy: float
+    answered: int
@@ -1,3 +1,5 @@
+import datetime
+
 from pydantic import BaseModel
 
 
@@ -8,3 +10,19 @@ class UserAnswerSchema(BaseModel):
 
 class UserAnswerListSchema(BaseModel):
     user_answers: list[UserAnswerSchema]
+
+
+class SubmissionSchema(BaseModel):
+    attempt_id: str | None = None
+    submitted_at: datetime.datetime | None = None
+    user_id: int
+    company_id: int
+    quiz_id: int
+    user_answers: list[UserAnswerSchema]
+
+
+class AttemptStatusSchema(BaseModel):
+    attempt_id: str
+    status: str
+    result_id: int | None = None
+    detail: str | None = None
@@ -0,0 +1,74 @@
+import json
+
+from pydantic import TypeAdapter
+from redis import Redis
+
+from app.core.config import redis_settings
+from app.utils.metrics import HitStats
+from app.utils.unit_of_work import current_unit_of_work, primary_reads
+
+# lookups of cached analytics responses
+analytics_cache_stats = HitStats()
+
+
+class AnalyticsCache:
+    """Serialized analytics responses, keyed by endpoint, user and company.
+
+    Every entry carries tags such as company:{id} and user:{id} and is stored together
+    with the versions its tags had when it was computed. Invalidating a tag bumps its
+    version, so entries written under an older version are ignored and expire with the TTL.
+    """
+    QUIZZES_TAG = "quizzes"
+
+    @staticmethod
+    def user_tag(user_id: int) -> str:
+        return f"user:{user_id}"
+
+    @staticmethod
+    def company_tag(company_id: int) -> str:
+        return f"company:{company_id}"
+
+    @staticmethod
+    def key(endpoint: str, user_id: int, company_id: int | None = None, *params) -> str:
+        return ":".join(["analytics", endpoint, str(user_id), str(company_id), *map(str, params)])
+
+    @staticmethod
+    def version_key(tag: str) -> str:
+        return f"analytics_tag_version:{tag}"
+
+    async def get_or_compute(self, redis_client: Redis, key: str, tags: list[str], schema, compute):
+        # schema is the response type, used to (de)serialize it; compute is an argument-less coroutine function
+        adapter = TypeAdapter(schema)
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.get(self.version_key(tag))
+            pipe.get(key)
+            *versions, cached = await pipe.execute()
+        versions = [int(version or 0) for version in versions]
+
+        cached = json.loads(cached) if cached else None
+        if cached is not None and cached["versions"] == versions:
+            analytics_cache_stats.hit()
+            return adapter.validate_python(cached["data"])
+
+        analytics_cache_stats.miss()
+        # a replica lagging behind the commit that bumped a version would be cached under the new version
+        with primary_reads():
+            value = await compute()
+        data = {"versions": versions, "data": adapter.dump_python(value, mode="json")}
+        await redis_client.set(key, json.dumps(data), ex=redis_settings.analytics_cache_ttl)
+        return value
+
+    async def invalidate(self, redis_client: Redis, *tags: str):
+        async def bump_versions():
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for tag in set(tags):
+                    pipe.incr(self.version_key(tag))
+                await pipe.execute()
+
+        # bumped after commit, an entry computed from the old data in between would outlive the change
+        uow = current_unit_of_work.get()
+        if uow is not None:
+            uow.on_commit(bump_versions)
+        else:
+            await bump_versions()
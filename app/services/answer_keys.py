@@ -0,0 +1,104 @@
+import json
+from collections import OrderedDict
+
+from fastapi import HTTPException
+from redis import Redis
+from redis.exceptions import WatchError
+
+from app.core.config import redis_settings
+from app.schemas.quizzes import QuizSchema
+from app.utils.unit_of_work import current_unit_of_work, primary_reads
+
+
+class AnswerKeyCache:
+    """Compiled answer keys: quiz id -> {question id: correct answer texts}.
+
+    Keys are kept in process and in Redis. Every change to a quiz bumps its version in
+    Redis, so a process notices a stale local copy with one round trip and never has to
+    go to the database to score an attempt.
+
+    On a miss the version is read first and the quiz is then loaded from the primary, so a
+    lagging replica cannot put an old tree under a new version; the key is stored only if
+    the version is still the same (WATCH), otherwise it is used once and not cached.
+    """
+    # shared by every instance in the process: quiz id -> (version, answer key), least recently
+    # used first and capped at redis_settings.answer_keys_local_size
+    _local: OrderedDict[int, tuple[int, dict[int, set[str]]]] = OrderedDict()
+
+    @staticmethod
+    def key(quiz_id: int) -> str:
+        return f"answer_key:{quiz_id}"
+
+    @staticmethod
+    def version_key(quiz_id: int) -> str:
+        return f"answer_key_version:{quiz_id}"
+
+    @staticmethod
+    def compile(quiz: QuizSchema) -> dict[int, set[str]]:
+        return {question.id: {answer.answer_data for answer in question.answers if answer.is_correct}
+                for question in quiz.questions}
+
+    async def get(self, redis_client: Redis, quiz_id: int, load_quiz) -> dict[int, set[str]]:
+        # load_quiz is an argument-less coroutine function returning the quiz or None
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(self.version_key(quiz_id))
+            pipe.get(self.key(quiz_id))
+            version, cached = await pipe.execute()
+        version = int(version or 0)
+
+        local = self._local.get(quiz_id)
+        if local is not None and local[0] == version:
+            self._local.move_to_end(quiz_id)
+            return local[1]
+
+        cached = json.loads(cached) if cached else None
+        if cached is not None and cached["version"] == version:
+            answer_key = {int(question_id): set(answers) for question_id, answers in cached["answers"].items()}
+            self.remember(quiz_id, version, answer_key)
+            return answer_key
+
+        with primary_reads():
+            quiz = await load_quiz()
+        if quiz is None:
+            raise HTTPException(status_code=400, detail="no such quiz exist for the company")
+        answer_key = self.compile(quiz)
+        if await self.store(redis_client, quiz_id, version, answer_key):
+            self.remember(quiz_id, version, answer_key)
+        return answer_key
+
+    def remember(self, quiz_id: int, version: int, answer_key: dict[int, set[str]]):
+        self._local[quiz_id] = (version, answer_key)
+        self._local.move_to_end(quiz_id)
+        while len(self._local) > redis_settings.answer_keys_local_size:
+            self._local.popitem(last=False)
+
+    async def store(self, redis_client: Redis, quiz_id: int, version: int, answer_key: dict[int, set[str]]) -> bool:
+        data = {"version": version,
+                "answers": {question_id: list(answers) for question_id, answers in answer_key.items()}}
+        async with redis_client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(self.version_key(quiz_id))
+                if int(await pipe.get(self.version_key(quiz_id)) or 0) != version:
+                    return False
+                pipe.multi()
+                pipe.set(self.key(quiz_id), json.dumps(data), ex=redis_settings.expire_time)
+                await pipe.execute()
+            except WatchError:
+                return False
+        return True
+
+    async def invalidate(self, redis_client: Redis, quiz_id: int):
+        async def bump_version():
+            self._local.pop(quiz_id, None)
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.incr(self.version_key(quiz_id))
+                pipe.delete(self.key(quiz_id))
+                await pipe.execute()
+
+        # inside a request the quiz change is not visible until commit, so a key rebuilt
+        # before that would be stale under the new version
+        uow = current_unit_of_work.get()
+        if uow is not None:
+            uow.on_commit(bump_version)
+        else:
+            await bump_version()
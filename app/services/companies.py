@@ -1,14 +1,25 @@
 from fastapi import HTTPException
+from redis import Redis
+
 from app.models.model import User
-from app.schemas.companies import CompanyCreateRequest, CompanyUpdateRequest
+from app.schemas.companies import CompanyCreateRequest, CompanyUpdateRequest, CompaniesListResponse
+from app.services.analytics_cache import AnalyticsCache
+from app.services.leaderboards import Leaderboards
 from app.services.permissions import CompaniesPermissions
+from app.services.result_stats import ResultStatsService
 from app.utils.repository import AbstractRepository
 
 
 class CompaniesService:
-    def __init__(self, companies_repo: AbstractRepository):
+    def __init__(self, companies_repo: AbstractRepository, quizzes_repo: AbstractRepository,
+                 results_repo: AbstractRepository, attempts_repo: AbstractRepository,
+                 user_company_stats_repo: AbstractRepository, user_stats_repo: AbstractRepository):
         self.companies_repo: AbstractRepository = companies_repo()
+        self.quizzes_repo: AbstractRepository = quizzes_repo()
         self.permission_service = CompaniesPermissions()
+        self.result_stats = ResultStatsService(results_repo, attempts_repo, user_company_stats_repo, user_stats_repo)
+        self.analytics_cache = AnalyticsCache()
+        self.leaderboards = Leaderboards()
 
     async def add_company(self, company: CompanyCreateRequest, current_user: User):
         if await self.companies_repo.get_one_by(company_name=company.company_name):
@@ -17,8 +28,8 @@ class CompaniesService:
         company_dict.update({"owner_id": current_user.id})
         return await self.companies_repo.create_one(company_dict)
 
-    async def get_all_companies(self):
-        return await self.companies_repo.get_all()
+    async def get_all_companies(self, limit: int, after: str | None = None):
+        return await self.companies_repo.get_page(limit, after, projection=CompaniesListResponse)
 
     async def get_company_by_id(self, company_id: int):
         company = await self.companies_repo.get_one_by(id=company_id)
@@ -34,10 +45,21 @@ class CompaniesService:
         await self.permission_service.can_update_company(company.owner_id, current_user, company_dict)
         return await self.companies_repo.update_one(id, company_dict)
 
-    async def delete_company(self, id: int, current_user: User):
+    async def delete_company(self, id: int, current_user: User, redis_client: Redis):
         company = await self.companies_repo.get_one_by(id=id)
         if not company:
             raise HTTPException(status_code=400, detail="no company with such id")
         await self.permission_service.can_delete_company(company.owner_id, current_user)
+
+        # locked first, so no new result in the company can be committed before the cascade removes it;
+        # the company's own rollup rows go with the cascade, the users' totals are subtracted here
+        await self.companies_repo.lock_by(id=id)
+        quiz_ids = await self.quizzes_repo.get_values_by("id", company_id=id)
+        company_rows = await self.result_stats.delete_results(company_id=id)
         await self.companies_repo.delete_one(id)
+        await self.leaderboards.drop(redis_client, self.leaderboards.company_key(id),
+                                     *[self.leaderboards.quiz_key(quiz_id) for quiz_id in quiz_ids])
+        await self.analytics_cache.invalidate(redis_client, self.analytics_cache.QUIZZES_TAG,
+                                              self.analytics_cache.company_tag(id),
+                                              *{self.analytics_cache.user_tag(row["user_id"]) for row in company_rows})
         return True
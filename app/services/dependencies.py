@@ -10,12 +10,20 @@ from .user_actions import UserActionHandler
 from .users import UsersService
 from app.repositories.auth import AuthRepository
 from ..repositories.answers import AnswersRepository
+from ..repositories.attempts import QuizAttemptsRepository
 from ..repositories.companies import CompaniesRepository
 from ..repositories.members import MembersRepository
 from ..repositories.notifications import NotificationsRepository
 from ..repositories.questions import QuestionsRepository
 from ..repositories.quizes import QuizzesRepository
 from ..repositories.results import ResultsRepository
+from ..repositories.stats import UserCompanyStatsRepository, UserStatsRepository
+from ..utils.unit_of_work import UnitOfWork
+
+
+async def unit_of_work():
+    async with UnitOfWork() as uow:
+        yield uow
 
 
 def users_service():
@@ -27,18 +35,21 @@ def authentication_service():
 
 
 def companies_service():
-    return CompaniesService(CompaniesRepository)
+    return CompaniesService(CompaniesRepository, QuizzesRepository, ResultsRepository, QuizAttemptsRepository,
+                            UserCompanyStatsRepository, UserStatsRepository)
 
 
 def quizzes_service():
     return QuizzesService(CompaniesRepository, QuizzesRepository, QuestionsRepository,
-                          AnswersRepository, MembersRepository, NotificationsRepository, ResultsRepository)
+                          AnswersRepository, MembersRepository, NotificationsRepository, ResultsRepository,
+                          QuizAttemptsRepository, UserCompanyStatsRepository, UserStatsRepository)
 
 
 def results_service():
     return ResultsService(CompaniesRepository, QuizzesRepository, QuestionsRepository,
                           AnswersRepository, ResultsRepository, MembersRepository,
-                          UsersRepository)
+                          UsersRepository, QuizAttemptsRepository, UserCompanyStatsRepository,
+                          UserStatsRepository)
 
 
 def notifications_service():
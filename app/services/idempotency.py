@@ -0,0 +1,61 @@
+import hashlib
+import json
+
+from fastapi import HTTPException
+from redis import Redis
+
+from app.core.config import redis_settings
+from app.utils.unit_of_work import current_unit_of_work
+
+
+class IdempotencyStore:
+    """Responses of requests sent with an Idempotency-Key header, kept in Redis.
+
+    The first request claims the key with SET NX and runs; its response is stored once
+    the transaction commits and replayed for every retry with the same key and payload.
+    The key is released when the request fails or its transaction does not commit; a claim
+    whose request crashed without releasing it frees itself after IDEMPOTENCY_PENDING_TTL.
+    """
+
+    def key(self, subject: str, idempotency_key: str) -> str:
+        return f"idempotency:{subject}:{idempotency_key}"
+
+    @staticmethod
+    def fingerprint(*parts) -> str:
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def claim(self, redis_client: Redis, key: str, fingerprint: str) -> dict | None:
+        # returns the stored response of a finished request, None when this request should run
+        pending = json.dumps({"fingerprint": fingerprint, "response": None})
+        if await redis_client.set(key, pending, nx=True, ex=redis_settings.idempotency_pending_ttl):
+            return None
+        stored = await redis_client.get(key)
+        if stored is None:
+            # expired between the two commands, try once more
+            return await self.claim(redis_client, key, fingerprint)
+        stored = json.loads(stored)
+        if stored["fingerprint"] != fingerprint:
+            raise HTTPException(status_code=422, detail="idempotency key was used with a different request")
+        if stored["response"] is None:
+            raise HTTPException(status_code=409, detail="request with this idempotency key is in progress")
+        return stored["response"]
+
+    async def complete(self, redis_client: Redis, key: str, fingerprint: str, response: dict):
+        async def store():
+            data = json.dumps({"fingerprint": fingerprint, "response": response})
+            await redis_client.set(key, data, ex=redis_settings.idempotency_ttl)
+
+        async def release():
+            await self.release(redis_client, key)
+
+        # replayed responses must not refer to data that was rolled back, and a retry after a
+        # failed commit runs again instead of waiting for the pending claim to expire
+        uow = current_unit_of_work.get()
+        if uow is not None:
+            uow.on_commit(store)
+            uow.on_rollback(release)
+        else:
+            await store()
+
+    async def release(self, redis_client: Redis, key: str):
+        await redis_client.delete(key)
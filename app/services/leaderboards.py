@@ -0,0 +1,142 @@
+from redis import Redis
+
+from app.schemas.result import LeaderboardEntrySchema
+from app.utils.unit_of_work import current_unit_of_work
+
+
+class Leaderboards:
+    """Company and quiz rankings in Redis sorted sets of user ids.
+
+    leaderboard:company:{company}   scored by the user's accuracy over the company's quizzes
+    leaderboard:quiz:{quiz}         scored by the accuracy of the user's result for the quiz
+
+    A score packs the accuracy in millionths and the number of answered questions into one
+    double, so higher accuracy ranks first and more answered questions break ties. Redis orders
+    what is still tied by the member string, and the reads go from the top, so a tie lists user
+    ids in descending string order ("9" before "10"). Every read is a rank lookup or a range by rank.
+
+    {leaderboard}:versions   hash, user id -> version of the rollup the score was computed from;
+                             a score is only written when its version is not older than the stored one,
+                             so commits whose writes reach Redis out of order keep the newest score
+    """
+    SCALE = 10_000_000
+    rebuild_suffix = ":rebuild"
+    versions_suffix = ":versions"
+    # KEYS: the sorted set and its versions hash; ARGV: member, score, version triples
+    guarded_zadd = """
+        for i = 1, #ARGV, 3 do
+            local stored = redis.call('HGET', KEYS[2], ARGV[i])
+            if not stored or tonumber(stored) <= tonumber(ARGV[i + 2]) then
+                redis.call('ZADD', KEYS[1], ARGV[i + 1], ARGV[i])
+                redis.call('HSET', KEYS[2], ARGV[i], ARGV[i + 2])
+            end
+        end
+        return 0
+    """
+
+    @staticmethod
+    def company_key(company_id: int) -> str:
+        return f"leaderboard:company:{company_id}"
+
+    @staticmethod
+    def quiz_key(quiz_id: int) -> str:
+        return f"leaderboard:quiz:{quiz_id}"
+
+    def score(self, right: int, total: int) -> int:
+        accuracy = round(right / total * 1_000_000) if total else 0
+        return accuracy * self.SCALE + min(total, self.SCALE - 1)
+
+    def entry(self, user_id: str, rank: int, score: float) -> LeaderboardEntrySchema:
+        score = int(score)
+        return LeaderboardEntrySchema(user_id=int(user_id), rank=rank + 1,
+                                      accuracy=score // self.SCALE / 1_000_000, answered=score % self.SCALE)
+
+    async def update(self, redis_client: Redis, scores: dict[str, dict[int, tuple[int, float]]]):
+        # scores are leaderboard key -> {user id: (score, version)}, written after the results are committed
+        async def write():
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for key, members in scores.items():
+                    if members:
+                        args = [value for user_id, (score, version) in members.items()
+                                for value in (user_id, score, repr(float(version)))]
+                        pipe.eval(self.guarded_zadd, 2, key, key + self.versions_suffix, *args)
+                await pipe.execute()
+
+        uow = current_unit_of_work.get()
+        if uow is not None:
+            uow.on_commit(write)
+        else:
+            await write()
+
+    async def drop_quiz(self, redis_client: Redis, quiz_id: int):
+        await self.drop(redis_client, self.quiz_key(quiz_id))
+
+    async def drop(self, redis_client: Redis, *keys: str):
+        async def delete():
+            await redis_client.delete(*keys, *[key + self.versions_suffix for key in keys])
+
+        uow = current_unit_of_work.get()
+        if uow is not None:
+            uow.on_commit(delete)
+        else:
+            await delete()
+
+    async def top(self, redis_client: Redis, key: str, limit: int) -> list[LeaderboardEntrySchema]:
+        members = await redis_client.zrevrange(key, 0, limit - 1, withscores=True)
+        return [self.entry(user_id, rank, score) for rank, (user_id, score) in enumerate(members)]
+
+    async def around(self, redis_client: Redis, key: str, user_id: int, radius: int) -> list[LeaderboardEntrySchema]:
+        rank = await redis_client.zrevrank(key, user_id)
+        if rank is None:
+            return []
+        start = max(rank - radius, 0)
+        members = await redis_client.zrevrange(key, start, rank + radius, withscores=True)
+        return [self.entry(member, start + offset, score) for offset, (member, score) in enumerate(members)]
+
+    async def rank(self, redis_client: Redis, key: str, user_id: int) -> LeaderboardEntrySchema | None:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.zrevrank(key, user_id)
+            pipe.zscore(key, user_id)
+            rank, score = await pipe.execute()
+        if rank is None:
+            return None
+        return self.entry(user_id, rank, score)
+
+    async def rebuild(self, redis_client: Redis, company_stats_repo, results_repo, batch_size: int = 1000) -> int:
+        # fills fresh sets from the rollups and Result rows, then swaps them in with RENAME;
+        # leaderboards that no longer have any rows are removed, and so are the versions hashes,
+        # the next update of a member is newer than the rebuilt score
+        async for key in redis_client.scan_iter(match=f"leaderboard:*{self.rebuild_suffix}"):
+            await redis_client.delete(key)
+
+        built = set()
+        async for rows in company_stats_repo.iter_rows(batch_size):
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for row in rows:
+                    key = self.company_key(row.company_id)
+                    pipe.zadd(key + self.rebuild_suffix, {row.user_id: self.score(row.right_sum, row.total_sum)})
+                    built.add(key)
+                await pipe.execute()
+
+        after = None
+        while True:
+            results, after = await results_repo.get_page(batch_size, after)
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for result in results:
+                    key = self.quiz_key(result.quiz_id)
+                    pipe.zadd(key + self.rebuild_suffix,
+                              {result.user_id: self.score(result.result_right_count, result.result_total_count)})
+                    built.add(key)
+                await pipe.execute()
+            if after is None:
+                break
+
+        stale = [key async for key in redis_client.scan_iter(match="leaderboard:*")
+                 if not key.endswith(self.rebuild_suffix) and key not in built]
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for key in built:
+                pipe.rename(key + self.rebuild_suffix, key)
+            for key in stale:
+                pipe.delete(key)
+            await pipe.execute()
+        return len(built)
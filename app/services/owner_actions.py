@@ -1,11 +1,17 @@
 from fastapi import HTTPException
+from redis import Redis
+
 from app.models.model import User
 from app.repositories.companies import CompaniesRepository
 from app.repositories.invitations import InvitationsRepository
 from app.repositories.members import MembersRepository
 from app.repositories.requests import RequestsRepository
 from app.repositories.users import UsersRepository
+from app.schemas.invitations import InvitationListResponse
+from app.schemas.members import MemberListResponse
+from app.schemas.requests import RequestListResponse
 from app.schemas.actions import OwnerActionCreate, OwnerActions
+from app.services.analytics_cache import AnalyticsCache
 from app.services.permissions import ActionsPermissions
 from app.utils.repository import AbstractRepository
 from app.utils.validations import ActionsValidator
@@ -20,6 +26,7 @@ class OwnerActionsService:
         self.company_repo: AbstractRepository = company_repo()
         self.actions_permissions = ActionsPermissions()
         self.validator = ActionsValidator(company_repo, users_repo, invitations_repo, members_repo)
+        self.analytics_cache = AnalyticsCache()
 
     async def send_invite(self, action: OwnerActionCreate, current_user: User):
         company = await self.validator.owner_action_validation(action)
@@ -47,7 +54,7 @@ class OwnerActionsService:
         await self.invitations_repo.delete_one(invitation.id)
         return True
 
-    async def accept_request(self, action: OwnerActionCreate, current_user: User):
+    async def accept_request(self, action: OwnerActionCreate, current_user: User, redis_client: Redis):
         company = await self.validator.owner_action_validation(action)
         await self.actions_permissions.is_user_owner(company, current_user)
 
@@ -61,7 +68,10 @@ class OwnerActionsService:
         await self.requests_repo.update_one(request.id, request_dict)
 
         member_dict = {"user_id": action.user_id, "role": "member", "company_id": action.company_id}
-        return await self.members_repo.create_one(member_dict)
+        member_id = await self.members_repo.create_one(member_dict)
+        await self.analytics_cache.invalidate(redis_client, self.analytics_cache.user_tag(action.user_id),
+                                              self.analytics_cache.company_tag(company.id))
+        return member_id
 
     async def deny_request(self, action: OwnerActionCreate, current_user: User):
         company = await self.validator.owner_action_validation(action)
@@ -78,7 +88,7 @@ class OwnerActionsService:
 
         return True
 
-    async def delete_member(self, action: OwnerActionCreate, current_user: User):
+    async def delete_member(self, action: OwnerActionCreate, current_user: User, redis_client: Redis):
         company = await self.validator.owner_action_validation(action)
         await self.actions_permissions.is_user_owner(company, current_user)
 
@@ -87,9 +97,11 @@ class OwnerActionsService:
             raise HTTPException(status_code=400, detail="no such member in the company")
 
         await self.members_repo.delete_one(member.id)
+        await self.analytics_cache.invalidate(redis_client, self.analytics_cache.user_tag(action.user_id),
+                                              self.analytics_cache.company_tag(company.id))
         return True
 
-    async def add_admin(self, action: OwnerActionCreate, current_user: User):
+    async def add_admin(self, action: OwnerActionCreate, current_user: User, redis_client: Redis):
         company = await self.validator.owner_action_validation(action)
         await self.actions_permissions.is_user_owner(company, current_user)
 
@@ -102,9 +114,11 @@ class OwnerActionsService:
             raise HTTPException(status_code=400, detail="member is already admin")
         member_dict["role"] = "admin"
         await self.members_repo.update_one(member.id, member_dict)
+        await self.analytics_cache.invalidate(redis_client, self.analytics_cache.user_tag(action.user_id),
+                                              self.analytics_cache.company_tag(company.id))
         return True
 
-    async def remove_admin(self, action: OwnerActionCreate, current_user: User):
+    async def remove_admin(self, action: OwnerActionCreate, current_user: User, redis_client: Redis):
         company = await self.validator.owner_action_validation(action)
         await self.actions_permissions.is_user_owner(company, current_user)
 
@@ -117,39 +131,45 @@ class OwnerActionsService:
             raise HTTPException(status_code=400, detail="member is not admin")
         member_dict["role"] = "member"
         await self.members_repo.update_one(member.id, member_dict)
+        await self.analytics_cache.invalidate(redis_client, self.analytics_cache.user_tag(action.user_id),
+                                              self.analytics_cache.company_tag(company.id))
         return True
 
-    async def get_all_members(self, company_id: int, current_user: User):
+    async def get_all_members(self, company_id: int, current_user: User, limit: int, after: str | None = None):
         company = await self.company_repo.get_one_by(id=company_id)
         if not company:
             raise HTTPException(status_code=400, detail="company with such id does not exists")
 
         await self.actions_permissions.is_user_owner(company, current_user)
-        return await self.members_repo.get_all_by(company_id=company_id, role="member")
+        return await self.members_repo.get_page(limit, after, projection=MemberListResponse,
+                                                company_id=company_id, role="member")
 
-    async def get_all_admins(self, company_id: int, current_user: User):
+    async def get_all_admins(self, company_id: int, current_user: User, limit: int, after: str | None = None):
         company = await self.company_repo.get_one_by(id=company_id)
         if not company:
             raise HTTPException(status_code=400, detail="company with such id does not exists")
 
         await self.actions_permissions.is_user_owner(company, current_user)
-        return await self.members_repo.get_all_by(company_id=company_id, role="admin")
+        return await self.members_repo.get_page(limit, after, projection=MemberListResponse,
+                                                company_id=company_id, role="admin")
 
-    async def get_all_invitations(self, company_id: int, current_user: User):
+    async def get_all_invitations(self, company_id: int, current_user: User, limit: int, after: str | None = None):
         company = await self.company_repo.get_one_by(id=company_id)
         if not company:
             raise HTTPException(status_code=400, detail="company with such id does not exists")
 
         await self.actions_permissions.is_user_owner(company, current_user)
-        return await self.invitations_repo.get_all_by(company_id=company_id, is_accepted=None)
+        return await self.invitations_repo.get_page(limit, after, projection=InvitationListResponse,
+                                                    company_id=company_id, is_accepted=None)
 
-    async def get_all_requests(self, company_id: int, current_user: User):
+    async def get_all_requests(self, company_id: int, current_user: User, limit: int, after: str | None = None):
         company = await self.company_repo.get_one_by(id=company_id)
         if not company:
             raise HTTPException(status_code=400, detail="company with such id does not exists")
 
         await self.actions_permissions.is_user_owner(company, current_user)
-        return await self.requests_repo.get_all_by(company_id=company_id, is_accepted=None)
+        return await self.requests_repo.get_page(limit, after, projection=RequestListResponse,
+                                                 company_id=company_id, is_accepted=None)
 
 
 class OwnerActionHandler:
@@ -157,30 +177,30 @@ class OwnerActionHandler:
         self.action_service = OwnerActionsService(InvitationsRepository, RequestsRepository,
                                                   CompaniesRepository, UsersRepository, MembersRepository)
 
-    async def handle_action(self, action: OwnerActionCreate, current_user: User):
+    async def handle_action(self, action: OwnerActionCreate, current_user: User, redis_client: Redis):
         if action.action is OwnerActions.Send_invitation:
             return await self.action_service.send_invite(action, current_user)
         elif action.action is OwnerActions.Cancel_invitation:
             return await self.action_service.cancel_invite(action, current_user)
         elif action.action is OwnerActions.Accept_request:
-            return await self.action_service.accept_request(action, current_user)
+            return await self.action_service.accept_request(action, current_user, redis_client)
         elif action.action is OwnerActions.Deny_request:
             return await self.action_service.deny_request(action, current_user)
         elif action.action is OwnerActions.Delete_member:
-            return await self.action_service.delete_member(action, current_user)
+            return await self.action_service.delete_member(action, current_user, redis_client)
         elif action.action is OwnerActions.Add_admin:
-            return await self.action_service.add_admin(action, current_user)
+            return await self.action_service.add_admin(action, current_user, redis_client)
         elif action.action is OwnerActions.Remove_admin:
-            return await self.action_service.remove_admin(action, current_user)
+            return await self.action_service.remove_admin(action, current_user, redis_client)
 
-    async def get_all_invitations(self, company_id: int, current_user: User):
-        return await self.action_service.get_all_invitations(company_id, current_user)
+    async def get_all_invitations(self, company_id: int, current_user: User, limit: int, after: str | None = None):
+        return await self.action_service.get_all_invitations(company_id, current_user, limit, after)
 
-    async def get_all_requests(self, company_id: int, current_user: User):
-        return await self.action_service.get_all_requests(company_id, current_user)
+    async def get_all_requests(self, company_id: int, current_user: User, limit: int, after: str | None = None):
+        return await self.action_service.get_all_requests(company_id, current_user, limit, after)
 
-    async def get_all_members(self, company_id: int, current_user: User):
-        return await self.action_service.get_all_members(company_id, current_user)
+    async def get_all_members(self, company_id: int, current_user: User, limit: int, after: str | None = None):
+        return await self.action_service.get_all_members(company_id, current_user, limit, after)
 
-    async def get_all_admins(self, company_id: int, current_user: User):
-        return await self.action_service.get_all_admins(company_id, current_user)
+    async def get_all_admins(self, company_id: int, current_user: User, limit: int, after: str | None = None):
+        return await self.action_service.get_all_admins(company_id, current_user, limit, after)
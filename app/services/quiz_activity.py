@@ -0,0 +1,96 @@
+import datetime
+import uuid
+
+from redis import Redis
+
+from app.utils.repository import AbstractRepository
+from app.utils.unit_of_work import current_unit_of_work
+
+
+class QuizActivity:
+    """Per-quiz pass counters and last passed times, buffered in Redis and flushed to Quiz in batches.
+
+    quiz_activity:last_passed   sorted set, quiz id scored by the latest pass time (ZADD GT)
+    quiz_activity:passes        hash, quiz id -> passes since the last flush (HINCRBY)
+
+    A flush renames both to :flushing under a new batch id, kept in quiz_activity:flushing_batch
+    until the batch is written; Quiz.activity_batch makes writing the same batch twice a no-op.
+    """
+    last_passed_key = "quiz_activity:last_passed"
+    passes_key = "quiz_activity:passes"
+    flushing_batch_key = "quiz_activity:flushing_batch"
+    flush_lock_key = "quiz_activity:flush_lock"
+    flush_lock_ttl = 300
+
+    async def record(self, redis_client: Redis, passes: dict[int, int], passed_at: datetime.datetime):
+        timestamp = passed_at.timestamp()
+
+        async def count():
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.zadd(self.last_passed_key, {quiz_id: timestamp for quiz_id in passes}, gt=True)
+                for quiz_id, passes_count in passes.items():
+                    pipe.hincrby(self.passes_key, quiz_id, passes_count)
+                await pipe.execute()
+
+        # passes of a submission that is rolled back are not counted
+        uow = current_unit_of_work.get()
+        if uow is not None:
+            uow.on_commit(count)
+        else:
+            await count()
+
+    async def flush(self, redis_client: Redis, quizzes_repo: AbstractRepository) -> int:
+        # one flusher at a time; the live keys are renamed away so new passes keep counting while
+        # the batch is written, and a batch left by a failed flush is written before a new one is taken
+        if not await redis_client.set(self.flush_lock_key, 1, nx=True, ex=self.flush_lock_ttl):
+            return 0
+        flushing_last_passed = f"{self.last_passed_key}:flushing"
+        flushing_passes = f"{self.passes_key}:flushing"
+
+        async def finish():
+            await redis_client.delete(flushing_last_passed, flushing_passes, self.flushing_batch_key,
+                                      self.flush_lock_key)
+
+        async def release():
+            await redis_client.delete(self.flush_lock_key)
+
+        # the batch is dropped from Redis only once Postgres has it, a failed flush only frees the lock
+        uow = current_unit_of_work.get()
+        if uow is not None:
+            uow.on_commit(finish)
+            uow.on_rollback(release)
+        try:
+            if not await redis_client.exists(flushing_last_passed, flushing_passes):
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    pipe.exists(self.last_passed_key)
+                    pipe.exists(self.passes_key)
+                    has_last_passed, has_passes = await pipe.execute()
+                async with redis_client.pipeline(transaction=True) as pipe:
+                    if has_last_passed:
+                        pipe.rename(self.last_passed_key, flushing_last_passed)
+                    if has_passes:
+                        pipe.rename(self.passes_key, flushing_passes)
+                    pipe.set(self.flushing_batch_key, uuid.uuid4().hex)
+                    await pipe.execute()
+
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.zrange(flushing_last_passed, 0, -1, withscores=True)
+                pipe.hgetall(flushing_passes)
+                pipe.get(self.flushing_batch_key)
+                last_passed, passes, batch = await pipe.execute()
+            last_passed = dict(last_passed)
+            rows = [{"quiz_id": int(quiz_id),
+                     "passed_at": datetime.datetime.fromtimestamp(last_passed[quiz_id], datetime.timezone.utc)
+                     if quiz_id in last_passed else None,
+                     "passes": int(passes.get(quiz_id, 0))}
+                    for quiz_id in set(last_passed) | set(passes)]
+            # a batch taken before batches had ids gets one now
+            await quizzes_repo.record_activity(rows, batch or uuid.uuid4().hex)
+        except Exception:
+            if uow is None:
+                await release()
+            raise
+
+        if uow is None:
+            await finish()
+        return len(rows)
@@ -1,13 +1,18 @@
 import datetime
 
 from fastapi import HTTPException
+from redis import Redis
 
 from app.models.model import User
 from app.schemas.answers import AnswerCreateRequest, AnswerUpdateRequest
 from app.schemas.questions import QuestionCreateRequest, QuestionUpdateRequest
 from app.schemas.quizzes import QuizCreateRequest, QuizUpdateRequest
+from app.services.analytics_cache import AnalyticsCache
+from app.services.answer_keys import AnswerKeyCache
+from app.services.leaderboards import Leaderboards
 from app.services.notifications import NotificationsService
 from app.services.permissions import QuizzesPermissions
+from app.services.result_stats import ResultStatsService
 from app.utils.repository import AbstractRepository
 from app.utils.validations import QuizzesDataValidator
 
@@ -16,7 +21,8 @@ class QuizzesService:
     def __init__(self, companies_repo: AbstractRepository, quizzes_repo: AbstractRepository,
                  questions_repo: AbstractRepository, answers_repo: AbstractRepository,
                  members_repo: AbstractRepository, notifications_repo: AbstractRepository,
-                 results_repo: AbstractRepository):
+                 results_repo: AbstractRepository, attempts_repo: AbstractRepository,
+                 user_company_stats_repo: AbstractRepository, user_stats_repo: AbstractRepository):
         self.quizzes_repo: AbstractRepository = quizzes_repo()
         self.questions_repo: AbstractRepository = questions_repo()
         self.answers_repo: AbstractRepository = answers_repo()
@@ -24,19 +30,22 @@ class QuizzesService:
         self.members_repo: AbstractRepository = members_repo()
 
         self.notifications = NotificationsService(members_repo, notifications_repo, quizzes_repo, results_repo)
+        self.result_stats = ResultStatsService(results_repo, attempts_repo, user_company_stats_repo, user_stats_repo)
         self.quizzes_permissions = QuizzesPermissions(members_repo)
         self.validator = QuizzesDataValidator(companies_repo, quizzes_repo, questions_repo, answers_repo)
+        self.answer_keys = AnswerKeyCache()
+        self.analytics_cache = AnalyticsCache()
+        self.leaderboards = Leaderboards()
 
-    async def get_all_quizzes(self, company_id: int, current_user: User):
+    async def get_all_quizzes(self, company_id: int, current_user: User, limit: int, after: str | None = None):
         company = await self.validator.question_data_validation(company_id)
         await self.quizzes_permissions.has_user_permissions(company, current_user)
 
-        return await self.quizzes_repo.get_all_by(company_id=company_id)
+        return await self.quizzes_repo.get_page(limit, after, company_id=company_id)
 
-    async def add_quiz(self, quiz: QuizCreateRequest, current_user: User):
+    async def add_quiz(self, quiz: QuizCreateRequest, current_user: User, redis_client: Redis):
         company = await self.validator.question_data_validation(quiz.company_id)
-        quiz_check = await self.quizzes_repo.get_all_by(company_id=company.id, quiz_name=quiz.quiz_name)
-        if quiz_check:
+        if await self.quizzes_repo.exists_by(company_id=company.id, quiz_name=quiz.quiz_name):
             raise HTTPException(status_code=400, detail=f"such quiz already exists")
         await self.quizzes_permissions.has_user_permissions(company, current_user)
 
@@ -55,27 +64,44 @@ class QuizzesService:
         quiz_id = await self.quizzes_repo.create_one(quiz_data)
         await self.notifications.create_notification(quiz_id, int(quiz_dict.get("company_id")))
 
-        for question in questions:
-            question_data = {"quiz_id": quiz_id, "created_by": current_user.id, "updated_by": current_user.id,
-                             "question_text": question.get("question_text"), "company_id": quiz_dict.get("company_id")}
-            question_id = await self.questions_repo.create_one(question_data)
+        questions_data = [{"quiz_id": quiz_id, "created_by": current_user.id, "updated_by": current_user.id,
+                           "question_text": question.get("question_text"), "company_id": quiz_dict.get("company_id")}
+                          for question in questions]
+        question_ids = await self.questions_repo.create_many(questions_data)
+        await self.questions_repo.add_to_counts(company.id, len(question_ids))
 
-            answers = question.get("answers")
-            for answer in answers:
+        answers_data = []
+        for question_id, question in zip(question_ids, questions):
+            for answer in question.get("answers"):
                 answer.update({"question_id": question_id,  "created_by": current_user.id,
                                "updated_by": current_user.id})
-                await self.answers_repo.create_one(answer)
+                answers_data.append(answer)
+        await self.answers_repo.create_many(answers_data)
+        await self.analytics_cache.invalidate(redis_client, self.analytics_cache.QUIZZES_TAG)
 
         return quiz_id
 
-    async def delete_quiz(self, quiz_id: int, current_user: User):
+    async def delete_quiz(self, quiz_id: int, current_user: User, redis_client: Redis):
         quiz = await self.quizzes_repo.get_one_by(id=quiz_id)
         if not quiz:
             raise HTTPException(status_code=400, detail=f"such quiz does not exists")
         company = await self.validator.question_data_validation(quiz.company_id)
         await self.quizzes_permissions.has_user_permissions(company, current_user)
 
+        # locked first, so no new result of the quiz can be committed before the cascade removes it
+        await self.quizzes_repo.lock_by(id=quiz_id)
+        company_rows = await self.result_stats.delete_results(quiz_id=quiz_id)
+        questions = await self.questions_repo.count_by(quiz_id=quiz_id)
         await self.quizzes_repo.delete_one(quiz_id)
+        await self.questions_repo.add_to_counts(quiz.company_id, -questions)
+        await self.answer_keys.invalidate(redis_client, quiz_id)
+        await self.leaderboards.drop_quiz(redis_client, quiz_id)
+        await self.leaderboards.update(redis_client, {self.leaderboards.company_key(quiz.company_id): {
+            row["user_id"]: (self.leaderboards.score(row["right_sum"], row["total_sum"]), row["version"])
+            for row in company_rows}})
+        await self.analytics_cache.invalidate(redis_client, self.analytics_cache.QUIZZES_TAG,
+                                              self.analytics_cache.company_tag(quiz.company_id),
+                                              *{self.analytics_cache.user_tag(row["user_id"]) for row in company_rows})
         return True
 
     async def edit_quiz(self, quiz_id: int, data: QuizUpdateRequest, current_user: User):
@@ -90,7 +116,8 @@ class QuizzesService:
         await self.quizzes_repo.update_one(quiz_id, quiz_dict)
         return True
 
-    async def add_question(self, quiz_id: int, data: QuestionCreateRequest, current_user: User):
+    async def add_question(self, quiz_id: int, data: QuestionCreateRequest, current_user: User,
+                           redis_client: Redis):
         quiz = await self.quizzes_repo.get_one_by(id=quiz_id)
         if not quiz:
             raise HTTPException(status_code=400, detail=f"such quiz does not exists")
@@ -105,15 +132,18 @@ class QuizzesService:
         question = {"question_text": question_dict.get("question_text"), "quiz_id": quiz_id,
                     "created_by": current_user.id, "updated_by": current_user.id, "company_id": quiz.company_id}
         question_id = await self.questions_repo.create_one(question)
+        await self.questions_repo.add_to_counts(quiz.company_id, 1)
 
         answers = question_dict.get("answers")
         for answer in answers:
             answer.update({"question_id": question_id, "created_by": current_user.id, "updated_by": current_user.id})
-            await self.answers_repo.create_one(answer)
+        await self.answers_repo.create_many(answers)
+        await self.answer_keys.invalidate(redis_client, quiz_id)
 
         return question_id
 
-    async def edit_question(self, quiz_id: int, question_id: int, data: QuestionUpdateRequest, current_user: User):
+    async def edit_question(self, quiz_id: int, question_id: int, data: QuestionUpdateRequest, current_user: User,
+                            redis_client: Redis):
         question = await self.validator.question_existence_check(quiz_id, question_id)
         company = await self.companies_repo.get_one_by(id=question.company_id)
         await self.quizzes_permissions.has_user_permissions(company, current_user)
@@ -121,18 +151,22 @@ class QuizzesService:
         question_dict = data.model_dump(exclude_unset=True)
         question_dict.update({"updated_by": current_user.id})
         await self.questions_repo.update_one(question_id, question_dict)
+        await self.answer_keys.invalidate(redis_client, quiz_id)
         return True
 
-    async def delete_question(self, quiz_id: int, question_id: int, current_user: User):
+    async def delete_question(self, quiz_id: int, question_id: int, current_user: User, redis_client: Redis):
         question = await self.validator.question_existence_check(quiz_id, question_id)
         company = await self.companies_repo.get_one_by(id=question.company_id)
         await self.quizzes_permissions.has_user_permissions(company, current_user)
         await self.validator.question_delete_check(quiz_id)
 
         await self.questions_repo.delete_one(question_id)
+        await self.questions_repo.add_to_counts(question.company_id, -1)
+        await self.answer_keys.invalidate(redis_client, quiz_id)
         return True
 
-    async def add_answer(self, quiz_id: int, question_id: int, data: AnswerCreateRequest, current_user: User):
+    async def add_answer(self, quiz_id: int, question_id: int, data: AnswerCreateRequest, current_user: User,
+                         redis_client: Redis):
         question = await self.validator.question_existence_check(quiz_id, question_id)
         company = await self.companies_repo.get_one_by(id=question.company_id)
         await self.quizzes_permissions.has_user_permissions(company, current_user)
@@ -141,10 +175,12 @@ class QuizzesService:
         if await self.answers_repo.get_one_by(question_id=question_id, answer_data=answer_dict.get("answer_data")):
             raise HTTPException(status_code=400, detail=f"such answer is already in question")
         answer_dict.update({"question_id": question_id, "created_by": current_user.id, "updated_by": current_user.id})
-        return await self.answers_repo.create_one(answer_dict)
+        answer_id = await self.answers_repo.create_one(answer_dict)
+        await self.answer_keys.invalidate(redis_client, quiz_id)
+        return answer_id
 
     async def edit_answer(self, quiz_id: int, question_id: int, answer_id: int,
-                          data: AnswerUpdateRequest, current_user: User):
+                          data: AnswerUpdateRequest, current_user: User, redis_client: Redis):
         answer, question = await self.validator.answer_existence_check(quiz_id, question_id, answer_id)
         company = await self.companies_repo.get_one_by(id=question.company_id)
         await self.quizzes_permissions.has_user_permissions(company, current_user)
@@ -154,9 +190,11 @@ class QuizzesService:
             await self.validator.answer_edit_check(question_id, answer_dict.get("is_correct"))
         answer_dict.update({"updated_by": current_user.id})
         await self.answers_repo.update_one(answer_id, answer_dict)
+        await self.answer_keys.invalidate(redis_client, quiz_id)
         return True
 
-    async def delete_answer(self, quiz_id: int, question_id: int, answer_id: int, current_user: User):
+    async def delete_answer(self, quiz_id: int, question_id: int, answer_id: int, current_user: User,
+                            redis_client: Redis):
         answer, question = await self.validator.answer_existence_check(quiz_id, question_id, answer_id)
         company = await self.companies_repo.get_one_by(id=question.company_id)
         await self.quizzes_permissions.has_user_permissions(company, current_user)
@@ -164,4 +202,5 @@ class QuizzesService:
         await self.validator.answer_delete_check(question_id)
 
         await self.answers_repo.delete_one(answer_id)
+        await self.answer_keys.invalidate(redis_client, quiz_id)
         return True
\ No newline at end of file
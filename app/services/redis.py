@@ -1,18 +1,190 @@
+import json
+import time
+
 from redis import Redis
 
 from app.core.config import redis_settings
 from app.schemas.user_answer_redis import AnswerData
+from app.utils.metrics import LatencyStats
+
+# time spent writing one whole submission to Redis
+submission_write_latency = LatencyStats()
+
 
 class RedisService:
+    """Stored answers of quiz attempts.
+
+    answers:{user}:{company}:{quiz}   hash, question id -> {"answer_data", "is_correct"}
+    answers_by_user:{user}            sorted set of "{company}:{quiz}", scored by expiry time
+    answers_by_company:{company}      sorted set of "{user}:{quiz}", scored by expiry time
+
+    The index sets are trimmed of expired members on every write and read, so a read
+    only touches the attempts it returns.
+    """
+
+    def attempt_key(self, user_id: int, company_id: int, quiz_id: int) -> str:
+        return f"answers:{user_id}:{company_id}:{quiz_id}"
+
+    def user_index_key(self, user_id: int) -> str:
+        return f"answers_by_user:{user_id}"
+
+    def company_index_key(self, company_id: int) -> str:
+        return f"answers_by_company:{company_id}"
 
-    async def save_result_to_redis(self, redis_client: Redis, answer: AnswerData):
-        redis_key = f"answer:{answer.user_id}:{answer.company_id}:{answer.quiz_id}:{answer.question_id}"
-        await redis_client.hset(redis_key, mapping=answer.__dict__)
-        await redis_client.expire(redis_key, redis_settings.expire_time)
+    async def save_results_to_redis(self, redis_client: Redis, answers: list[AnswerData]):
+        # all answers of a submission go out as one MULTI/EXEC round trip
+        if not answers:
+            return True
+        started = time.perf_counter()
+        now = time.time()
+        expires_at = now + redis_settings.expire_time
+        user_id, company_id, quiz_id = answers[0].user_id, answers[0].company_id, answers[0].quiz_id
+        attempt_key = self.attempt_key(user_id, company_id, quiz_id)
+        user_index = self.user_index_key(user_id)
+        company_index = self.company_index_key(company_id)
+
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.delete(attempt_key)
+            pipe.hset(attempt_key, mapping={
+                answer.question_id: json.dumps({"answer_data": answer.answer_data, "is_correct": answer.is_correct})
+                for answer in answers
+            })
+            pipe.expire(attempt_key, redis_settings.expire_time)
+            pipe.zadd(user_index, {f"{company_id}:{quiz_id}": expires_at})
+            pipe.zadd(company_index, {f"{user_id}:{quiz_id}": expires_at})
+            for index_key in (user_index, company_index):
+                pipe.zremrangebyscore(index_key, "-inf", now)
+                pipe.expire(index_key, redis_settings.expire_time)
+            await pipe.execute()
+        submission_write_latency.observe(time.perf_counter() - started)
         return True
 
-    async def get_result_from_redis(self, redis_client: Redis, key: str):
-        return await redis_client.hgetall(key)
+    async def live_members(self, redis_client: Redis, index_key: str) -> list[str]:
+        now = time.time()
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(index_key, "-inf", now)
+            pipe.zrangebyscore(index_key, now, "+inf")
+            _, members = await pipe.execute()
+        return members
+
+    async def get_attempts(self, redis_client: Redis, attempts: list[tuple[int, int, int]]) -> list[AnswerData]:
+        # attempts are (user_id, company_id, quiz_id); all hashes are fetched in one pipeline
+        if not attempts:
+            return []
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for user_id, company_id, quiz_id in attempts:
+                pipe.hgetall(self.attempt_key(user_id, company_id, quiz_id))
+            hashes = await pipe.execute()
+
+        answers = []
+        for (user_id, company_id, quiz_id), stored in zip(attempts, hashes):
+            for question_id, value in stored.items():
+                value = json.loads(value)
+                answers.append(AnswerData(user_id=user_id, company_id=company_id, quiz_id=quiz_id,
+                                          question_id=int(question_id), answer_data=value["answer_data"],
+                                          is_correct=value["is_correct"]))
+        return answers
+
+    async def iter_user_answers(self, redis_client: Redis, user_id: int, batch_size: int = 100):
+        # yields answers batch by batch, so memory does not grow with the number of stored attempts.
+        # Pages continue from the last score rather than an offset, so attempts written or expiring
+        # while iterating do not shift the window; members sharing the last score are skipped by name.
+        index_key = self.user_index_key(user_id)
+        now = time.time()
+        await redis_client.zremrangebyscore(index_key, "-inf", now)
+        low, seen = now, set()
+        while True:
+            page = await redis_client.zrangebyscore(index_key, low, "+inf", start=0, num=batch_size + len(seen),
+                                                    withscores=True)
+            members = [(member, score) for member, score in page if not (score == low and member in seen)]
+            if not members:
+                return
+            attempts = []
+            for member, _ in members:
+                company_id, quiz_id = member.split(":")
+                attempts.append((user_id, int(company_id), int(quiz_id)))
+            yield await self.get_attempts(redis_client, attempts)
+            last = members[-1][1]
+            seen = {member for member, score in members if score == last} | (seen if last == low else set())
+            low = last
+
+    async def get_user_answers(self, redis_client: Redis, user_id: int) -> list[AnswerData]:
+        members = await self.live_members(redis_client, self.user_index_key(user_id))
+        attempts = []
+        for member in members:
+            company_id, quiz_id = member.split(":")
+            attempts.append((user_id, int(company_id), int(quiz_id)))
+        return await self.get_attempts(redis_client, attempts)
+
+    async def get_company_answers(self, redis_client: Redis, company_id: int) -> list[AnswerData]:
+        members = await self.live_members(redis_client, self.company_index_key(company_id))
+        attempts = []
+        for member in members:
+            user_id, quiz_id = member.split(":")
+            attempts.append((int(user_id), company_id, int(quiz_id)))
+        return await self.get_attempts(redis_client, attempts)
+
+    async def migrate_legacy_answers(self, redis_client: Redis, batch_size: int = 500) -> int:
+        # moves answers stored one hash per answer, answer:{user}:{company}:{quiz}:{question}, into the
+        # attempt layout with their remaining TTL, one SCAN chunk at a time so memory stays bounded by
+        # batch_size. An attempt already stored in the new layout was submitted after the change and
+        # wins; attempts this run created are listed in a set, so an attempt whose answers arrive in
+        # several chunks is merged. Returns the number of migrated attempts.
+        migrating_key = "answers_migration:attempts"
+        migrated = 0
+        keys = []
+        async for key in redis_client.scan_iter(match="answer:*", count=batch_size):
+            keys.append(key)
+            if len(keys) >= batch_size:
+                migrated += await self.migrate_legacy_chunk(redis_client, keys, migrating_key)
+                keys = []
+        if keys:
+            migrated += await self.migrate_legacy_chunk(redis_client, keys, migrating_key)
+        await redis_client.delete(migrating_key)
+        return migrated
 
+    async def migrate_legacy_chunk(self, redis_client: Redis, keys: list[str], migrating_key: str) -> int:
+        legacy = {}
+        for key in keys:
+            user_id, company_id, quiz_id, _ = key.split(":")[1:]
+            legacy.setdefault((int(user_id), int(company_id), int(quiz_id)), []).append(key)
 
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for (user_id, company_id, quiz_id), attempt_keys in legacy.items():
+                pipe.exists(self.attempt_key(user_id, company_id, quiz_id))
+                pipe.sismember(migrating_key, f"{user_id}:{company_id}:{quiz_id}")
+                for key in attempt_keys:
+                    pipe.hgetall(key)
+                    pipe.ttl(key)
+            replies = iter(await pipe.execute())
 
+        created = 0
+        now = time.time()
+        async with redis_client.pipeline(transaction=True) as pipe:
+            for (user_id, company_id, quiz_id), attempt_keys in legacy.items():
+                exists, migrating = next(replies), next(replies)
+                stored = [(next(replies), next(replies)) for _ in attempt_keys]
+                pipe.delete(*attempt_keys)
+                answers = {value["question_id"]: json.dumps({"answer_data": value["answer_data"],
+                                                             "is_correct": int(value["is_correct"])})
+                           for value, ttl in stored if value}
+                if (exists and not migrating) or not answers:
+                    continue
+                # -1 is a key without expiry, -2 a key that expired in the meantime
+                ttl = max(redis_settings.expire_time if ttl == -1 else ttl for _, ttl in stored)
+                if ttl <= 0:
+                    continue
+                attempt_key = self.attempt_key(user_id, company_id, quiz_id)
+                pipe.hset(attempt_key, mapping=answers)
+                if exists:
+                    pipe.expire(attempt_key, ttl, gt=True)
+                else:
+                    pipe.expire(attempt_key, ttl)
+                    pipe.sadd(migrating_key, f"{user_id}:{company_id}:{quiz_id}")
+                    created += 1
+                pipe.zadd(self.user_index_key(user_id), {f"{company_id}:{quiz_id}": now + ttl}, gt=True)
+                pipe.zadd(self.company_index_key(company_id), {f"{user_id}:{quiz_id}": now + ttl}, gt=True)
+                for index_key in (self.user_index_key(user_id), self.company_index_key(company_id)):
+                    pipe.expire(index_key, redis_settings.expire_time)
+            await pipe.execute()
+        return created
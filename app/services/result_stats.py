@@ -0,0 +1,41 @@
+from app.utils.repository import AbstractRepository
+
+
+class ResultStatsService:
+    """Removes results together with what the UserCompanyStats and UserStats rollups hold of them.
+
+    Results and attempts removed by a cascade would stay counted in the rollups, so they are
+    deleted here first and their sums subtracted in the same transaction.
+    """
+
+    def __init__(self, results_repo: AbstractRepository, attempts_repo: AbstractRepository,
+                 user_company_stats_repo: AbstractRepository, user_stats_repo: AbstractRepository):
+        self.results_repo: AbstractRepository = results_repo()
+        self.attempts_repo: AbstractRepository = attempts_repo()
+        self.user_company_stats_repo: AbstractRepository = user_company_stats_repo()
+        self.user_stats_repo: AbstractRepository = user_stats_repo()
+
+    async def delete_results(self, **filter_by) -> list[dict]:
+        # returns the updated per-company rollup rows, for the leaderboards
+        totals = await self.results_repo.group_by("user_id", "company_id", **filter_by).delete(
+            right_sum=("sum", "result_right_count"), total_sum=("sum", "result_total_count"))
+        attempts = await self.attempts_repo.group_by("user_id", "company_id", **filter_by).delete(
+            attempts=("count", "id"))
+
+        company_stats = {}
+        user_stats = {}
+        for rows in (totals, attempts):
+            for row in rows:
+                for stats, stats_key in ((company_stats, (row["user_id"], row["company_id"])),
+                                         (user_stats, row["user_id"])):
+                    deltas = stats.setdefault(stats_key, {"right_sum": 0, "total_sum": 0, "attempts": 0})
+                    for column in ("right_sum", "total_sum", "attempts"):
+                        deltas[column] -= row.get(column, 0)
+
+        # sorted like the scoring path, so both lock the rollup rows in the same order
+        company_rows = await self.user_company_stats_repo.add_deltas(
+            [{"user_id": user_id, "company_id": company_id, "last_attempt_at": None, **row}
+             for (user_id, company_id), row in sorted(company_stats.items())])
+        await self.user_stats_repo.add_deltas(
+            [{"user_id": user_id, "last_attempt_at": None, **row} for user_id, row in sorted(user_stats.items())])
+        return company_rows
@@ -1,7 +1,9 @@
 import asyncio
 import datetime
 import csv
+import io
 import json
+from collections import Counter
 
 from fastapi import HTTPException
 from redis import Redis
@@ -9,135 +11,283 @@ from redis import Redis
 from app.models.model import User
 from app.schemas.quizzes import QuizDateRequest
 from app.schemas.result import ResultCreateRequest, AverageResultListDetail, CompanyAverageResultForUserListDetail, \
-    UserAverageResultDateListDetail, UserPassingDateListDetail
-from app.schemas.user_answer import UserAnswerSchema, UserAnswerListSchema
+    UserAverageResultDateListDetail, UserPassingDateListDetail, TrendBucket, TrendBucketDetail, LeaderboardEntrySchema
+from app.schemas.user_answer import UserAnswerSchema, UserAnswerListSchema, SubmissionSchema
 from app.schemas.user_answer_redis import AnswerData, AnswerDataDetail
+from app.services.analytics_cache import AnalyticsCache
+from app.services.answer_keys import AnswerKeyCache
+from app.services.leaderboards import Leaderboards
 from app.services.permissions import QuizzesPermissions, ResultsPermissions
+from app.services.quiz_activity import QuizActivity
 from app.services.redis import RedisService
-from app.utils.repository import AbstractRepository
+from app.services.submissions import SubmissionQueue
+from app.utils.repository import AbstractRepository, Range
 from app.utils.validations import ResultsDataValidator
 
 
 class ResultsService:
+    MAX_TREND_BUCKETS = 366
+    TREND_DEFAULT_WINDOWS = {TrendBucket.day: datetime.timedelta(days=30),
+                             TrendBucket.week: datetime.timedelta(weeks=12),
+                             TrendBucket.month: datetime.timedelta(days=365)}
+    # shortest length of a bucket, used to bound how many buckets a window can hold
+    TREND_MIN_BUCKET_SPANS = {TrendBucket.day: datetime.timedelta(days=1),
+                              TrendBucket.week: datetime.timedelta(weeks=1),
+                              TrendBucket.month: datetime.timedelta(days=28)}
+
     def __init__(self, companies_repo: AbstractRepository, quizzes_repo: AbstractRepository,
                  questions_repo: AbstractRepository, answers_repo: AbstractRepository,
                  results_repo: AbstractRepository, members_repo: AbstractRepository,
-                 users_repo: AbstractRepository):
+                 users_repo: AbstractRepository, attempts_repo: AbstractRepository,
+                 user_company_stats_repo: AbstractRepository, user_stats_repo: AbstractRepository):
         self.quizzes_repo: AbstractRepository = quizzes_repo()
         self.questions_repo: AbstractRepository = questions_repo()
         self.answers_repo: AbstractRepository = answers_repo()
         self.results_repo: AbstractRepository = results_repo()
         self.members_repo: AbstractRepository = members_repo()
         self.companies_repo: AbstractRepository = companies_repo()
+        self.attempts_repo: AbstractRepository = attempts_repo()
+        self.user_company_stats_repo: AbstractRepository = user_company_stats_repo()
+        self.user_stats_repo: AbstractRepository = user_stats_repo()
 
         self.validator = ResultsDataValidator(companies_repo, quizzes_repo, questions_repo, answers_repo,
                                               members_repo, users_repo)
         self.permissions = ResultsPermissions(companies_repo, members_repo)
         self.redis_service = RedisService()
+        self.answer_keys = AnswerKeyCache()
+        self.analytics_cache = AnalyticsCache()
+        self.leaderboards = Leaderboards()
+        self.submissions = SubmissionQueue()
+        self.quiz_activity = QuizActivity()
 
     async def get_result(self, company_id: int, quiz_id: int, user_answers: UserAnswerListSchema, current_user: User,
                          redis_client: Redis):
         quiz = await self.validator.quiz_exist(company_id, quiz_id)
         await self.validator.answers_number_validator(user_answers, quiz)
-        if quiz.last_passed_at is None or quiz.last_passed_at.weekday() != datetime.datetime.utcnow().weekday():
-            quiz_dict = {"last_passed_at": datetime.datetime.utcnow()}
-            await self.quizzes_repo.update_one(quiz_id, quiz_dict)
-
-        correct_results = 0
-        for answer in user_answers.user_answers:
-            question = await self.questions_repo.get_one_by(id=answer.question_id, quiz_id=quiz.id)
-            check_answer = await self.answers_repo.get_one_by(question_id=question.id, answer_data=answer.answer_data)
-            is_answer_correct = 0
-            if check_answer and check_answer.is_correct:
-                correct_results += 1
-                is_answer_correct = 1
-            redis_answer_data = AnswerData(user_id=current_user.id, company_id=company_id, quiz_id=quiz_id,
-                                           question_id=question.id, answer_data=answer.answer_data,
-                                           is_correct=is_answer_correct)
-            await self.redis_service.save_result_to_redis(redis_client, redis_answer_data)
-
-        result = await self.results_repo.get_one_by(user_id=current_user.id, company_id=company_id, quiz_id=quiz_id)
-        result_dict = {"result_right_count": correct_results, "result_total_count": len(quiz.questions)}
-        if result:
-            await self.results_repo.update_one(result.id, result_dict)
-            return result.id
-
-        result_dict.update({"user_id": current_user.id, "company_id": company_id, "quiz_id": quiz_id})
-        return await self.results_repo.create_one(result_dict)
+        submission = SubmissionSchema(user_id=current_user.id, company_id=company_id, quiz_id=quiz_id,
+                                      user_answers=user_answers.user_answers)
+        result_ids = await self.record_results([submission], redis_client)
+        return result_ids[0]
 
-    async def get_average_in_company(self, company_id: int, current_user: User):
-        quizzes = await self.quizzes_repo.get_all_by(company_id=company_id)
-        right_answers_count = 0
-        total_answers_count = 0
-        for quiz in quizzes:
-            results = await self.results_repo.get_one_by(quiz_id=quiz.id, user_id=current_user.id)
-            if results:
-                for result in results:
-                    right_answers_count += result.result_right_count
-                    total_answers_count += result.result_total_count
-            else:
-                total_answers_count += len(quiz.questions)
+    async def submit_result(self, company_id: int, quiz_id: int, user_answers: UserAnswerListSchema,
+                            current_user: User, redis_client: Redis):
+        # validated here, scored later by the scoring worker
+        quiz = await self.validator.quiz_exist(company_id, quiz_id)
+        await self.validator.answers_number_validator(user_answers, quiz)
+        submission = SubmissionSchema(user_id=current_user.id, company_id=company_id, quiz_id=quiz_id,
+                                      user_answers=user_answers.user_answers)
+        return await self.submissions.enqueue(redis_client, submission)
 
-        if total_answers_count == 0:
-            return 0
-        return round(float(right_answers_count / total_answers_count), 4)
+    async def get_attempt_status(self, attempt_id: str, current_user: User, redis_client: Redis):
+        attempt = await self.submissions.get_status(redis_client, attempt_id, current_user.id)
+        if attempt is None:
+            raise HTTPException(status_code=404, detail="no such attempt")
+        return attempt
+
+    async def score_submissions(self, submissions: list[SubmissionSchema], redis_client: Redis) -> dict[str, dict]:
+        # validates and records a batch of queued submissions, returns the status of every attempt
+        quiz_ids = list({submission.quiz_id for submission in submissions})
+        quizzes = {quiz.id: quiz for quiz in await self.quizzes_repo.get_all_by(id=quiz_ids)}
+        statuses = {}
+        valid = []
+        for submission in submissions:
+            quiz = quizzes.get(submission.quiz_id)
+            try:
+                if quiz is None or quiz.company_id != submission.company_id:
+                    raise HTTPException(status_code=400, detail="no such quiz exist for the company")
+                await self.validator.answers_number_validator(
+                    UserAnswerListSchema(user_answers=submission.user_answers), quiz)
+            except HTTPException as e:
+                statuses[submission.attempt_id] = {"status": "failed", "detail": e.detail}
+                continue
+            valid.append(submission)
+
+        result_ids = await self.record_results(valid, redis_client)
+        for submission, result_id in zip(valid, result_ids):
+            statuses[submission.attempt_id] = {"status": "done", "result_id": result_id}
+        return statuses
+
+    async def record_results(self, submissions: list[SubmissionSchema], redis_client: Redis) -> list[int]:
+        # scores validated submissions and writes them with one statement per table, ids follow submissions.
+        # A queued submission scored again, e.g. claimed after its batch committed but was not
+        # acknowledged, conflicts with the attempt it already wrote and is not counted a second time.
+        if not submissions:
+            return []
+        now = datetime.datetime.now(datetime.timezone.utc)
+        scored = []
+        for submission in submissions:
+            answer_key = await self.answer_keys.get(
+                redis_client, submission.quiz_id,
+                lambda quiz_id=submission.quiz_id: self.quizzes_repo.get_one_by(id=quiz_id))
+            redis_answers = []
+            for answer in submission.user_answers:
+                is_answer_correct = int(answer.answer_data in answer_key.get(answer.question_id, ()))
+                redis_answers.append(AnswerData(user_id=submission.user_id, company_id=submission.company_id,
+                                                quiz_id=submission.quiz_id, question_id=answer.question_id,
+                                                answer_data=answer.answer_data, is_correct=is_answer_correct))
+            result_dict = {"user_id": submission.user_id, "company_id": submission.company_id,
+                           "quiz_id": submission.quiz_id, "result_total_count": len(answer_key),
+                           "result_right_count": sum(answer.is_correct for answer in redis_answers)}
+            scored.append((submission, redis_answers, result_dict))
+
+        inserted = await self.attempts_repo.create_new(
+            [{**result_dict, "attempt_id": submission.attempt_id, "created_at": submission.submitted_at or now}
+             for submission, _, result_dict in scored])
+        new = [(submission, redis_answers, result_dict) for submission, redis_answers, result_dict in scored
+               if submission.attempt_id is None or submission.attempt_id in inserted]
+
+        result_ids = {}
+        if new:
+            new_submissions = [submission for submission, _, _ in new]
+            # counted in Redis once committed and flushed to Quiz by the scheduler, no lock on the quiz row here
+            passes = Counter(submission.quiz_id for submission in new_submissions)
+            await self.quiz_activity.record(redis_client, passes, now)
+
+            results = {}
+            for submission, redis_answers, result_dict in new:
+                await self.redis_service.save_results_to_redis(redis_client, redis_answers)
+                # one row per key in the upsert, a later submission of the same quiz wins
+                results[(submission.user_id, submission.company_id, submission.quiz_id)] = result_dict
+
+            replaced = await self.results_repo.upsert_with_previous(list(results.values()))
+            company_rows = await self.update_stats(new_submissions, results, replaced)
+            await self.update_leaderboards(redis_client, results, company_rows)
+            await self.analytics_cache.invalidate(
+                redis_client, *{self.analytics_cache.user_tag(submission.user_id) for submission in new_submissions},
+                *{self.analytics_cache.company_tag(submission.company_id) for submission in new_submissions})
+            result_ids = {key: result_id for key, (result_id, _, _) in replaced.items()}
+
+        ids = []
+        for submission in submissions:
+            key = (submission.user_id, submission.company_id, submission.quiz_id)
+            if key not in result_ids:
+                # an attempt recorded before, its result row already exists
+                result = await self.results_repo.get_one_by(user_id=submission.user_id,
+                                                            company_id=submission.company_id,
+                                                            quiz_id=submission.quiz_id)
+                result_ids[key] = result.id
+            ids.append(result_ids[key])
+        return ids
+
+    async def update_stats(self, submissions: list[SubmissionSchema], results: dict[tuple, dict],
+                           replaced: dict[tuple, tuple[int, int, int]]) -> list[dict]:
+        # the rollups move by the difference between the new and the replaced result rows,
+        # in the same transaction as the results themselves; returns the updated per-company rows
+        now = datetime.datetime.now(datetime.timezone.utc)
+        company_stats = {}
+        user_stats = {}
+        for key, result in results.items():
+            user_id, company_id, _ = key
+            _, previous_right, previous_total = replaced[key]
+            for stats, stats_key in ((company_stats, (user_id, company_id)), (user_stats, user_id)):
+                row = stats.setdefault(stats_key, {"right_sum": 0, "total_sum": 0, "attempts": 0})
+                row["right_sum"] += result["result_right_count"] - previous_right
+                row["total_sum"] += result["result_total_count"] - previous_total
+        for submission in submissions:
+            company_stats[(submission.user_id, submission.company_id)]["attempts"] += 1
+            user_stats[submission.user_id]["attempts"] += 1
+
+        # sorted so concurrent batches lock the rollup rows in the same order
+        company_rows = await self.user_company_stats_repo.add_deltas(
+            [{"user_id": user_id, "company_id": company_id, "last_attempt_at": now, **row}
+             for (user_id, company_id), row in sorted(company_stats.items())])
+        await self.user_stats_repo.add_deltas(
+            [{"user_id": user_id, "last_attempt_at": now, **row} for user_id, row in sorted(user_stats.items())])
+        return company_rows
+
+    async def update_leaderboards(self, redis_client: Redis, results: dict[tuple, dict], company_rows: list[dict]):
+        # a quiz score takes the version of the user's company rollup row, which every submission
+        # of the quiz locks and updates after its result
+        leaderboards = self.leaderboards
+        scores = {}
+        versions = {}
+        for row in company_rows:
+            versions[(row["user_id"], row["company_id"])] = row["version"]
+            scores.setdefault(leaderboards.company_key(row["company_id"]), {})[row["user_id"]] = \
+                (leaderboards.score(row["right_sum"], row["total_sum"]), row["version"])
+        for (user_id, company_id, quiz_id), result in results.items():
+            scores.setdefault(leaderboards.quiz_key(quiz_id), {})[user_id] = \
+                (leaderboards.score(result["result_right_count"], result["result_total_count"]),
+                 versions[(user_id, company_id)])
+        await leaderboards.update(redis_client, scores)
+
+    async def get_average_in_company(self, company_id: int, current_user: User):
+        stats = await self.user_company_stats_repo.get_one_by(user_id=current_user.id, company_id=company_id)
+        questions = await self.questions_repo.count_in_scope(company_id)
+        return self.average(stats, questions)
 
     async def get_average_total(self, current_user: User):
-        quizzes = await self.quizzes_repo.get_all()
-        right_answers_count = 0
-        total_answers_count = 0
-        for quiz in quizzes:
-            results = await self.results_repo.get_one_by(quiz_id=quiz.id, user_id=current_user.id)
-            if results:
-                right_answers_count += results.result_right_count
-                total_answers_count += results.result_total_count
-            else:
-                total_answers_count += len(quiz.questions)
+        stats = await self.user_stats_repo.get_one_by(user_id=current_user.id)
+        questions = await self.questions_repo.count_in_scope()
+        return self.average(stats, questions)
 
-        if total_answers_count == 0:
+    @staticmethod
+    def average(stats, questions: int = 0) -> float:
+        # a question the user has not answered counts as answered wrong: total_sum holds the questions
+        # the user's results were scored on, the rest of the questions in scope are unanswered
+        right = stats.right_sum if stats is not None else 0
+        answered = stats.total_sum if stats is not None else 0
+        total = max(questions, answered)
+        if total == 0:
             return 0
-        return round(float(right_answers_count / total_answers_count), 4)
-
-    async def get_average_results_list(self, current_user: User):
-        quizzes = await self.quizzes_repo.get_all()
-        results = []
-        for quiz in quizzes:
-            result = await self.results_repo.get_one_by(quiz_id=quiz.id, user_id=current_user.id)
-            print(result)
-            if result:
-                results.append(AverageResultListDetail(quiz_id=quiz.id, company_id=quiz.company_id,
-                               average_result=float(result.result_right_count/result.result_total_count)))
-            else:
-                results.append(AverageResultListDetail(quiz_id=quiz.id, company_id=quiz.company_id,
-                               average_result=0))
-        return results
-
-    async def get_quizzes_dates_list(self, current_user: User):
-        quizzes = await self.quizzes_repo.get_all()
-        quizzes_list = []
-        for quiz in quizzes:
-            result = await self.results_repo.get_one_by(quiz_id=quiz.id, user_id=current_user.id)
-            if result:
-                quizzes_list.append(QuizDateRequest(quiz_name=quiz.quiz_name, last_passed_at=result.created_at))
-            else:
-                quizzes_list.append(QuizDateRequest(quiz_name=quiz.quiz_name, last_passed_at=None))
-        return quizzes_list
+        return round(float(right / total), 4)
 
-    async def get_all_members_averages(self, current_user: User):
-        companies = await self.companies_repo.get_all()
-        results_list = []
-        for company in companies:
-            if await self.permissions.user_owner_or_admin(company, current_user):
-                members = await self.members_repo.get_all_by(company_id=company.id)
-                for member in members:
-                    results = await self.results_repo.get_all_by(company_id=company.id, user_id=member.user_id)
-                    for result in results:
-                        results_list.append(CompanyAverageResultForUserListDetail(quiz_id=result.quiz_id,
-                                            company_id=result.company_id, user_id=member.user_id,
-                                        average_result=float(result.result_right_count / result.result_total_count)))
-        return results_list
+    async def get_average_results_list(self, current_user: User, redis_client: Redis):
+        cache = self.analytics_cache
+        return await cache.get_or_compute(redis_client, cache.key("my_average", current_user.id),
+                                          [cache.user_tag(current_user.id), cache.QUIZZES_TAG],
+                                          list[AverageResultListDetail],
+                                          lambda: self.average_results_list(current_user))
 
-    async def get_member_averages(self, user_id: int, current_user: User):
+    async def average_results_list(self, current_user: User):
+        quizzes = await self.quizzes_repo.get_all(loading="none")
+        totals = await self.results_repo.group_by("quiz_id", user_id=current_user.id).agg(
+            right=("sum", "result_right_count"), total=("sum", "result_total_count"))
+        averages = {row["quiz_id"]: float(row["right"] / row["total"]) if row["total"] else 0 for row in totals}
+        return [AverageResultListDetail(quiz_id=quiz.id, company_id=quiz.company_id,
+                                        average_result=averages.get(quiz.id, 0)) for quiz in quizzes]
+
+    async def get_quizzes_dates_list(self, current_user: User, redis_client: Redis):
+        cache = self.analytics_cache
+        return await cache.get_or_compute(redis_client, cache.key("quizzes", current_user.id),
+                                          [cache.user_tag(current_user.id), cache.QUIZZES_TAG],
+                                          list[QuizDateRequest], lambda: self.quizzes_dates_list(current_user))
+
+    async def quizzes_dates_list(self, current_user: User):
+        quizzes = await self.quizzes_repo.get_all(loading="none")
+        dates = await self.attempts_repo.group_by("quiz_id", user_id=current_user.id).agg(
+            last_passed_at=("max", "created_at"))
+        last_passed = {row["quiz_id"]: row["last_passed_at"] for row in dates}
+        return [QuizDateRequest(quiz_name=quiz.quiz_name, last_passed_at=last_passed.get(quiz.id)) for quiz in quizzes]
+
+    async def get_all_members_averages(self, current_user: User, redis_client: Redis, limit: int,
+                                       after: str | None = None, company_id: int | None = None,
+                                       quiz_id: int | None = None):
+        filter_by = {key: value for key, value in {"company_id": company_id, "quiz_id": quiz_id}.items()
+                     if value is not None}
+
+        async def page():
+            return await self.results_repo.get_members_averages_page(current_user.id, limit, after, **filter_by)
+
+        # across all managed companies a page depends on too many tags, only one company's pages are cached
+        if company_id is None:
+            return await page()
+        cache = self.analytics_cache
+        return await cache.get_or_compute(redis_client,
+                                          cache.key("members_average", current_user.id, company_id,
+                                                    quiz_id, limit, after),
+                                          [cache.user_tag(current_user.id), cache.company_tag(company_id)],
+                                          tuple[list[CompanyAverageResultForUserListDetail], str | None], page)
+
+    async def get_member_averages(self, user_id: int, current_user: User, redis_client: Redis):
+        cache = self.analytics_cache
+        return await cache.get_or_compute(redis_client, cache.key("member_averages", current_user.id, None, user_id),
+                                          [cache.user_tag(user_id), cache.user_tag(current_user.id),
+                                           cache.QUIZZES_TAG],
+                                          list[UserAverageResultDateListDetail],
+                                          lambda: self.member_averages(user_id, current_user))
+
+    async def member_averages(self, user_id: int, current_user: User):
         results = await self.results_repo.get_all_by(user_id=user_id)
         results_list = []
         for result in results:
@@ -148,76 +298,149 @@ class ResultsService:
                                     average_result=float(result.result_right_count / result.result_total_count)))
         return results_list
 
-    async def get_company_members_passing_dates(self, company_id: int, current_user: User):
+    async def get_company_members_passing_dates(self, company_id: int, current_user: User, redis_client: Redis,
+                                                since: datetime.datetime | None = None,
+                                                until: datetime.datetime | None = None):
+        # a bounded window only touches the attempt partitions of those months
+        company = await self.companies_repo.get_one_by(id=company_id)
+        await self.permissions.has_user_permissions(company, current_user)
+
+        async def passing_dates():
+            # current members only, filtered by a subquery so it stays one statement
+            members = self.members_repo.values_select("user_id", company_id=company.id)
+            dates = await self.attempts_repo.group_by("user_id", company_id=company.id, user_id=members,
+                                                      created_at=Range(since, until)).agg(
+                last_passed_at=("max", "created_at"))
+            return [UserPassingDateListDetail(**row) for row in dates]
+
+        cache = self.analytics_cache
+        return await cache.get_or_compute(redis_client, cache.key("dates", current_user.id, company.id, since, until),
+                                          [cache.company_tag(company.id)], list[UserPassingDateListDetail],
+                                          passing_dates)
+
+    async def get_trend(self, company_id: int, current_user: User, redis_client: Redis, bucket: TrendBucket,
+                        since: datetime.datetime | None = None, until: datetime.datetime | None = None,
+                        quiz_id: int | None = None, user_id: int | None = None):
+        # the series is bounded by the number of buckets in the window, not by the number of attempts
         company = await self.companies_repo.get_one_by(id=company_id)
         await self.permissions.has_user_permissions(company, current_user)
-        members = await self.members_repo.get_all_by(company_id=company.id)
-        user_dates = []
-        for member in members:
-            results = await self.results_repo.get_all_by(company_id=company.id, user_id=member.user_id)
-            if results:
-                recent_date = max(result.created_at for result in results)
-                user_dates.append(UserPassingDateListDetail(user_id=member.user_id, last_passed_at=recent_date))
-        return user_dates
+        if quiz_id is not None and not await self.quizzes_repo.exists_by(id=quiz_id, company_id=company.id):
+            raise HTTPException(status_code=400, detail="no such quiz exist for the company")
+
+        filter_by = {key: value for key, value in {"quiz_id": quiz_id, "user_id": user_id}.items()
+                     if value is not None}
+        filter_by.update(company_id=company.id, created_at=self.trend_window(bucket, since, until))
+
+        async def trend():
+            return [TrendBucketDetail(**row) for row in await self.attempts_repo.trend(bucket, **filter_by)]
+
+        cache = self.analytics_cache
+        return await cache.get_or_compute(redis_client,
+                                          cache.key("trend", current_user.id, company.id, bucket.value,
+                                                    quiz_id, user_id, since, until),
+                                          [cache.company_tag(company.id)], list[TrendBucketDetail], trend)
+
+    def trend_window(self, bucket: TrendBucket, since: datetime.datetime | None,
+                     until: datetime.datetime | None) -> Range:
+        # naive bounds are taken as UTC
+        since, until = [value.replace(tzinfo=datetime.timezone.utc) if value and value.tzinfo is None else value
+                        for value in (since, until)]
+        if until is None:
+            until = datetime.datetime.now(datetime.timezone.utc)
+        if since is None:
+            since = until - self.TREND_DEFAULT_WINDOWS[bucket]
+        if since >= until:
+            raise HTTPException(status_code=400, detail="since must be earlier than until")
+        if (until - since) / self.TREND_MIN_BUCKET_SPANS[bucket] + 1 > self.MAX_TREND_BUCKETS:
+            raise HTTPException(status_code=400,
+                                detail=f"the date range holds more than {self.MAX_TREND_BUCKETS} buckets")
+        return Range(since, until)
+
+    async def leaderboard_key(self, current_user: User, company_id: int | None = None,
+                              quiz_id: int | None = None) -> str:
+        # leaderboards are visible to the owner and the members of the company
+        if quiz_id is not None:
+            company_ids = await self.quizzes_repo.get_values_by("company_id", id=quiz_id)
+            if not company_ids:
+                raise HTTPException(status_code=404, detail="quiz does not exist")
+            company_id = company_ids[0]
+        if not await self.validator.member_exist(current_user.id, company_id):
+            raise HTTPException(status_code=403, detail="Not enough permissions")
+        if quiz_id is not None:
+            return self.leaderboards.quiz_key(quiz_id)
+        return self.leaderboards.company_key(company_id)
+
+    async def get_leaderboard_top(self, current_user: User, redis_client: Redis, limit: int,
+                                  company_id: int | None = None, quiz_id: int | None = None):
+        key = await self.leaderboard_key(current_user, company_id, quiz_id)
+        return await self.leaderboards.top(redis_client, key, limit)
+
+    async def get_leaderboard_around_me(self, current_user: User, redis_client: Redis, radius: int,
+                                        company_id: int | None = None, quiz_id: int | None = None):
+        key = await self.leaderboard_key(current_user, company_id, quiz_id)
+        return await self.leaderboards.around(redis_client, key, current_user.id, radius)
+
+    async def get_leaderboard_rank(self, current_user: User, redis_client: Redis, user_id: int,
+                                   company_id: int | None = None, quiz_id: int | None = None) -> LeaderboardEntrySchema:
+        key = await self.leaderboard_key(current_user, company_id, quiz_id)
+        entry = await self.leaderboards.rank(redis_client, key, user_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="user is not on the leaderboard")
+        return entry
 
     async def get_results(self, current_user: User, redis_client: Redis):
-        answers = []
-        async for key in redis_client.scan_iter(f"answer:{current_user.id}:*"):
-            data = await self.redis_service.get_result_from_redis(redis_client, key)
-            answer = AnswerDataDetail(company_id=data.get("company_id"), quiz_id=data.get("quiz_id"),
-                                      question_id=data.get("question_id"), answer_data=data.get("answer_data"),
-                                      is_correct=data.get("is_correct"))
-            answers.append(answer)
-        return answers
+        answers = await self.redis_service.get_user_answers(redis_client, current_user.id)
+        return [AnswerDataDetail(company_id=answer.company_id, quiz_id=answer.quiz_id,
+                                 question_id=answer.question_id, answer_data=answer.answer_data,
+                                 is_correct=answer.is_correct) for answer in answers]
 
     async def get_results_for_user(self, current_user: User, user_id: int, redis_client: Redis):
-        quizzes = await self.quizzes_repo.get_all_by(created_by=current_user.id)
+        quizzes = await self.quizzes_repo.get_all_by(loading="none", created_by=current_user.id)
         await self.validator.has_created_quizzes(quizzes)
         await self.validator.user_exists(user_id)
 
-        answers = []
-        for quiz in quizzes:
-            async for key in redis_client.scan_iter(f"answer:{user_id}:{quiz.company_id}:{quiz.id}:*"):
-                data = await self.redis_service.get_result_from_redis(redis_client, key)
-                if await self.validator.member_exist(user_id, quiz.company_id):
-                    answer = AnswerDataDetail(company_id=data.get("company_id"), quiz_id=data.get("quiz_id"),
-                                              question_id=data.get("question_id"), answer_data=data.get("answer_data"),
-                                              is_correct=data.get("is_correct"))
-                    answers.append(answer)
-        return answers
+        quiz_ids = {(quiz.company_id, quiz.id) for quiz in quizzes}
+        user_answers = [answer for answer in await self.redis_service.get_user_answers(redis_client, user_id)
+                        if (answer.company_id, answer.quiz_id) in quiz_ids]
+        member_of = await self.validator.member_company_ids(user_id, {answer.company_id for answer in user_answers})
+        return [AnswerDataDetail(company_id=answer.company_id, quiz_id=answer.quiz_id,
+                                 question_id=answer.question_id, answer_data=answer.answer_data,
+                                 is_correct=answer.is_correct)
+                for answer in user_answers if answer.company_id in member_of]
 
     async def get_all_results_for_company(self, current_user: User, company_id: int, redis_client: Redis):
         await self.permissions.has_user_permissions(company_id, current_user)
-        answers = []
-        async for key in redis_client.scan_iter(f"answer:*:{company_id}:*:*"):
-            data = await self.redis_service.get_result_from_redis(redis_client, key)
-            if await self.validator.member_exist(int(data.get("user_id")), company_id):
-                answer = AnswerData(user_id=data.get("user_id"), company_id=data.get("company_id"),
-                                    quiz_id=data.get("quiz_id"), question_id=data.get("question_id"),
-                                    answer_data=data.get("answer_data"), is_correct=data.get("is_correct"))
-                answers.append(answer)
-        return answers
-
-    async def export_to_csv(self, redis_client: Redis, current_user: User):
-        with open('results.csv', 'w', newline='') as file:
-            writer = csv.writer(file)
-            field = ["quiz", "question", "answer", "is_correct"]
-            writer.writerow(field)
-
-            async for key in redis_client.scan_iter(f"answer:{current_user.id}:*"):
-                data = await self.redis_service.get_result_from_redis(redis_client, key)
-                filtered_data = [data.get("quiz_id"), data.get("question_id"), data.get("answer_data"),
-                                 data.get("is_correct")]
-                writer.writerow(filtered_data)
-        return True
-
-    async def export_to_json(self, redis_client: Redis, current_user: User):
-        with open("results.json", "w") as outfile:
-            async for key in redis_client.scan_iter(f"answer:{current_user.id}:*"):
-                data = await self.redis_service.get_result_from_redis(redis_client, key)
-                filtered_data = {"quiz": data.get("quiz_id"), "question": data.get("question_id"),
-                                 "answer_data": data.get("answer_data"),
-                                 "is_correct": data.get("is_correct")}
-                json.dump(filtered_data, outfile)
-        return True
-      
+        member_ids = await self.validator.company_member_ids(company_id)
+        answers = await self.redis_service.get_company_answers(redis_client, company_id)
+        return [answer for answer in answers if answer.user_id in member_ids]
+
+    async def export_results(self, redis_client: Redis, current_user: User, export_format: str):
+        # encodes one Redis batch at a time, so the first chunk is sent before the export is read to the end
+        fields = ["quiz", "question", "answer_data", "is_correct"]
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(["quiz", "question", "answer", "is_correct"])
+            yield buffer.getvalue()
+        elif export_format == "json":
+            yield "["
+
+        first = True
+        async for answers in self.redis_service.iter_user_answers(redis_client, current_user.id):
+            rows = [[answer.quiz_id, answer.question_id, answer.answer_data, answer.is_correct] for answer in answers]
+            if export_format == "csv":
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(rows)
+                chunk = buffer.getvalue()
+            elif export_format == "ndjson":
+                chunk = "".join(json.dumps(dict(zip(fields, row))) + "\n" for row in rows)
+            else:
+                chunk = ",".join(json.dumps(dict(zip(fields, row))) for row in rows)
+                if chunk and not first:
+                    chunk = "," + chunk
+            if chunk:
+                first = False
+                yield chunk
+
+        if export_format == "json":
+            yield "]"
@@ -1,12 +1,46 @@
+import datetime
+import logging
+
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from app.core.config import db_settings, redis_settings
+from app.db.database import get_redis_db
+from app.repositories.attempts import QuizAttemptsRepository, month_start
+from app.repositories.quizes import QuizzesRepository
+from app.services.quiz_activity import QuizActivity
 from app.services.dependencies import notifications_service
+from app.utils.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
 
 scheduler = AsyncIOScheduler()
 
 
 async def send_notifications():
     notification_service = notifications_service()
-    await notification_service.send_notifications()
+    async with UnitOfWork():
+        await notification_service.send_notifications()
+
+
+async def maintain_attempt_partitions():
+    # keeps the next months' partitions ready and detaches the ones past retention (0 keeps everything)
+    attempts_repo = QuizAttemptsRepository()
+    today = datetime.datetime.utcnow().date()
+    async with UnitOfWork():
+        moved = await attempts_repo.ensure_partitions(today, db_settings.db_attempts_partitions_ahead + 1)
+        for name, count in moved.items():
+            if count:
+                # the default partition only catches attempts when partitions were not created ahead
+                logger.warning("moved %s attempts from the default partition into %s", count, name)
+        if db_settings.db_attempts_retention_months > 0:
+            await attempts_repo.detach_partitions_before(
+                month_start(today, -db_settings.db_attempts_retention_months))
+
+
+async def flush_quiz_activity():
+    async with UnitOfWork():
+        await QuizActivity().flush(await get_redis_db(), QuizzesRepository())
 
 
 scheduler.add_job(send_notifications, 'cron', hour=0)
+scheduler.add_job(maintain_attempt_partitions, 'cron', hour=1)
+scheduler.add_job(flush_quiz_activity, 'interval', seconds=redis_settings.quiz_activity_flush_seconds)
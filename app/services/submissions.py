@@ -0,0 +1,84 @@
+import datetime
+import uuid
+
+from redis import Redis
+from redis.exceptions import ResponseError
+
+from app.core.config import redis_settings
+from app.schemas.user_answer import SubmissionSchema, AttemptStatusSchema
+
+
+class SubmissionQueue:
+    """Quiz submissions waiting to be scored, kept in a Redis Stream read by a consumer group.
+
+    Every submission gets an attempt id; its status lives in attempt_status:{attempt_id}
+    until the answers expire.
+    """
+    group = "scoring"
+
+    def status_key(self, attempt_id: str) -> str:
+        return f"attempt_status:{attempt_id}"
+
+    async def enqueue(self, redis_client: Redis, submission: SubmissionSchema) -> str:
+        # the attempt row is keyed by both, so scoring the submission again writes nothing new
+        submission.attempt_id = uuid.uuid4().hex
+        submission.submitted_at = datetime.datetime.now(datetime.timezone.utc)
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(self.status_key(submission.attempt_id),
+                      mapping={"status": "queued", "user_id": submission.user_id})
+            pipe.expire(self.status_key(submission.attempt_id), redis_settings.expire_time)
+            pipe.xadd(redis_settings.submissions_stream, {"submission": submission.model_dump_json()})
+            await pipe.execute()
+        return submission.attempt_id
+
+    async def get_status(self, redis_client: Redis, attempt_id: str, user_id: int) -> AttemptStatusSchema | None:
+        # attempts of other users are reported as missing
+        data = await redis_client.hgetall(self.status_key(attempt_id))
+        if not data or int(data["user_id"]) != user_id:
+            return None
+        return AttemptStatusSchema(attempt_id=attempt_id, status=data["status"],
+                                   result_id=data.get("result_id"), detail=data.get("detail"))
+
+    async def get_statuses(self, redis_client: Redis, attempt_ids: list[str]) -> list[str | None]:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for attempt_id in attempt_ids:
+                pipe.hget(self.status_key(attempt_id), "status")
+            return await pipe.execute()
+
+    async def set_statuses(self, redis_client: Redis, statuses: dict[str, dict]):
+        if not statuses:
+            return
+        async with redis_client.pipeline(transaction=False) as pipe:
+            for attempt_id, mapping in statuses.items():
+                pipe.hset(self.status_key(attempt_id), mapping=mapping)
+                pipe.expire(self.status_key(attempt_id), redis_settings.expire_time)
+            await pipe.execute()
+
+    async def ensure_group(self, redis_client: Redis):
+        try:
+            await redis_client.xgroup_create(redis_settings.submissions_stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def read(self, redis_client: Redis, consumer: str, count: int,
+                   block_ms: int = 5000, min_idle_ms: int = 60000) -> list[tuple[str, SubmissionSchema]]:
+        # entries left pending by a consumer that died are claimed before new ones are read
+        _, entries, *_ = await redis_client.xautoclaim(redis_settings.submissions_stream, self.group, consumer,
+                                                       min_idle_time=min_idle_ms, start_id="0-0", count=count)
+        if not entries:
+            streams = await redis_client.xreadgroup(self.group, consumer, {redis_settings.submissions_stream: ">"},
+                                                    count=count, block=block_ms)
+            entries = streams[0][1] if streams else []
+        # claimed entries that were deleted from the stream come back without fields
+        await self.ack(redis_client, [entry_id for entry_id, fields in entries if not fields])
+        return [(entry_id, SubmissionSchema.model_validate_json(fields["submission"]))
+                for entry_id, fields in entries if fields]
+
+    async def ack(self, redis_client: Redis, entry_ids: list[str]):
+        if not entry_ids:
+            return
+        async with redis_client.pipeline(transaction=True) as pipe:
+            pipe.xack(redis_settings.submissions_stream, self.group, *entry_ids)
+            pipe.xdel(redis_settings.submissions_stream, *entry_ids)
+            await pipe.execute()
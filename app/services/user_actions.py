@@ -1,11 +1,16 @@
 from fastapi import HTTPException
+from redis import Redis
+
 from app.models.model import User
 from app.repositories.companies import CompaniesRepository
 from app.repositories.invitations import InvitationsRepository
 from app.repositories.members import MembersRepository
 from app.repositories.requests import RequestsRepository
 from app.repositories.users import UsersRepository
+from app.schemas.invitations import InvitationListResponse
+from app.schemas.requests import RequestListResponse
 from app.schemas.actions import UserActionCreate, UserActions
+from app.services.analytics_cache import AnalyticsCache
 from app.services.permissions import ActionsPermissions
 from app.utils.repository import AbstractRepository
 from app.utils.validations import ActionsValidator
@@ -19,8 +24,9 @@ class UserActionsService:
         self.members_repo: AbstractRepository = members_repo()
         self.actions_permissions = ActionsPermissions()
         self.validator = ActionsValidator(company_repo, users_repo, invitations_repo, members_repo)
+        self.analytics_cache = AnalyticsCache()
 
-    async def accept_invite(self, action: UserActionCreate, current_user: User):
+    async def accept_invite(self, action: UserActionCreate, current_user: User, redis_client: Redis):
         await self.validator.user_action_validation(action)
 
         invitation = await self.invitations_repo.get_one_by(user_id=current_user.id, company_id=action.company_id,
@@ -33,7 +39,10 @@ class UserActionsService:
         await self.invitations_repo.update_one(invitation.id, invitation_dict)
 
         member_dict = {"user_id": current_user.id, "role": "member", "company_id": action.company_id}
-        return await self.members_repo.create_one(member_dict)
+        member_id = await self.members_repo.create_one(member_dict)
+        await self.analytics_cache.invalidate(redis_client, self.analytics_cache.user_tag(current_user.id),
+                                              self.analytics_cache.company_tag(action.company_id))
+        return member_id
 
     async def deny_invite(self, action: UserActionCreate, current_user: User):
         await self.validator.user_action_validation(action)
@@ -74,7 +83,7 @@ class UserActionsService:
         await self.requests_repo.delete_one(request.id)
         return True
 
-    async def leave_company(self, action: UserActionCreate, current_user: User):
+    async def leave_company(self, action: UserActionCreate, current_user: User, redis_client: Redis):
         await self.validator.user_action_validation(action)
 
         member = await self.members_repo.get_one_by(user_id=current_user.id, company_id=action.company_id)
@@ -82,13 +91,17 @@ class UserActionsService:
             raise HTTPException(status_code=400, detail="no such member in the company")
 
         await self.members_repo.delete_one(member.id)
+        await self.analytics_cache.invalidate(redis_client, self.analytics_cache.user_tag(current_user.id),
+                                              self.analytics_cache.company_tag(action.company_id))
         return True
 
-    async def get_all_invitations(self, current_user: User):
-        return await self.invitations_repo.get_all_by(user_id=current_user.id, is_accepted=None)
+    async def get_all_invitations(self, current_user: User, limit: int, after: str | None = None):
+        return await self.invitations_repo.get_page(limit, after, projection=InvitationListResponse,
+                                                    user_id=current_user.id, is_accepted=None)
 
-    async def get_all_requests(self, current_user: User):
-        return await self.requests_repo.get_all_by(sender_id=current_user.id, is_accepted=None)
+    async def get_all_requests(self, current_user: User, limit: int, after: str | None = None):
+        return await self.requests_repo.get_page(limit, after, projection=RequestListResponse,
+                                                 sender_id=current_user.id, is_accepted=None)
 
 
 class UserActionHandler:
@@ -96,20 +109,20 @@ class UserActionHandler:
         self.action_service = UserActionsService(InvitationsRepository, RequestsRepository, CompaniesRepository,
                                              UsersRepository, MembersRepository)
 
-    async def handle_action(self, action: UserActionCreate, current_user: User):
+    async def handle_action(self, action: UserActionCreate, current_user: User, redis_client: Redis):
         if action.action is UserActions.Send_request:
             return await self.action_service.send_request(action, current_user)
         elif action.action is UserActions.Cancel_request:
             return await self.action_service.cancel_request(action, current_user)
         elif action.action is UserActions.Accept_invitation:
-            return await self.action_service.accept_invite(action, current_user)
+            return await self.action_service.accept_invite(action, current_user, redis_client)
         elif action.action is UserActions.Deny_invitation:
             return await self.action_service.deny_invite(action, current_user)
         elif action.action is UserActions.Leave_company:
-            return await self.action_service.leave_company(action, current_user)
+            return await self.action_service.leave_company(action, current_user, redis_client)
 
-    async def get_all_invitations(self, current_user: User):
-        return await self.action_service.get_all_invitations(current_user)
+    async def get_all_invitations(self, current_user: User, limit: int, after: str | None = None):
+        return await self.action_service.get_all_invitations(current_user, limit, after)
 
-    async def get_all_requests(self, current_user: User):
-        return await self.action_service.get_all_requests(current_user)
+    async def get_all_requests(self, current_user: User, limit: int, after: str | None = None):
+        return await self.action_service.get_all_requests(current_user, limit, after)
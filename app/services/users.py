@@ -1,7 +1,7 @@
 from fastapi import HTTPException
 
 from app.models.model import User
-from app.schemas.schema import UserSignUpRequest, UserUpdateRequest, UserSignInRequest
+from app.schemas.schema import UserSignUpRequest, UserUpdateRequest, UserSignInRequest, UsersListResponse
 from app.services.permissions import UserPermissions
 from app.utils.repository import AbstractRepository
 from app.auth.jwt import get_password_hash, verify_password
@@ -22,9 +22,8 @@ class UsersService:
         user_id = await self.users_repo.create_one(users_dict)
         return user_id
 
-    async def get_all_users(self):
-        users = await self.users_repo.get_all()
-        return users
+    async def get_all_users(self, limit: int, after: str | None = None):
+        return await self.users_repo.get_page(limit, after, projection=UsersListResponse)
 
     async def get_user_by_email(self, user_email: str):
         user = await self.users_repo.get_one_by(user_email=user_email)
@@ -0,0 +1,29 @@
+import base64
+import datetime
+import json
+
+from fastapi import HTTPException
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime.datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def coerce(value, python_type: type):
+    # values come from a client, anything that is not already of the column's type is rejected
+    if python_type is datetime.datetime:
+        return datetime.datetime.fromisoformat(value)
+    if not isinstance(value, python_type) or (isinstance(value, bool) and python_type is not bool):
+        raise TypeError(f"{value!r} is not {python_type.__name__}")
+    return value
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(columns):
+            raise ValueError
+        return [coerce(value, column.type.python_type) for value, column in zip(values, columns)]
+    except (ValueError, TypeError, NotImplementedError):
+        raise HTTPException(status_code=400, detail="invalid pagination cursor")
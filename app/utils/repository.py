@@ -1,10 +1,16 @@
 from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
 
 from fastapi import HTTPException
-from sqlalchemy import insert, select, update, delete
-from sqlalchemy.exc import SQLAlchemyError
+from pydantic import BaseModel
+from sqlalchemy import insert, select, update, delete, tuple_, func, Select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import NoResultFound, MultipleResultsFound
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.database import SessionLocal
+from app.db.database import SessionLocal, ReplicaSessionLocal
+from app.utils.pagination import encode_cursor, decode_cursor
+from app.utils.unit_of_work import current_unit_of_work, read_from_primary
 
 
 class AbstractRepository(ABC):
@@ -21,49 +27,281 @@ class AbstractRepository(ABC):
         raise NotImplementedError
 
 
+class Range:
+    """Half-open filter value, start <= column < end; either bound may be None."""
+
+    def __init__(self, start=None, end=None):
+        self.start = start
+        self.end = end
+
+    def conditions(self, column) -> list:
+        conditions = []
+        if self.start is not None:
+            conditions.append(column >= self.start)
+        if self.end is not None:
+            conditions.append(column < self.end)
+        return conditions
+
+
+class AggregateQuery:
+    FUNCTIONS = {"count": func.count, "sum": func.sum, "avg": func.avg, "min": func.min, "max": func.max}
+
+    def __init__(self, repository: "SQLAlchemyRepository", columns: tuple[str, ...], filter_by: dict):
+        self.repository = repository
+        self.columns = [getattr(repository.model, column) for column in columns]
+        self.filter_by = filter_by
+
+    async def agg(self, **aggregates: tuple[str, str]) -> list[dict]:
+        # aggregates are given as label=("function", "column"), e.g. total=("sum", "result_total_count")
+        model = self.repository.model
+        labeled = [self.FUNCTIONS[function](getattr(model, column)).label(label)
+                   for label, (function, column) in aggregates.items()]
+        async with self.repository.read_session() as session:
+            stmt = select(*self.columns, *labeled).where(*self.repository.filters(**self.filter_by))
+            if self.columns:
+                stmt = stmt.group_by(*self.columns)
+            res = await session.execute(stmt)
+            return [dict(row._mapping) for row in res.all()]
+
+    async def delete(self, **aggregates: tuple[str, str]) -> list[dict]:
+        # deletes the matching rows and returns the aggregates over the deleted ones, in one statement,
+        # so they cover exactly the rows that went away
+        model = self.repository.model
+        returned = {column.key for column in self.columns} | {column for _, column in aggregates.values()}
+        deleted = (delete(model).where(*self.repository.filters(**self.filter_by))
+                   .returning(*[getattr(model, column) for column in sorted(returned)])
+                   .cte("deleted"))
+        labeled = [self.FUNCTIONS[function](deleted.c[column]).label(label)
+                   for label, (function, column) in aggregates.items()]
+        columns = [deleted.c[column.key] for column in self.columns]
+        async with self.repository.session() as session:
+            stmt = select(*columns, *labeled)
+            if columns:
+                stmt = stmt.group_by(*columns)
+            res = await session.execute(stmt)
+            rows = [dict(row._mapping) for row in res.all()]
+            await self.repository.commit(session)
+            return rows
+
+
 class SQLAlchemyRepository(AbstractRepository):
     model = None
+    # loading profile name -> projection used for list reads, None loads full ORM objects
+    loading_profiles: dict[str, type[BaseModel] | None] = {"full": None}
 
-    async def create_one(self, data: dict) -> int:
+    @asynccontextmanager
+    async def session(self):
+        # primary session, used for writes
+        uow = current_unit_of_work.get()
+        if uow is not None:
+            uow.has_written = True
+            yield uow.session
+            return
         async with SessionLocal() as session:
+            yield session
+
+    @asynccontextmanager
+    async def read_session(self):
+        # replica session when one is configured, the request has not written yet
+        # and the read is not inside primary_reads
+        uow = current_unit_of_work.get()
+        if uow is not None:
+            yield uow.read_session
+            return
+        session_factory = SessionLocal if read_from_primary.get() else ReplicaSessionLocal or SessionLocal
+        async with session_factory() as session:
+            yield session
+
+    async def commit(self, session: AsyncSession):
+        # inside a unit of work the commit happens once, when the request ends;
+        # expire loaded objects so later reads in the same request see this write
+        if current_unit_of_work.get() is not None:
+            session.expire_all()
+            return
+        await session.commit()
+
+    async def create_one(self, data: dict) -> int:
+        async with self.session() as session:
             stmt = insert(self.model).values(**data).returning(self.model.id)
             res = await session.execute(stmt)
-            await session.commit()
+            await self.commit(session)
             return res.scalar_one()
 
+    async def create_many(self, data: list[dict]) -> list[int]:
+        if not data:
+            return []
+        async with self.session() as session:
+            stmt = insert(self.model).returning(self.model.id, sort_by_parameter_order=True)
+            res = await session.execute(stmt, data)
+            await self.commit(session)
+            return list(res.scalars().all())
+
     async def update_one(self, id: int, data: dict):
-        async with SessionLocal() as session:
+        async with self.session() as session:
             stmt = update(self.model).filter_by(id=id).values(**data).returning(self.model.id)
             res = await session.execute(stmt)
-            await session.commit()
+            await self.commit(session)
             return res.scalar_one()
 
-    async def get_all(self):
-        async with SessionLocal() as session:
-            stmt = select(self.model)
+    async def upsert_many(self, data: list[dict], index_elements: list[str]) -> list[int]:
+        # index_elements must match a unique index or constraint of the table; ids follow data
+        if not data:
+            return []
+        async with self.session() as session:
+            if any(key not in index_elements for key in data[0]):
+                res = await session.execute(self.upsert_statement(data, index_elements), data)
+                ids = list(res.scalars().all())
+            else:
+                # nothing to update, existing rows are kept as they are and their ids looked up
+                stmt = pg_insert(self.model).on_conflict_do_nothing(index_elements=index_elements)
+                await session.execute(stmt, data)
+                ids = await self.ids_by_keys(session, data, index_elements)
+            await self.commit(session)
+            return ids
+
+    def upsert_statement(self, data: list[dict], index_elements: list[str]):
+        # data rows must hold at least one column besides index_elements
+        stmt = pg_insert(self.model)
+        update_columns = {key: stmt.excluded[key] for key in data[0] if key not in index_elements}
+        stmt = stmt.on_conflict_do_update(index_elements=index_elements, set_=update_columns)
+        return stmt.returning(self.model.id, sort_by_parameter_order=True)
+
+    async def ids_by_keys(self, session: AsyncSession, data: list[dict], index_elements: list[str]) -> list[int]:
+        columns = [getattr(self.model, key) for key in index_elements]
+        keys = [tuple(row[key] for key in index_elements) for row in data]
+        res = await session.execute(select(self.model.id, *columns).where(tuple_(*columns).in_(keys)))
+        ids = {tuple(row[1:]): row[0] for row in res.all()}
+        return [ids[key] for key in keys]
+
+    def select(self, projection: type[BaseModel] | None = None, *extra_columns):
+        # with a projection only the schema's columns are selected and no ORM entities are built
+        if projection is None:
+            return select(self.model)
+        columns = [getattr(self.model, name).label(name) for name in projection.model_fields]
+        columns += [column for column in extra_columns if column.key not in projection.model_fields]
+        return select(*columns)
+
+    def filters(self, **filter_by) -> list:
+        # a list, tuple or set value is matched with IN, a Select (see values_select) with IN over
+        # the subquery, a Range with bounds, anything else with equality
+        conditions = []
+        for key, value in filter_by.items():
+            column = getattr(self.model, key)
+            if isinstance(value, Range):
+                conditions += value.conditions(column)
+            elif isinstance(value, (list, tuple, set, Select)):
+                conditions.append(column.in_(value))
+            else:
+                conditions.append(column == value)
+        return conditions
+
+    def projection_for(self, loading: str | None, projection: type[BaseModel] | None):
+        if loading is None:
+            return projection
+        if loading not in self.loading_profiles:
+            raise ValueError(f"unknown loading profile {loading!r} for {self.model.__name__}")
+        return self.loading_profiles[loading]
+
+    def read_models(self, rows, projection: type[BaseModel] | None = None):
+        if projection is None:
+            return [row.to_read_model() for row in rows]
+        return [projection(**row._mapping) for row in rows]
+
+    async def get_all(self, projection: type[BaseModel] | None = None, loading: str | None = None):
+        projection = self.projection_for(loading, projection)
+        async with self.read_session() as session:
+            stmt = self.select(projection)
             res = await session.execute(stmt)
-            res = [row[0].to_read_model() for row in res.all()]
-            return res
+            rows = res.all() if projection else res.scalars().all()
+            return self.read_models(rows, projection)
 
     async def get_one_by(self, **filter_by):
-        async with SessionLocal() as session:
+        # a missing or ambiguous row reads as None; database errors propagate, the shared
+        # transaction is aborted by them and must not carry on as if nothing happened
+        async with self.read_session() as session:
             try:
                 stmt = select(self.model).filter_by(**dict(filter_by))
                 res = await session.execute(stmt)
                 res = res.scalar_one().to_read_model()
                 return res
-            except SQLAlchemyError as e:
+            except (NoResultFound, MultipleResultsFound):
                 return None
 
-    async def get_all_by(self, **filter_by):
-        async with SessionLocal() as session:
-            stmt = select(self.model).filter_by(**dict(filter_by))
+    async def get_all_by(self, projection: type[BaseModel] | None = None, loading: str | None = None, **filter_by):
+        projection = self.projection_for(loading, projection)
+        async with self.read_session() as session:
+            stmt = self.select(projection).where(*self.filters(**filter_by))
+            res = await session.execute(stmt)
+            rows = res.all() if projection else res.scalars().all()
+            return self.read_models(rows, projection)
+
+    def values_select(self, column: str, **filter_by) -> Select:
+        # distinct values of one column as a statement, to filter another repository's rows by
+        return select(getattr(self.model, column)).where(*self.filters(**filter_by)).distinct()
+
+    async def get_values_by(self, column: str, **filter_by) -> list:
+        # distinct values of one column, without building models
+        async with self.read_session() as session:
+            stmt = self.values_select(column, **filter_by)
+            res = await session.execute(stmt)
+            return list(res.scalars().all())
+
+    async def count_by(self, **filter_by) -> int:
+        async with self.read_session() as session:
+            stmt = select(func.count()).select_from(self.model).where(*self.filters(**filter_by))
+            res = await session.execute(stmt)
+            return res.scalar_one()
+
+    async def exists_by(self, **filter_by) -> bool:
+        async with self.read_session() as session:
+            stmt = select(select(self.model.id).where(*self.filters(**filter_by)).exists())
+            res = await session.execute(stmt)
+            return res.scalar_one()
+
+    async def sum_by(self, column: str, **filter_by) -> int:
+        async with self.read_session() as session:
+            stmt = select(func.coalesce(func.sum(getattr(self.model, column)), 0)).where(*self.filters(**filter_by))
+            res = await session.execute(stmt)
+            return res.scalar_one()
+
+    async def lock_by(self, **filter_by) -> list[int]:
+        # locks the matching rows until the transaction ends, e.g. so no row can start referencing them
+        async with self.session() as session:
+            stmt = select(self.model.id).where(*self.filters(**filter_by)).order_by(self.model.id).with_for_update()
+            res = await session.execute(stmt)
+            return list(res.scalars().all())
+
+    def group_by(self, *columns: str, **filter_by) -> AggregateQuery:
+        # without columns the aggregates are computed over every matching row and one row is returned
+        return AggregateQuery(self, columns, filter_by)
+
+    async def get_page(self, limit: int, after: str | None = None, order_by: str = "id",
+                       descending: bool = False, projection: type[BaseModel] | None = None,
+                       loading: str | None = None, **filter_by):
+        # keyset pagination: rows are ordered by (order_by, id) and the cursor holds the last row's key
+        projection = self.projection_for(loading, projection)
+        keys = [self.model.id] if order_by == "id" else [getattr(self.model, order_by), self.model.id]
+        async with self.read_session() as session:
+            stmt = self.select(projection, *keys).where(*self.filters(**filter_by))
+            if after is not None:
+                values = decode_cursor(after, keys)
+                if descending:
+                    stmt = stmt.where(tuple_(*keys) < tuple_(*values))
+                else:
+                    stmt = stmt.where(tuple_(*keys) > tuple_(*values))
+            stmt = stmt.order_by(*[key.desc() if descending else key.asc() for key in keys]).limit(limit + 1)
             res = await session.execute(stmt)
-            return [row.to_read_model() for row in res.scalars().all()]
+            rows = res.all() if projection else res.scalars().all()
+
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor([getattr(rows[-1], key.key) for key in keys])
+            return self.read_models(rows, projection), next_cursor
 
     async def delete_one(self, id: int):
-        async with SessionLocal() as session:
+        async with self.session() as session:
             stmt = delete(self.model).filter_by(id=id)
             res = await session.execute(stmt)
-            await session.commit()
+            await self.commit(session)
             return True
@@ -0,0 +1,100 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db.database import SessionLocal, ReplicaSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class UnitOfWork:
+    """One session and one transaction shared by every repository used inside the block.
+
+    The transaction is committed when the block exits cleanly and rolled back otherwise.
+    The session checks out a connection lazily, so a block that never touches the
+    database never takes a connection from the pool.
+
+    Callbacks registered with on_commit run after a successful commit, for side effects
+    such as cache invalidation that must not be seen before the data is. Callbacks
+    registered with on_rollback run when the transaction is rolled back or its commit
+    fails, to undo side effects taken before the commit.
+
+    When a replica is configured, reads run on a second session bound to it until the
+    first write; after that every read stays on the primary so the request sees its
+    own writes.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker = SessionLocal,
+                 read_session_factory: async_sessionmaker | None = ReplicaSessionLocal):
+        self.session_factory = session_factory
+        self.read_session_factory = read_session_factory
+        self.session: AsyncSession | None = None
+        self.replica_session: AsyncSession | None = None
+        self.has_written = False
+        self._commit_callbacks = []
+        self._rollback_callbacks = []
+        self._token = None
+
+    def on_commit(self, callback):
+        # callback is an argument-less coroutine function
+        self._commit_callbacks.append(callback)
+
+    def on_rollback(self, callback):
+        # callback is an argument-less coroutine function
+        self._rollback_callbacks.append(callback)
+
+    async def _run_rollback_callbacks(self):
+        # an exception is already propagating, a failing callback must not replace it
+        for callback in self._rollback_callbacks:
+            try:
+                await callback()
+            except Exception:
+                logger.exception("rollback callback failed")
+
+    @property
+    def read_session(self) -> AsyncSession:
+        if self.has_written or read_from_primary.get() or self.read_session_factory is None:
+            return self.session
+        if self.replica_session is None:
+            self.replica_session = self.read_session_factory()
+        return self.replica_session
+
+    async def __aenter__(self):
+        self.session = self.session_factory()
+        self._token = current_unit_of_work.set(self)
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                try:
+                    await self.session.commit()
+                except Exception:
+                    await self._run_rollback_callbacks()
+                    raise
+                for callback in self._commit_callbacks:
+                    await callback()
+            else:
+                await self.session.rollback()
+                await self._run_rollback_callbacks()
+        finally:
+            current_unit_of_work.reset(self._token)
+            await self.session.close()
+            if self.replica_session is not None:
+                await self.replica_session.close()
+
+
+current_unit_of_work: ContextVar[UnitOfWork | None] = ContextVar("current_unit_of_work", default=None)
+# set by primary_reads, for reads that must not lag behind a commit on the primary
+read_from_primary: ContextVar[bool] = ContextVar("read_from_primary", default=False)
+
+
+@contextmanager
+def primary_reads():
+    token = read_from_primary.set(True)
+    try:
+        yield
+    finally:
+        read_from_primary.reset(token)
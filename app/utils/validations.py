@@ -83,31 +83,26 @@ class QuizzesDataValidator:
         return True
 
     async def question_delete_check(self, quiz_id: int):
-        questions = await self.questions_repo.get_all_by(quiz_id=quiz_id)
-        if len(questions) < 3:
+        if await self.questions_repo.count_by(quiz_id=quiz_id) < 3:
             raise HTTPException(status_code=400,
                                 detail="after question delete quiz will contain less then two questions")
         return True
 
     async def answer_edit_check(self, question_id: int, is_correct: bool):
-        right_answers = await self.answers_repo.get_all_by(question_id=question_id, is_correct=True)
-        print(len(right_answers))
-        print(is_correct)
-        if len(right_answers) < 2 and not is_correct:
+        right_answers = await self.answers_repo.count_by(question_id=question_id, is_correct=True)
+        if right_answers < 2 and not is_correct:
             raise HTTPException(status_code=400,
                                 detail="after answer update question will not contain right answer")
         return True
 
     async def answer_delete_check(self, question_id: int):
-        answers = await self.answers_repo.get_all_by(question_id=question_id)
-        if len(answers) < 3:
+        if await self.answers_repo.count_by(question_id=question_id) < 3:
             raise HTTPException(status_code=400,
                                 detail="after answers delete question will contain less then two answers")
         return True
 
     async def question_existence_check(self, quiz_id: int, question_id: int):
-        quiz = await self.quizzes_repo.get_one_by(id=quiz_id)
-        if not quiz:
+        if not await self.quizzes_repo.exists_by(id=quiz_id):
             raise HTTPException(status_code=400, detail="quiz with such id does not exists")
         question = await self.questions_repo.get_one_by(quiz_id=quiz_id, id=question_id)
         if not question:
@@ -115,8 +110,7 @@ class QuizzesDataValidator:
         return question
 
     async def answer_existence_check(self, quiz_id: int, question_id: int, answer_id: int):
-        quiz = await self.quizzes_repo.get_one_by(id=quiz_id)
-        if not quiz:
+        if not await self.quizzes_repo.exists_by(id=quiz_id):
             raise HTTPException(status_code=400, detail="quiz with such id does not exists")
         question = await self.questions_repo.get_one_by(id=question_id, quiz_id=quiz_id)
         if not question:
@@ -152,19 +146,28 @@ class ResultsDataValidator:
         return quiz
 
     async def user_exists(self, user_id: int):
-        if not await self.users_repo.get_one_by(id=user_id):
+        if not await self.users_repo.exists_by(id=user_id):
             raise HTTPException(status_code=400, detail="no such user")
         return True
 
     async def member_exist(self, member_id: int, company_id: int):
-        user = await self.users_repo.get_one_by(id=member_id)
-        company = await self.company_repo.get_one_by(id=company_id)
-        if user.id == company.owner_id:
+        if await self.company_repo.exists_by(id=company_id, owner_id=member_id):
             return True
-        member = await self.members_repo.get_one_by(user_id=member_id, company_id=company_id)
-        if not member:
-            return None
-        return member
+        return await self.members_repo.exists_by(user_id=member_id, company_id=company_id)
+
+    async def company_member_ids(self, company_id: int) -> set[int]:
+        # the owner and every member of the company, resolved once for a whole batch of answers
+        member_ids = set(await self.members_repo.get_values_by("user_id", company_id=company_id))
+        member_ids.update(await self.company_repo.get_values_by("owner_id", id=company_id))
+        return member_ids
+
+    async def member_company_ids(self, member_id: int, company_ids: set[int]) -> set[int]:
+        # the companies among company_ids that the user owns or is a member of
+        if not company_ids:
+            return set()
+        found = set(await self.members_repo.get_values_by("company_id", user_id=member_id, company_id=company_ids))
+        found.update(await self.company_repo.get_values_by("id", owner_id=member_id, id=company_ids))
+        return found
 
     async def has_created_quizzes(self, quizzes: list[Quiz]):
         if not quizzes:
@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import logging
+import os
+import socket
+
+from redis import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+from sqlalchemy.exc import InterfaceError, OperationalError
+
+from app.core.config import redis_settings
+from app.db.database import get_redis_db
+from app.services.dependencies import results_service
+from app.schemas.user_answer import SubmissionSchema
+from app.services.submissions import SubmissionQueue
+from app.utils.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+# failures of the database or Redis connection, the batch is left pending and claimed again
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, RedisConnectionError, RedisTimeoutError, OSError)
+MAX_BACKOFF_SECONDS = 60
+
+
+async def score(submissions: list[SubmissionSchema], redis_client: Redis) -> dict[str, dict]:
+    result_service = results_service()
+    async with UnitOfWork():
+        return await result_service.score_submissions(submissions, redis_client)
+
+
+async def score_one_by_one(submissions: list[SubmissionSchema], redis_client: Redis) -> dict[str, dict]:
+    # after a batch failed, each submission is recorded on its own so one bad submission does not
+    # hold back the others; the ones that still fail are reported failed instead of retried forever
+    statuses = {}
+    for submission in submissions:
+        try:
+            statuses.update(await score([submission], redis_client))
+        except TRANSIENT_ERRORS:
+            raise
+        except Exception:
+            logger.exception("submission %s could not be recorded", submission.attempt_id)
+            statuses[submission.attempt_id] = {"status": "failed", "detail": "the submission could not be recorded"}
+    return statuses
+
+
+async def score_batch(queue: SubmissionQueue, consumer: str) -> int:
+    redis_client = await get_redis_db()
+    entries = await queue.read(redis_client, consumer, redis_settings.submissions_batch_size)
+    if not entries:
+        return 0
+
+    # entries claimed again after their batch was recorded but not acknowledged are only acknowledged
+    statuses = await queue.get_statuses(redis_client, [submission.attempt_id for _, submission in entries])
+    submissions = [submission for (_, submission), status in zip(entries, statuses) if status != "done"]
+    if not submissions:
+        await queue.ack(redis_client, [entry_id for entry_id, _ in entries])
+        return len(entries)
+
+    # a batch failing on a transient error is not acknowledged, a consumer claims it again after the idle timeout
+    try:
+        statuses = await score(submissions, redis_client)
+    except TRANSIENT_ERRORS:
+        raise
+    except Exception:
+        logger.exception("batch of %s submissions failed, retrying them one by one", len(submissions))
+        statuses = await score_one_by_one(submissions, redis_client)
+    await queue.set_statuses(redis_client, statuses)
+    await queue.ack(redis_client, [entry_id for entry_id, _ in entries])
+    return len(entries)
+
+
+async def run(consumer: str):
+    queue = SubmissionQueue()
+    await queue.ensure_group(await get_redis_db())
+    backoff = 0
+    while True:
+        try:
+            await score_batch(queue, consumer)
+            backoff = 0
+        except Exception:
+            backoff = min(max(backoff * 2, 1), MAX_BACKOFF_SECONDS)
+            logger.exception("scoring failed, retrying in %s s", backoff)
+            await asyncio.sleep(backoff)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score quiz submissions queued in the Redis stream")
+    parser.add_argument("--consumer", default=f"{socket.gethostname()}-{os.getpid()}",
+                        help="consumer name in the scoring group, unique per worker process")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run(args.consumer))
@@ -0,0 +1,26 @@
+"""fourteenth commit
+
+Revision ID: 1f8e3b7a5c60
+Revises: 6d2a8f4c1e09
+Create Date: 2026-10-18 23:12:05.871346
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1f8e3b7a5c60'
+down_revision: Union[str, None] = '6d2a8f4c1e09'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('Quiz', sa.Column('activity_batch', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('Quiz', 'activity_batch')
@@ -0,0 +1,58 @@
+"""tenth commit
+
+Revision ID: 2d8f6a1c4e73
+Revises: 9a7c3e5b1f48
+Create Date: 2026-10-18 18:05:41.118274
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d8f6a1c4e73'
+down_revision: Union[str, None] = '9a7c3e5b1f48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('UserCompanyStats',
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.Column('company_id', sa.Integer(), nullable=False),
+                    sa.Column('right_sum', sa.Integer(), server_default='0', nullable=False),
+                    sa.Column('total_sum', sa.Integer(), server_default='0', nullable=False),
+                    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+                    sa.Column('last_attempt_at', sa.TIMESTAMP(timezone=True), nullable=True),
+                    sa.ForeignKeyConstraint(['company_id'], ['Company.id'], ondelete='CASCADE'),
+                    sa.ForeignKeyConstraint(['user_id'], ['User.id'], ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('user_id', 'company_id')
+                    )
+    op.create_table('UserStats',
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.Column('right_sum', sa.Integer(), server_default='0', nullable=False),
+                    sa.Column('total_sum', sa.Integer(), server_default='0', nullable=False),
+                    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+                    sa.Column('last_attempt_at', sa.TIMESTAMP(timezone=True), nullable=True),
+                    sa.ForeignKeyConstraint(['user_id'], ['User.id'], ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('user_id')
+                    )
+
+    # backfill from the existing results and attempts
+    op.execute('INSERT INTO "UserCompanyStats" (user_id, company_id, right_sum, total_sum, attempts, last_attempt_at) '
+               'SELECT r.user_id, r.company_id, r.right_sum, r.total_sum, coalesce(a.attempts, 0), a.last_attempt_at '
+               'FROM (SELECT user_id, company_id, sum(result_right_count) AS right_sum, '
+               'sum(result_total_count) AS total_sum FROM "Result" GROUP BY user_id, company_id) r '
+               'LEFT JOIN (SELECT user_id, company_id, count(*) AS attempts, max(created_at) AS last_attempt_at '
+               'FROM "QuizAttempt" GROUP BY user_id, company_id) a '
+               'ON a.user_id = r.user_id AND a.company_id = r.company_id')
+    op.execute('INSERT INTO "UserStats" (user_id, right_sum, total_sum, attempts, last_attempt_at) '
+               'SELECT user_id, sum(right_sum), sum(total_sum), sum(attempts), max(last_attempt_at) '
+               'FROM "UserCompanyStats" GROUP BY user_id')
+
+
+def downgrade() -> None:
+    op.drop_table('UserStats')
+    op.drop_table('UserCompanyStats')
@@ -0,0 +1,91 @@
+"""fifth commit
+
+Revision ID: 3f1c7a9d2b64
+Revises: a796ef211e59
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c7a9d2b64'
+down_revision: Union[str, None] = 'a796ef211e59'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    # duplicated emails cannot be merged automatically, the upgrade stops before changing anything
+    duplicates = conn.execute(sa.text(
+        'SELECT user_email, string_agg(id::text, \', \' ORDER BY id) FROM "User" '
+        'GROUP BY user_email HAVING count(*) > 1 ORDER BY user_email'
+    )).all()
+    if duplicates:
+        conflicts = "; ".join(f"{email}: users {ids}" for email, ids in duplicates)
+        raise RuntimeError(f"cannot create the unique index on User.user_email, resolve the duplicates first: "
+                           f"{conflicts}")
+
+    # duplicated memberships would block the unique index below: the membership with the lowest id
+    # is kept, the others are moved to "Member_removed_duplicates" so they can be reviewed or restored
+    op.execute('CREATE TABLE IF NOT EXISTS "Member_removed_duplicates" '
+               '(LIKE "Member", removed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now())')
+    removed = conn.execute(sa.text(
+        'WITH removed AS (DELETE FROM "Member" m USING "Member" d '
+        'WHERE m.user_id = d.user_id AND m.company_id = d.company_id AND m.id > d.id '
+        'RETURNING m.id, m.user_id, m.role, m.company_id) '
+        'INSERT INTO "Member_removed_duplicates" (id, user_id, role, company_id) '
+        'SELECT id, user_id, role, company_id FROM removed RETURNING id, user_id, company_id'
+    )).all()
+    for member_id, user_id, company_id in removed:
+        logger.warning("removed duplicate membership %s of user %s in company %s", member_id, user_id, company_id)
+
+    op.create_index('ix_User_user_email', 'User', ['user_email'], unique=True)
+    op.create_index('ix_Company_owner_id', 'Company', ['owner_id'], unique=False)
+    op.create_index('ix_Company_company_name', 'Company', ['company_name'], unique=False)
+    op.create_index('ix_Invitation_user_id_company_id_is_accepted', 'Invitation',
+                    ['user_id', 'company_id', 'is_accepted'], unique=False)
+    op.create_index('ix_Invitation_company_id_is_accepted', 'Invitation', ['company_id', 'is_accepted'], unique=False)
+    op.create_index('ix_Request_sender_id_company_id_is_accepted', 'Request',
+                    ['sender_id', 'company_id', 'is_accepted'], unique=False)
+    op.create_index('ix_Request_company_id_is_accepted', 'Request', ['company_id', 'is_accepted'], unique=False)
+    op.create_index('ix_Member_user_id_company_id', 'Member', ['user_id', 'company_id'], unique=True)
+    op.create_index('ix_Member_company_id_role', 'Member', ['company_id', 'role'], unique=False)
+    op.create_index('ix_Quiz_company_id_quiz_name', 'Quiz', ['company_id', 'quiz_name'], unique=False)
+    op.create_index('ix_Quiz_created_by', 'Quiz', ['created_by'], unique=False)
+    op.create_index('ix_Question_quiz_id_question_text', 'Question', ['quiz_id', 'question_text'], unique=False)
+    op.create_index('ix_Answer_question_id_answer_data', 'Answer', ['question_id', 'answer_data'], unique=False)
+    op.create_index('ix_Result_user_id_company_id_quiz_id', 'Result', ['user_id', 'company_id', 'quiz_id'],
+                    unique=False)
+    op.create_index('ix_Result_company_id_user_id', 'Result', ['company_id', 'user_id'], unique=False)
+    op.create_index('ix_Result_quiz_id', 'Result', ['quiz_id'], unique=False)
+    op.create_index('ix_Notification_receiver_id_status_created_at', 'Notification',
+                    ['receiver_id', 'status', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_Notification_receiver_id_status_created_at', table_name='Notification')
+    op.drop_index('ix_Result_quiz_id', table_name='Result')
+    op.drop_index('ix_Result_company_id_user_id', table_name='Result')
+    op.drop_index('ix_Result_user_id_company_id_quiz_id', table_name='Result')
+    op.drop_index('ix_Answer_question_id_answer_data', table_name='Answer')
+    op.drop_index('ix_Question_quiz_id_question_text', table_name='Question')
+    op.drop_index('ix_Quiz_created_by', table_name='Quiz')
+    op.drop_index('ix_Quiz_company_id_quiz_name', table_name='Quiz')
+    op.drop_index('ix_Member_company_id_role', table_name='Member')
+    op.drop_index('ix_Member_user_id_company_id', table_name='Member')
+    op.drop_index('ix_Request_company_id_is_accepted', table_name='Request')
+    op.drop_index('ix_Request_sender_id_company_id_is_accepted', table_name='Request')
+    op.drop_index('ix_Invitation_company_id_is_accepted', table_name='Invitation')
+    op.drop_index('ix_Invitation_user_id_company_id_is_accepted', table_name='Invitation')
+    op.drop_index('ix_Company_company_name', table_name='Company')
+    op.drop_index('ix_Company_owner_id', table_name='Company')
+    op.drop_index('ix_User_user_email', table_name='User')
@@ -0,0 +1,70 @@
+"""eighth commit
+
+Revision ID: 5e1f0b8c3d92
+Revises: c4d9a2e7f815
+Create Date: 2026-10-18 15:02:31.870412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1f0b8c3d92'
+down_revision: Union[str, None] = 'c4d9a2e7f815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('QuizAttempt',
+                    sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+                    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'),
+                              nullable=False),
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.Column('company_id', sa.Integer(), nullable=False),
+                    sa.Column('quiz_id', sa.Integer(), nullable=False),
+                    sa.Column('result_right_count', sa.Integer(), nullable=False),
+                    sa.Column('result_total_count', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(['company_id'], ['Company.id'], ondelete='CASCADE'),
+                    sa.ForeignKeyConstraint(['quiz_id'], ['Quiz.id'], ondelete='CASCADE'),
+                    sa.ForeignKeyConstraint(['user_id'], ['User.id'], ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('id', 'created_at'),
+                    postgresql_partition_by='RANGE (created_at)'
+                    )
+    op.create_index('ix_QuizAttempt_company_id_user_id_created_at', 'QuizAttempt',
+                    ['company_id', 'user_id', 'created_at'], unique=False)
+    op.create_index('ix_QuizAttempt_user_id_created_at', 'QuizAttempt', ['user_id', 'created_at'], unique=False)
+
+    # monthly partitions from the oldest stored result up to three months ahead,
+    # then the stored results become the first attempts. Months are cut in UTC, like the
+    # partitions QuizAttemptsRepository.ensure_partitions creates later, whatever the
+    # database time zone is
+    op.execute("SET LOCAL TIME ZONE 'UTC'")
+    op.execute('''
+        DO $$
+        DECLARE
+            month timestamptz := date_trunc('month', COALESCE((SELECT min(created_at) FROM "Result"), now()));
+        BEGIN
+            WHILE month < date_trunc('month', now()) + interval '4 months' LOOP
+                EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF "QuizAttempt" FOR VALUES FROM (%L) TO (%L)',
+                               'QuizAttempt_' || to_char(month, 'YYYY_MM'), month, month + interval '1 month');
+                month := month + interval '1 month';
+            END LOOP;
+        END $$
+    ''')
+    op.execute('INSERT INTO "QuizAttempt" (created_at, user_id, company_id, quiz_id, result_right_count, '
+               'result_total_count) '
+               'SELECT COALESCE(created_at, now()), user_id, company_id, quiz_id, result_right_count, '
+               'result_total_count FROM "Result" '
+               'WHERE user_id IS NOT NULL AND company_id IS NOT NULL AND quiz_id IS NOT NULL')
+    op.execute("RESET TIME ZONE")
+
+
+def downgrade() -> None:
+    # dropping the parent drops its attached partitions too
+    op.drop_index('ix_QuizAttempt_user_id_created_at', table_name='QuizAttempt')
+    op.drop_index('ix_QuizAttempt_company_id_user_id_created_at', table_name='QuizAttempt')
+    op.drop_table('QuizAttempt')
@@ -0,0 +1,31 @@
+"""thirteenth commit
+
+Revision ID: 6d2a8f4c1e09
+Revises: 4b7e1d9c3a25
+Create Date: 2026-10-18 22:37:14.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6d2a8f4c1e09'
+down_revision: Union[str, None] = '4b7e1d9c3a25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # a unique index on a partitioned table has to include the partition key, a queued submission
+    # carries its own created_at so a retried one conflicts with the row it already wrote
+    op.add_column('QuizAttempt', sa.Column('attempt_id', sa.String(), nullable=True))
+    op.create_index('uq_QuizAttempt_attempt_id_created_at', 'QuizAttempt', ['attempt_id', 'created_at'],
+                    unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_QuizAttempt_attempt_id_created_at', table_name='QuizAttempt')
+    op.drop_column('QuizAttempt', 'attempt_id')
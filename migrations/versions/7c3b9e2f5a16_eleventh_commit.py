@@ -0,0 +1,28 @@
+"""eleventh commit
+
+Revision ID: 7c3b9e2f5a16
+Revises: 2d8f6a1c4e73
+Create Date: 2026-10-18 19:12:27.530614
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3b9e2f5a16'
+down_revision: Union[str, None] = '2d8f6a1c4e73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_QuizAttempt_company_id_created_at', 'QuizAttempt', ['company_id', 'created_at'], unique=False)
+    op.create_index('ix_QuizAttempt_quiz_id_created_at', 'QuizAttempt', ['quiz_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_QuizAttempt_quiz_id_created_at', table_name='QuizAttempt')
+    op.drop_index('ix_QuizAttempt_company_id_created_at', table_name='QuizAttempt')
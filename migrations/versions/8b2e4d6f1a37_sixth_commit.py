@@ -0,0 +1,26 @@
+"""sixth commit
+
+Revision ID: 8b2e4d6f1a37
+Revises: 3f1c7a9d2b64
+Create Date: 2026-10-18 12:40:07.552913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d6f1a37'
+down_revision: Union[str, None] = '3f1c7a9d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_Question_company_id', 'Question', ['company_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_Question_company_id', table_name='Question')
@@ -0,0 +1,36 @@
+"""fifteenth commit
+
+Revision ID: 8e4c2a6f9b17
+Revises: 1f8e3b7a5c60
+Create Date: 2026-10-18 23:48:31.402716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e4c2a6f9b17'
+down_revision: Union[str, None] = '1f8e3b7a5c60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('Company', sa.Column('question_count', sa.Integer(), server_default='0', nullable=False))
+    op.create_table('QuestionStats',
+                    sa.Column('id', sa.Integer(), nullable=False),
+                    sa.Column('question_count', sa.Integer(), server_default='0', nullable=False),
+                    sa.PrimaryKeyConstraint('id'))
+    # the counts start from the questions there are, the quiz service keeps them up to date from here on
+    op.execute('UPDATE "Company" c SET question_count = q.questions '
+               'FROM (SELECT company_id, count(*) AS questions FROM "Question" GROUP BY company_id) q '
+               'WHERE q.company_id = c.id')
+    op.execute('INSERT INTO "QuestionStats" (id, question_count) SELECT 1, count(*) FROM "Question"')
+
+
+def downgrade() -> None:
+    op.drop_table('QuestionStats')
+    op.drop_column('Company', 'question_count')
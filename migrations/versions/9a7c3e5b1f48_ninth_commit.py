@@ -0,0 +1,30 @@
+"""ninth commit
+
+Revision ID: 9a7c3e5b1f48
+Revises: 5e1f0b8c3d92
+Create Date: 2026-10-18 16:37:12.402958
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a7c3e5b1f48'
+down_revision: Union[str, None] = '5e1f0b8c3d92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('Quiz', sa.Column('passes_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute('UPDATE "Quiz" q SET passes_count = a.passes, '
+               'last_passed_at = GREATEST(q.last_passed_at, a.last_passed_at) '
+               'FROM (SELECT quiz_id, count(*) AS passes, max(created_at) AS last_passed_at '
+               'FROM "QuizAttempt" GROUP BY quiz_id) a WHERE a.quiz_id = q.id')
+
+
+def downgrade() -> None:
+    op.drop_column('Quiz', 'passes_count')
@@ -0,0 +1,35 @@
+"""seventh commit
+
+Revision ID: c4d9a2e7f815
+Revises: 8b2e4d6f1a37
+Create Date: 2026-10-18 13:21:55.104736
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d9a2e7f815'
+down_revision: Union[str, None] = '8b2e4d6f1a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # keep the latest result of each user for a quiz, older duplicates would block the constraint
+    op.execute('DELETE FROM "Result" r USING "Result" d '
+               'WHERE r.user_id = d.user_id AND r.company_id = d.company_id AND r.quiz_id = d.quiz_id '
+               'AND r.id < d.id')
+
+    op.drop_index('ix_Result_user_id_company_id_quiz_id', table_name='Result')
+    op.create_unique_constraint('uq_Result_user_id_company_id_quiz_id', 'Result',
+                                ['user_id', 'company_id', 'quiz_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_Result_user_id_company_id_quiz_id', 'Result', type_='unique')
+    op.create_index('ix_Result_user_id_company_id_quiz_id', 'Result', ['user_id', 'company_id', 'quiz_id'],
+                    unique=False)
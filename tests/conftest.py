@@ -1,9 +1,13 @@
+import fakeredis
 import pytest
 
 from typing import Generator
 from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
 
 from app.main import app
+from app.utils.unit_of_work import UnitOfWork
+from tests.fakes import FakeSession, session_factory
 
 
 @pytest.fixture
@@ -11,4 +15,20 @@ def test_client() -> Generator:
     yield TestClient(app)
 
 
+@pytest.fixture
+def redis_client():
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
 
+@pytest.fixture
+def in_unit_of_work():
+    # runs a coroutine function in a unit of work over a FakeSession whose commit fails when
+    # fail_commit is set; returns whether the unit of work committed
+    async def run(body, fail_commit: bool = False) -> bool:
+        try:
+            async with UnitOfWork(session_factory(FakeSession(fail_commit=fail_commit)), read_session_factory=None):
+                await body()
+        except OperationalError:
+            return False
+        return True
+    return run
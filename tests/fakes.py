@@ -0,0 +1,67 @@
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import NoResultFound, OperationalError
+
+
+class FakeResult:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+
+    def all(self):
+        return self.rows
+
+    def scalars(self):
+        return FakeResult([row[0] if isinstance(row, tuple) else row for row in self.rows])
+
+    def scalar_one(self):
+        rows = self.scalars().rows
+        if not rows:
+            raise NoResultFound("No row was found when one was required")
+        return rows[0]
+
+    def one(self):
+        return self.rows[0]
+
+
+class FakeRow:
+    # a result row read by attribute or through _mapping
+    def __init__(self, **values):
+        self._mapping = values
+        self.__dict__.update(values)
+
+
+class FakeSession:
+    """Stands in for an AsyncSession: records statements and the unit of work calls.
+
+    execute returns the queued results in order, an empty result once they run out.
+    """
+
+    def __init__(self, results=(), fail_commit: bool = False):
+        self.results = list(results)
+        self.fail_commit = fail_commit
+        self.calls = []
+        self.statements = []
+
+    async def execute(self, statement, parameters=None):
+        self.statements.append((statement, parameters))
+        return self.results.pop(0) if self.results else FakeResult()
+
+    def sql(self, index: int) -> str:
+        return str(self.statements[index][0].compile(dialect=postgresql.dialect()))
+
+    def expire_all(self):
+        pass
+
+    async def commit(self):
+        self.calls.append("commit")
+        if self.fail_commit:
+            raise OperationalError("COMMIT", {}, Exception("connection lost"))
+
+    async def rollback(self):
+        self.calls.append("rollback")
+
+    async def close(self):
+        self.calls.append("close")
+
+
+def session_factory(session: FakeSession):
+    return lambda: session
@@ -0,0 +1,34 @@
+import asyncio
+
+from app.services.analytics_cache import AnalyticsCache
+from app.utils.unit_of_work import read_from_primary
+
+
+def test_entries_are_replaced_once_a_tag_is_invalidated(redis_client, in_unit_of_work):
+    cache = AnalyticsCache()
+    key = cache.key("trend", 1, 2)
+    tags = [cache.user_tag(1), cache.company_tag(2)]
+    computed = []
+
+    async def compute():
+        computed.append(read_from_primary.get())
+        return [len(computed)]
+
+    async def scenario():
+        values = [await cache.get_or_compute(redis_client, key, tags, list[int], compute),
+                  await cache.get_or_compute(redis_client, key, tags, list[int], compute)]
+
+        async def invalidate():
+            await cache.invalidate(redis_client, cache.company_tag(2))
+            # the version is bumped only once the transaction commits
+            values.append(await cache.get_or_compute(redis_client, key, tags, list[int], compute))
+
+        await in_unit_of_work(invalidate)
+        values.append(await cache.get_or_compute(redis_client, key, tags, list[int], compute))
+        await cache.invalidate(redis_client, cache.company_tag(3))
+        values.append(await cache.get_or_compute(redis_client, key, tags, list[int], compute))
+        return values
+
+    assert asyncio.run(scenario()) == [[1], [1], [1], [2], [2]]
+    # misses are computed on the primary
+    assert computed == [True, True]
@@ -0,0 +1,81 @@
+import asyncio
+import datetime
+
+import pytest
+
+from app.core.config import redis_settings
+from app.schemas.answers import AnswerSchema
+from app.schemas.questions import QuestionSchema
+from app.schemas.quizzes import QuizSchema
+from app.services.answer_keys import AnswerKeyCache
+from app.utils.unit_of_work import read_from_primary
+
+
+def make_quiz(correct: str) -> QuizSchema:
+    answers = [AnswerSchema(id=1, answer_data=correct, is_correct=True, question_id=10, created_by=1, updated_by=1),
+               AnswerSchema(id=2, answer_data="wrong", is_correct=False, question_id=10, created_by=1, updated_by=1)]
+    question = QuestionSchema(id=10, question_text="q", quiz_id=5, company_id=1, created_by=1, updated_by=1,
+                              answers=answers)
+    return QuizSchema(id=5, quiz_name="quiz", quiz_title="t", quiz_description="d", quiz_frequency=1,
+                      created_at=datetime.datetime.now(datetime.timezone.utc), created_by=1, updated_by=1,
+                      company_id=1, last_passed_at=None, passes_count=0, questions=[question])
+
+
+@pytest.fixture(autouse=True)
+def empty_local_cache():
+    AnswerKeyCache._local.clear()
+    yield
+    AnswerKeyCache._local.clear()
+
+
+def test_miss_loads_from_primary_and_hit_skips_the_database(redis_client):
+    cache = AnswerKeyCache()
+    loads = []
+
+    async def load_quiz():
+        loads.append(read_from_primary.get())
+        return make_quiz("right")
+
+    async def scenario():
+        first = await cache.get(redis_client, 5, load_quiz)
+        AnswerKeyCache._local.clear()
+        second = await cache.get(redis_client, 5, load_quiz)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second == {10: {"right"}}
+    assert loads == [True]
+
+
+def test_key_compiled_across_a_version_bump_is_not_cached(redis_client):
+    cache = AnswerKeyCache()
+
+    async def load_quiz_while_edited():
+        # the quiz is edited and its version bumped while the old tree is being compiled
+        await cache.invalidate(redis_client, 5)
+        return make_quiz("old")
+
+    async def load_quiz():
+        return make_quiz("new")
+
+    async def scenario():
+        stale = await cache.get(redis_client, 5, load_quiz_while_edited)
+        cached = await redis_client.get(cache.key(5))
+        fresh = await cache.get(redis_client, 5, load_quiz)
+        return stale, cached, fresh
+
+    stale, cached, fresh = asyncio.run(scenario())
+    assert stale == {10: {"old"}}
+    assert cached is None
+    assert fresh == {10: {"new"}}
+
+
+def test_local_copies_are_capped_least_recently_used_first(redis_client, monkeypatch):
+    monkeypatch.setattr(redis_settings, "answer_keys_local_size", 2)
+    cache = AnswerKeyCache()
+    for quiz_id in (1, 2):
+        cache.remember(quiz_id, 0, {})
+    # reading 1 makes 2 the least recently used one
+    asyncio.run(cache.get(redis_client, 1, None))
+    cache.remember(3, 0, {})
+    assert list(AnswerKeyCache._local) == [1, 3]
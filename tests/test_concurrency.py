@@ -0,0 +1,74 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.db.database import Base
+from app.repositories.results import ResultsRepository
+from app.repositories.stats import UserCompanyStatsRepository
+from app.utils.unit_of_work import UnitOfWork
+
+# needs a disposable PostgreSQL database like tests/test_query_plans.py, the tables are created and dropped here
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+SEED_SQL = [
+    """INSERT INTO "User" (id, user_email, user_firstname, user_lastname, hashed_password, is_superuser)
+       VALUES (1, 'user1@mail.com', 'first', 'last', 'hash', false)""",
+    """INSERT INTO "Company" (id, owner_id, company_name, company_title, company_description, company_city,
+                              company_phone, is_visible)
+       VALUES (1, 1, 'company1', 'title', 'description', 'city', 'phone', true)""",
+    """INSERT INTO "Quiz" (id, quiz_name, quiz_title, quiz_description, quiz_frequency, created_at, created_by,
+                           updated_by, company_id)
+       VALUES (1, 'quiz1', 'title', 'description', 1, now(), 1, 1, 1)""",
+]
+
+
+def test_concurrent_first_submissions_count_once():
+    # the first transaction holds its new result uncommitted while the second submits the same quiz;
+    # the second has to see the first one's counts as the previous ones, or the rollup counts both
+    async def submit(sessions, right: int, first_written: asyncio.Event, first: bool):
+        async with UnitOfWork(sessions, read_session_factory=None):
+            if not first:
+                await first_written.wait()
+            replaced = await ResultsRepository().upsert_with_previous(
+                [{"user_id": 1, "company_id": 1, "quiz_id": 1, "result_right_count": right, "result_total_count": 5}])
+            _, previous_right, previous_total = replaced[(1, 1, 1)]
+            if first:
+                first_written.set()
+                # the second transaction runs into this one's uncommitted row meanwhile
+                await asyncio.sleep(0.5)
+            await UserCompanyStatsRepository().add_deltas([{
+                "user_id": 1, "company_id": 1, "right_sum": right - previous_right,
+                "total_sum": 5 - previous_total, "attempts": 1, "last_attempt_at": None}])
+
+    async def scenario():
+        engine = create_async_engine(TEST_DATABASE_URL)
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+                await conn.run_sync(Base.metadata.create_all)
+                for statement in SEED_SQL:
+                    await conn.execute(text(statement))
+
+            sessions = async_sessionmaker(engine)
+            first_written = asyncio.Event()
+            await asyncio.gather(submit(sessions, 2, first_written, first=True),
+                                 submit(sessions, 4, first_written, first=False))
+
+            async with engine.connect() as conn:
+                res = await conn.execute(text('SELECT right_sum, total_sum FROM "UserCompanyStats"'))
+                stats = res.one()
+                res = await conn.execute(text('SELECT result_right_count, result_total_count FROM "Result"'))
+                result = res.one()
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+            return tuple(stats), tuple(result)
+        finally:
+            await engine.dispose()
+
+    stats, result = asyncio.run(scenario())
+    assert stats == result
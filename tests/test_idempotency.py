@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import redis_settings
+from app.services.idempotency import IdempotencyStore
+
+RESPONSE = {"status_code": 200, "detail": "passed", "result": 7}
+
+
+@pytest.fixture
+def store():
+    return IdempotencyStore()
+
+
+def test_claim_complete_and_replay(redis_client, in_unit_of_work, store):
+    key = store.key("user@example.com", "abc")
+
+    async def scenario():
+        first = await store.claim(redis_client, key, "fp")
+        with pytest.raises(HTTPException) as in_progress:
+            await store.claim(redis_client, key, "fp")
+        await in_unit_of_work(lambda: store.complete(redis_client, key, "fp", RESPONSE))
+        with pytest.raises(HTTPException) as other_request:
+            await store.claim(redis_client, key, "other")
+        return first, in_progress.value.status_code, other_request.value.status_code, \
+            await store.claim(redis_client, key, "fp")
+
+    assert asyncio.run(scenario()) == (None, 409, 422, RESPONSE)
+
+
+def test_failed_commit_releases_the_key(redis_client, in_unit_of_work, store):
+    key = store.key("user@example.com", "abc")
+
+    async def scenario():
+        await store.claim(redis_client, key, "fp")
+        committed = await in_unit_of_work(lambda: store.complete(redis_client, key, "fp", RESPONSE),
+                                          fail_commit=True)
+        # the retry runs the request again
+        return committed, await redis_client.exists(key), await store.claim(redis_client, key, "fp")
+
+    assert asyncio.run(scenario()) == (False, 0, None)
+
+
+def test_pending_claim_expires_after_the_configured_ttl(redis_client, store, monkeypatch):
+    monkeypatch.setattr(redis_settings, "idempotency_pending_ttl", 120)
+    key = store.key("user@example.com", "abc")
+
+    async def scenario():
+        await store.claim(redis_client, key, "fp")
+        return await redis_client.ttl(key)
+
+    assert asyncio.run(scenario()) == 120
@@ -0,0 +1,45 @@
+import asyncio
+
+from app.services.leaderboards import Leaderboards
+
+
+def test_score_packs_accuracy_before_answered_questions():
+    leaderboards = Leaderboards()
+    assert leaderboards.score(3, 4) > leaderboards.score(74, 100) > leaderboards.score(7, 10)
+    # equal accuracy, more answered questions rank higher
+    assert leaderboards.score(6, 8) > leaderboards.score(3, 4)
+    assert leaderboards.score(0, 0) == 0
+
+    entry = leaderboards.entry("5", 0, float(leaderboards.score(3, 4)))
+    assert (entry.user_id, entry.rank, entry.accuracy, entry.answered) == (5, 1, 0.75, 4)
+
+
+def test_top_around_and_rank(redis_client):
+    leaderboards = Leaderboards()
+    key = leaderboards.company_key(1)
+
+    async def scenario():
+        # user i answered i of 10 right; 9 and 10 tie and are listed by descending member string
+        scores = {user_id: (leaderboards.score(min(user_id, 9), 10), 1.0) for user_id in range(1, 11)}
+        await leaderboards.update(redis_client, {key: scores})
+        return (await leaderboards.top(redis_client, key, 3), await leaderboards.around(redis_client, key, 5, 1),
+                await leaderboards.rank(redis_client, key, 1), await leaderboards.rank(redis_client, key, 11))
+
+    top, around, last, missing = asyncio.run(scenario())
+    assert [(entry.user_id, entry.rank) for entry in top] == [(9, 1), (10, 2), (8, 3)]
+    assert [(entry.user_id, entry.rank) for entry in around] == [(6, 5), (5, 6), (4, 7)]
+    assert (last.rank, last.accuracy) == (10, 0.1)
+    assert missing is None
+
+
+def test_older_versions_do_not_overwrite_newer_scores(redis_client):
+    leaderboards = Leaderboards()
+    key = leaderboards.quiz_key(1)
+
+    async def scenario():
+        # the newer commit's write reaches Redis first
+        await leaderboards.update(redis_client, {key: {1: (leaderboards.score(4, 4), 20.5), 2: (7, 20.5)}})
+        await leaderboards.update(redis_client, {key: {1: (leaderboards.score(1, 4), 10.25), 2: (8, 30.0)}})
+        return await redis_client.zscore(key, 1), await redis_client.zscore(key, 2)
+
+    assert asyncio.run(scenario()) == (leaderboards.score(4, 4), 8)
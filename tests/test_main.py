@@ -1,4 +1,9 @@
+import asyncio
+
 from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+from app import main
 
 
 def test_health(test_client: TestClient):
@@ -6,3 +11,23 @@ def test_health(test_client: TestClient):
     assert response.status_code == 200
 
 
+def test_pool_status_requires_authentication(test_client: TestClient):
+    response = test_client.get("/postgresql/pool")
+    assert response.status_code in (401, 403)
+
+
+def test_redis_metrics_require_authentication(test_client: TestClient):
+    response = test_client.get("/redis/metrics")
+    assert response.status_code in (401, 403)
+
+
+def test_startup_survives_partition_maintenance_failure(monkeypatch):
+    started = []
+
+    async def unavailable():
+        raise OperationalError("CREATE TABLE", {}, ConnectionRefusedError())
+
+    monkeypatch.setattr(main, "maintain_attempt_partitions", unavailable)
+    monkeypatch.setattr(main.scheduler, "start", lambda: started.append(True))
+    asyncio.run(main.start_scheduler())
+    assert started == [True]
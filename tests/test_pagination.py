@@ -0,0 +1,35 @@
+import base64
+import datetime
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.models.model import Notification, User
+from app.utils.pagination import encode_cursor, decode_cursor
+
+
+def raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def test_cursor_round_trip():
+    created_at = datetime.datetime(2026, 10, 18, 12, 30, tzinfo=datetime.timezone.utc)
+    cursor = encode_cursor([created_at, 42])
+    assert decode_cursor(cursor, [Notification.created_at, Notification.id]) == [created_at, 42]
+
+
+@pytest.mark.parametrize("cursor", ["not base64 at all!", base64.urlsafe_b64encode(b"not json").decode(),
+                                    raw_cursor([1, 2]), raw_cursor(7)])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(cursor, [User.id])
+    assert e.value.status_code == 400
+
+
+@pytest.mark.parametrize("values, columns", [(["abc"], [User.id]), ([True], [User.id]), ([1.5], [User.id]),
+                                             ([5, 1], [Notification.created_at, Notification.id])])
+def test_cursor_of_wrong_types_is_rejected(values, columns):
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(raw_cursor(values), columns)
+    assert e.value.status_code == 400
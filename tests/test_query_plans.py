@@ -0,0 +1,191 @@
+import asyncio
+import datetime
+import json
+import os
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.db.database import Base
+from app.repositories.answers import AnswersRepository
+from app.repositories.attempts import QuizAttemptsRepository
+from app.repositories.companies import CompaniesRepository
+from app.repositories.invitations import InvitationsRepository
+from app.repositories.members import MembersRepository
+from app.repositories.notifications import NotificationsRepository
+from app.repositories.questions import QuestionsRepository
+from app.repositories.quizes import QuizzesRepository
+from app.repositories.requests import RequestsRepository
+from app.repositories.results import ResultsRepository
+from app.repositories.stats import UserCompanyStatsRepository, UserStatsRepository
+from app.repositories.users import UsersRepository
+from app.schemas.members import MemberListResponse
+from app.schemas.notifications import NotificationDetailSchema
+from app.utils.repository import Range
+from app.utils.unit_of_work import UnitOfWork
+
+# EXPLAIN checks need a disposable PostgreSQL database, the tables are created and dropped by this module
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+SEED_SQL = [
+    """INSERT INTO "User" (id, user_email, user_firstname, user_lastname, hashed_password, is_superuser)
+       SELECT i, 'user' || i || '@mail.com', 'first', 'last', 'hash', false FROM generate_series(1, 50000) i""",
+    """INSERT INTO "Company" (id, owner_id, company_name, company_title, company_description, company_city,
+                              company_phone, is_visible)
+       SELECT i, i, 'company' || i, 'title', 'description', 'city', 'phone', true FROM generate_series(1, 2000) i""",
+    """INSERT INTO "Member" (user_id, role, company_id)
+       SELECT i, CASE WHEN i % 10 = 0 THEN 'admin' ELSE 'member' END, i % 2000 + 1
+       FROM generate_series(1, 50000) i""",
+    """INSERT INTO "Invitation" (sender_id, user_id, company_id)
+       SELECT i % 2000 + 1, i, i % 2000 + 1 FROM generate_series(1, 50000) i""",
+    """INSERT INTO "Request" (sender_id, company_id)
+       SELECT i, i % 2000 + 1 FROM generate_series(1, 50000) i""",
+    """INSERT INTO "Quiz" (id, quiz_name, quiz_title, quiz_description, quiz_frequency, created_at, created_by,
+                           updated_by, company_id)
+       SELECT i, 'quiz' || i, 'title', 'description', 1, now(), i % 2000 + 1, i % 2000 + 1, i % 2000 + 1
+       FROM generate_series(1, 20000) i""",
+    """INSERT INTO "Question" (id, question_text, quiz_id, company_id, created_by, updated_by)
+       SELECT i, 'question' || i, i % 20000 + 1, 1, 1, 1 FROM generate_series(1, 100000) i""",
+    """UPDATE "Company" c SET question_count = q.questions
+       FROM (SELECT company_id, count(*) AS questions FROM "Question" GROUP BY company_id) q
+       WHERE q.company_id = c.id""",
+    'INSERT INTO "QuestionStats" (id, question_count) SELECT 1, count(*) FROM "Question"',
+    """INSERT INTO "Answer" (answer_data, is_correct, question_id, created_by, updated_by)
+       SELECT 'answer' || i % 4, i % 4 = 0, i % 100000 + 1, 1, 1 FROM generate_series(1, 400000) i""",
+    """INSERT INTO "Result" (user_id, company_id, quiz_id, created_at, result_right_count, result_total_count)
+       SELECT i % 50000 + 1, i % 2000 + 1, i % 20000 + 1, now(), 3, 5 FROM generate_series(1, 100000) i""",
+    """INSERT INTO "Notification" (receiver_id, status, created_at, notification_data)
+       SELECT i % 50000 + 1, 'Sent', now() - i * interval '1 minute', 'data' FROM generate_series(1, 100000) i""",
+    """CREATE TABLE "QuizAttempt_old" PARTITION OF "QuizAttempt"
+       FOR VALUES FROM (MINVALUE) TO (date_trunc('month', now()))""",
+    """CREATE TABLE "QuizAttempt_current" PARTITION OF "QuizAttempt"
+       FOR VALUES FROM (date_trunc('month', now())) TO (MAXVALUE)""",
+    """INSERT INTO "QuizAttempt" (created_at, user_id, company_id, quiz_id, result_right_count, result_total_count)
+       SELECT now() - i * interval '1 minute', i % 50000 + 1, i % 2000 + 1, i % 20000 + 1, 3, 5
+       FROM generate_series(1, 100000) i""",
+    """INSERT INTO "UserCompanyStats" (user_id, company_id, right_sum, total_sum, attempts)
+       SELECT user_id, company_id, sum(result_right_count), sum(result_total_count), count(*)
+       FROM "Result" GROUP BY user_id, company_id""",
+    """INSERT INTO "UserStats" (user_id, right_sum, total_sum, attempts)
+       SELECT user_id, sum(right_sum), sum(total_sum), sum(attempts) FROM "UserCompanyStats" GROUP BY user_id""",
+]
+
+QUERY_SHAPES = {
+    "user by email": lambda: UsersRepository().get_one_by(user_email="user77@mail.com"),
+    "company by name": lambda: CompaniesRepository().get_one_by(company_name="company77"),
+    "member of company": lambda: MembersRepository().get_one_by(user_id=77, company_id=78),
+    "company members page": lambda: MembersRepository().get_page(20, projection=MemberListResponse,
+                                                                 company_id=77, role="member"),
+    "pending invitation": lambda: InvitationsRepository().get_one_by(user_id=77, company_id=78, is_accepted=None),
+    "company invitations page": lambda: InvitationsRepository().get_page(20, company_id=77, is_accepted=None),
+    "pending request": lambda: RequestsRepository().get_one_by(sender_id=77, company_id=78, is_accepted=None),
+    "company requests page": lambda: RequestsRepository().get_page(20, company_id=77, is_accepted=None),
+    "company quizzes": lambda: QuizzesRepository().get_all_by(company_id=77),
+    "company quizzes with counts": lambda: QuizzesRepository().get_all_by(loading="counts", company_id=77),
+    "quiz by name": lambda: QuizzesRepository().get_all_by(company_id=77, quiz_name="quiz76"),
+    "quiz questions": lambda: QuestionsRepository().get_all_by(quiz_id=77),
+    "answer lookup": lambda: AnswersRepository().get_one_by(question_id=77, answer_data="answer1"),
+    "user quiz result": lambda: ResultsRepository().get_one_by(user_id=77, company_id=78, quiz_id=77),
+    "member results": lambda: ResultsRepository().get_all_by(company_id=77, user_id=76),
+    "company questions count": lambda: QuestionsRepository().count_by(company_id=77),
+    "passed quiz questions count": lambda: QuestionsRepository().count_by(quiz_id=[76, 77, 78]),
+    "user results totals": lambda: ResultsRepository().group_by(user_id=77, company_id=78).agg(
+        right=("sum", "result_right_count"), total=("sum", "result_total_count")),
+    "user results by quiz": lambda: ResultsRepository().group_by("quiz_id", user_id=77).agg(
+        right=("sum", "result_right_count"), total=("sum", "result_total_count")),
+    "company questions in scope": lambda: QuestionsRepository().count_in_scope(77),
+    "questions in scope": lambda: QuestionsRepository().count_in_scope(),
+    "user average in company rollup": lambda: UserCompanyStatsRepository().get_one_by(user_id=77, company_id=78),
+    "user average rollup": lambda: UserStatsRepository().get_one_by(user_id=77),
+    "members averages page": lambda: ResultsRepository().get_members_averages_page(78, 20, company_id=78),
+    "members passing dates": lambda: QuizAttemptsRepository().group_by(
+        "user_id", company_id=77, user_id=MembersRepository().values_select("user_id", company_id=77),
+        created_at=Range(datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=7))).agg(
+        last_passed_at=("max", "created_at")),
+    "user quiz dates": lambda: QuizAttemptsRepository().group_by("quiz_id", user_id=77).agg(
+        last_passed_at=("max", "created_at")),
+    "company weekly trend": lambda: QuizAttemptsRepository().trend(
+        "week", company_id=77, created_at=Range(datetime.datetime.now(datetime.timezone.utc)
+                                                - datetime.timedelta(weeks=12))),
+    "quiz daily trend": lambda: QuizAttemptsRepository().trend(
+        "day", quiz_id=77, created_at=Range(datetime.datetime.now(datetime.timezone.utc)
+                                            - datetime.timedelta(days=30))),
+    "notifications inbox": lambda: NotificationsRepository().get_page(20, order_by="created_at", descending=True,
+                                                                      projection=NotificationDetailSchema,
+                                                                      receiver_id=77, status="Sent"),
+}
+
+
+def run(coro_factory):
+    async def wrapper():
+        engine = create_async_engine(TEST_DATABASE_URL)
+        try:
+            return await coro_factory(engine)
+        finally:
+            await engine.dispose()
+    return asyncio.run(wrapper())
+
+
+@pytest.fixture(scope="module", autouse=True)
+def seeded_database():
+    async def setup(engine):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            for statement in SEED_SQL:
+                await conn.execute(text(statement))
+            await conn.execute(text("ANALYZE"))
+
+    async def teardown(engine):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+
+    run(setup)
+    yield
+    run(teardown)
+
+
+# reading the only row of a one-row table is cheapest without the index
+SINGLE_ROW_TABLES = {"QuestionStats"}
+
+
+def seq_scans(plan: dict) -> list[str]:
+    scans = []
+    if plan.get("Node Type") == "Seq Scan" and plan["Relation Name"] not in SINGLE_ROW_TABLES:
+        scans.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        scans += seq_scans(child)
+    return scans
+
+
+@pytest.mark.parametrize("shape", QUERY_SHAPES)
+def test_query_shape_uses_indexes(shape):
+    async def explain(engine):
+        statements = []
+        # connect once first so the dialect's initialization queries are not captured
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        async with UnitOfWork(async_sessionmaker(engine), read_session_factory=None):
+            await QUERY_SHAPES[shape]()
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+        plans = []
+        async with engine.connect() as conn:
+            for statement, parameters in statements:
+                res = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                plan = res.scalar_one()
+                plans.append(json.loads(plan) if isinstance(plan, str) else plan)
+        return plans
+
+    plans = run(explain)
+    assert plans
+    for plan in plans:
+        assert seq_scans(plan[0]["Plan"]) == []
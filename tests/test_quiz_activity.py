@@ -0,0 +1,59 @@
+import asyncio
+import datetime
+
+import pytest
+
+from app.services.quiz_activity import QuizActivity
+
+
+@pytest.mark.parametrize("fail_commit", [False, True])
+def test_passes_are_counted_only_once_committed(redis_client, in_unit_of_work, fail_commit):
+    activity = QuizActivity()
+    passed_at = datetime.datetime(2026, 10, 1, tzinfo=datetime.timezone.utc)
+
+    async def record():
+        await activity.record(redis_client, {5: 2}, passed_at)
+        # nothing is visible before the commit
+        assert await redis_client.hgetall(activity.passes_key) == {}
+
+    async def scenario():
+        await in_unit_of_work(record, fail_commit=fail_commit)
+        return await redis_client.hgetall(activity.passes_key), await redis_client.zrange(
+            activity.last_passed_key, 0, -1, withscores=True)
+
+    passes, last_passed = asyncio.run(scenario())
+    if fail_commit:
+        assert (passes, last_passed) == ({}, [])
+    else:
+        assert (passes, last_passed) == ({"5": "2"}, [("5", passed_at.timestamp())])
+
+
+class FakeQuizzesRepository:
+    def __init__(self):
+        self.batches = []
+
+    async def record_activity(self, rows, batch):
+        self.batches.append((sorted(row["quiz_id"] for row in rows), batch))
+
+
+def test_failed_flush_frees_the_lock_and_is_retried_as_the_same_batch(redis_client, in_unit_of_work):
+    activity = QuizActivity()
+    quizzes_repo = FakeQuizzesRepository()
+    passed_at = datetime.datetime(2026, 10, 1, tzinfo=datetime.timezone.utc)
+
+    async def scenario():
+        await activity.record(redis_client, {5: 1, 6: 1}, passed_at)
+        committed = await in_unit_of_work(lambda: activity.flush(redis_client, quizzes_repo), fail_commit=True)
+        locked = await redis_client.exists(activity.flush_lock_key)
+        # passes recorded after the failed flush wait for the next batch
+        await activity.record(redis_client, {7: 1}, passed_at)
+        await in_unit_of_work(lambda: activity.flush(redis_client, quizzes_repo))
+        await in_unit_of_work(lambda: activity.flush(redis_client, quizzes_repo))
+        return committed, locked
+
+    assert asyncio.run(scenario()) == (False, 0)
+    (first, first_batch), (retried, retried_batch), (next_one, next_batch) = quizzes_repo.batches
+    assert first == retried == [5, 6]
+    assert first_batch == retried_batch
+    assert next_one == [7]
+    assert next_batch != first_batch
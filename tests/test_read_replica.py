@@ -0,0 +1,53 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.db.database import Base
+from app.repositories.users import UsersRepository
+from app.utils.unit_of_work import UnitOfWork
+
+# two independent PostgreSQL databases stand in for the primary and the replica,
+# so each read can be traced to the database that served it
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+TEST_REPLICA_DATABASE_URL = os.environ.get("TEST_REPLICA_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not (TEST_DATABASE_URL and TEST_REPLICA_DATABASE_URL),
+                                reason="TEST_DATABASE_URL and TEST_REPLICA_DATABASE_URL are not set")
+
+USER_SQL = """INSERT INTO "User" (user_email, user_firstname, user_lastname, hashed_password, is_superuser)
+              VALUES (:email, 'first', 'last', 'hash', false)"""
+
+
+async def routing_scenario():
+    primary = create_async_engine(TEST_DATABASE_URL)
+    replica = create_async_engine(TEST_REPLICA_DATABASE_URL)
+    try:
+        for engine, email in ((primary, "primary@mail.com"), (replica, "replica@mail.com")):
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(text(USER_SQL), {"email": email})
+
+        users_repo = UsersRepository()
+        async with UnitOfWork(async_sessionmaker(primary), async_sessionmaker(replica)):
+            before_write = await users_repo.get_one_by(user_email="replica@mail.com")
+            await users_repo.create_one({"user_email": "new@mail.com", "user_firstname": "first",
+                                         "user_lastname": "last", "hashed_password": "hash"})
+            after_write = await users_repo.get_one_by(user_email="new@mail.com")
+            replica_after_write = await users_repo.get_one_by(user_email="replica@mail.com")
+        return before_write, after_write, replica_after_write
+    finally:
+        for engine in (primary, replica):
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+            await engine.dispose()
+
+
+def test_reads_go_to_replica_until_first_write():
+    before_write, after_write, replica_after_write = asyncio.run(routing_scenario())
+    assert before_write is not None
+    assert after_write is not None
+    assert replica_after_write is None
@@ -0,0 +1,61 @@
+import asyncio
+
+from app.schemas.user_answer_redis import AnswerData
+from app.services.redis import RedisService
+
+
+def test_legacy_answers_move_into_attempt_hashes(redis_client):
+    service = RedisService()
+
+    async def scenario():
+        for question_id, is_correct in ((10, 1), (11, 0)):
+            key = f"answer:1:2:3:{question_id}"
+            await redis_client.hset(key, mapping={"user_id": 1, "company_id": 2, "quiz_id": 3,
+                                                  "question_id": question_id, "answer_data": "a",
+                                                  "is_correct": is_correct})
+            await redis_client.expire(key, 600)
+        # already resubmitted in the new layout, the legacy copy is dropped
+        await redis_client.hset("answer:1:2:4:12", mapping={"user_id": 1, "company_id": 2, "quiz_id": 4,
+                                                            "question_id": 12, "answer_data": "old",
+                                                            "is_correct": 0})
+        await service.save_results_to_redis(redis_client, [AnswerData(user_id=1, company_id=2, quiz_id=4, question_id=12,
+                                                                      answer_data="new", is_correct=1)])
+
+        # one key per chunk, the answers of quiz 3 arrive in two chunks and are merged
+        migrated = await service.migrate_legacy_answers(redis_client, batch_size=1)
+        return (migrated, await redis_client.keys("answer:*") + await redis_client.keys("answers_migration:*"), await service.get_user_answers(redis_client, 1),
+                await redis_client.ttl(service.attempt_key(1, 2, 3)))
+
+    migrated, legacy, answers, ttl = asyncio.run(scenario())
+    assert migrated == 1
+    assert legacy == []
+    assert sorted((a.quiz_id, a.question_id, a.answer_data, a.is_correct) for a in answers) == [
+        (3, 10, "a", 1), (3, 11, "a", 0), (4, 12, "new", 1)]
+    assert 0 < ttl <= 600
+
+
+def test_iter_user_answers_pages_by_score(redis_client):
+    service = RedisService()
+
+    async def save(quiz_id):
+        await service.save_results_to_redis(redis_client, [AnswerData(user_id=1, company_id=2, quiz_id=quiz_id,
+                                                                      question_id=1, answer_data="a", is_correct=1)])
+
+    async def scenario():
+        for quiz_id in range(5):
+            await save(quiz_id)
+        index_key = service.user_index_key(1)
+        # two attempts share an expiry, the page boundary falls between them
+        score = await redis_client.zscore(index_key, "2:1")
+        await redis_client.zadd(index_key, {"2:2": score})
+        quizzes = []
+        async for batch in service.iter_user_answers(redis_client, 1, batch_size=2):
+            quizzes.append([answer.quiz_id for answer in batch])
+            if len(quizzes) == 1:
+                # a newer attempt written mid-iteration does not shift the remaining pages
+                await save(5)
+        return quizzes
+
+    quizzes = asyncio.run(scenario())
+    assert sorted(sum(quizzes, [])) == [0, 1, 2, 3, 4, 5]
+    assert all(len(batch) <= 2 for batch in quizzes)
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.repositories.attempts import QuizAttemptsRepository
+from app.repositories.members import MembersRepository
+from app.repositories.questions import QuestionsRepository
+from app.repositories.quizes import QuizzesRepository
+from app.repositories.results import ResultsRepository
+from app.repositories.stats import UserCompanyStatsRepository, UserStatsRepository
+from app.services.result_stats import ResultStatsService
+from app.utils.unit_of_work import UnitOfWork
+from tests.fakes import FakeResult, FakeRow, FakeSession, session_factory
+
+
+def run_in_unit_of_work(session: FakeSession, coro_factory):
+    async def scenario():
+        async with UnitOfWork(session_factory(session), read_session_factory=None):
+            return await coro_factory()
+    return asyncio.run(scenario())
+
+
+def test_upsert_updates_non_key_columns():
+    session = FakeSession([FakeResult([(11,), (12,)])])
+    data = [{"user_id": 1, "company_id": 2, "quiz_id": 3, "result_right_count": 1, "result_total_count": 2},
+            {"user_id": 1, "company_id": 2, "quiz_id": 4, "result_right_count": 2, "result_total_count": 2}]
+    ids = run_in_unit_of_work(session, lambda: ResultsRepository().upsert_many(
+        data, ["user_id", "company_id", "quiz_id"]))
+
+    assert ids == [11, 12]
+    sql = session.sql(0)
+    assert "ON CONFLICT (user_id, company_id, quiz_id) DO UPDATE SET" in sql
+    assert "result_right_count = excluded.result_right_count" in sql
+    assert "RETURNING" in sql
+
+
+def test_upsert_of_key_columns_only_does_nothing_on_conflict():
+    # the ids of existing rows come from a lookup by key, in the order of data
+    session = FakeSession([FakeResult(), FakeResult([(8, 2, 20), (7, 1, 10)])])
+    data = [{"user_id": 1, "company_id": 10}, {"user_id": 2, "company_id": 20}]
+    ids = run_in_unit_of_work(session, lambda: MembersRepository().upsert_many(data, ["user_id", "company_id"]))
+
+    assert ids == [7, 8]
+    assert "ON CONFLICT (user_id, company_id) DO NOTHING" in session.sql(0)
+    assert "RETURNING" not in session.sql(0)
+    assert '("Member".user_id, "Member".company_id) IN' in session.sql(1)
+
+
+def test_upsert_with_previous_locks_every_key_before_reading():
+    # missing keys are inserted empty in key order, then all of them are read FOR UPDATE
+    session = FakeSession([FakeResult(), FakeResult([(1, 2, 4, 1, 2)]), FakeResult([(11,), (12,)])])
+    data = [{"user_id": 1, "company_id": 2, "quiz_id": 4, "result_right_count": 2, "result_total_count": 2},
+            {"user_id": 1, "company_id": 2, "quiz_id": 3, "result_right_count": 1, "result_total_count": 2}]
+    replaced = run_in_unit_of_work(session, lambda: ResultsRepository().upsert_with_previous(data))
+
+    assert replaced == {(1, 2, 4): (11, 1, 2), (1, 2, 3): (12, 0, 0)}
+    assert "ON CONFLICT (user_id, company_id, quiz_id) DO NOTHING" in session.sql(0)
+    assert [(row["quiz_id"], row["result_total_count"]) for row in session.statements[0][1]] == [(3, 0), (4, 0)]
+    assert "FOR UPDATE" in session.sql(1)
+    assert "DO UPDATE SET" in session.sql(2)
+
+
+def test_create_new_attempts_skips_stored_attempt_ids():
+    # only the attempt ids the insert returned are new, a conflicting row returns nothing
+    session = FakeSession([FakeResult([("b",)])])
+    data = [{"attempt_id": attempt_id, "user_id": 1, "company_id": 2, "quiz_id": 3,
+             "result_right_count": 1, "result_total_count": 2} for attempt_id in ("a", "b")]
+    inserted = run_in_unit_of_work(session, lambda: QuizAttemptsRepository().create_new(data))
+
+    assert inserted == {"b"}
+    assert "ON CONFLICT (attempt_id, created_at) DO NOTHING RETURNING" in session.sql(0)
+
+
+def test_record_activity_skips_quizzes_with_the_batch_applied():
+    session = FakeSession()
+    rows = [{"quiz_id": 5, "passed_at": None, "passes": 2}]
+    run_in_unit_of_work(session, lambda: QuizzesRepository().record_activity(rows, "b1"))
+
+    assert '"Quiz".activity_batch IS DISTINCT FROM %(batch)s' in session.sql(0)
+    assert "activity_batch=%(batch)s" in session.sql(0)
+    assert session.statements[0][1] == [{**rows[0], "batch": "b1"}]
+
+
+def test_question_counts_move_for_the_company_and_in_total():
+    session = FakeSession()
+    run_in_unit_of_work(session, lambda: QuestionsRepository().add_to_counts(78, -3))
+
+    assert session.sql(0).startswith('UPDATE "Company" SET question_count=("Company".question_count')
+    assert session.sql(1).startswith('UPDATE "QuestionStats" SET question_count=("QuestionStats".question_count')
+
+
+def test_deleted_results_are_subtracted_from_the_rollups():
+    session = FakeSession([FakeResult([FakeRow(user_id=1, company_id=2, right_sum=3, total_sum=5)]),
+                           FakeResult([FakeRow(user_id=1, company_id=2, attempts=2)]),
+                           FakeResult([FakeRow(user_id=1, company_id=2, right_sum=4, total_sum=10)])])
+    service = ResultStatsService(ResultsRepository, QuizAttemptsRepository, UserCompanyStatsRepository,
+                                 UserStatsRepository)
+    company_rows = run_in_unit_of_work(session, lambda: service.delete_results(quiz_id=7))
+
+    assert [row["right_sum"] for row in company_rows] == [4]
+    assert 'WITH deleted AS' in session.sql(0) and 'DELETE FROM "Result"' in session.sql(0)
+    assert 'DELETE FROM "QuizAttempt"' in session.sql(1)
+    deltas = {"right_sum": -3, "total_sum": -5, "attempts": -2, "last_attempt_at": None}
+    assert session.statements[2][1] == [{"user_id": 1, "company_id": 2, **deltas}]
+    assert session.statements[3][1] == [{"user_id": 1, **deltas}]
+
+
+def test_get_one_by_propagates_database_errors():
+    class BrokenSession(FakeSession):
+        async def execute(self, statement, parameters=None):
+            raise OperationalError("SELECT", {}, Exception("connection lost"))
+
+    with pytest.raises(OperationalError):
+        run_in_unit_of_work(BrokenSession(), lambda: ResultsRepository().get_one_by(id=1))
+    # no row is not an error
+    assert run_in_unit_of_work(FakeSession(), lambda: ResultsRepository().get_one_by(id=1)) is None
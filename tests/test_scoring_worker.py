@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.core.config import redis_settings
+from app.schemas.user_answer import SubmissionSchema
+from app.services.submissions import SubmissionQueue
+from app.workers import scoring
+
+
+def make_submission(user_id: int) -> SubmissionSchema:
+    return SubmissionSchema(user_id=user_id, company_id=1, quiz_id=1, user_answers=[])
+
+
+class FakeResultsService:
+    # records every batch; a batch holding a submission of user 13 fails with fail_with
+    def __init__(self, fail_with: type[Exception]):
+        self.fail_with = fail_with
+        self.batches = []
+
+    async def score_submissions(self, submissions, redis_client):
+        self.batches.append([submission.user_id for submission in submissions])
+        if any(submission.user_id == 13 for submission in submissions):
+            raise self.fail_with("cannot record")
+        return {submission.attempt_id: {"status": "done", "result_id": submission.user_id}
+                for submission in submissions}
+
+
+@pytest.fixture
+def redis_client(redis_client, monkeypatch):
+    async def get_redis_db():
+        return redis_client
+
+    monkeypatch.setattr(scoring, "get_redis_db", get_redis_db)
+    return redis_client
+
+
+def test_pending_entries_are_claimed_by_another_consumer_and_acked(redis_client):
+    queue = SubmissionQueue()
+
+    async def scenario():
+        await queue.ensure_group(redis_client)
+        attempt_ids = [await queue.enqueue(redis_client, make_submission(user_id)) for user_id in (1, 2)]
+        # the first consumer dies before acknowledging
+        first = await queue.read(redis_client, "dead", 10, block_ms=1)
+        claimed = await queue.read(redis_client, "alive", 10, block_ms=1, min_idle_ms=0)
+        await queue.ack(redis_client, [entry_id for entry_id, _ in claimed])
+        pending = await redis_client.xpending(redis_settings.submissions_stream, queue.group)
+        return (attempt_ids, [s.attempt_id for _, s in first], [s.attempt_id for _, s in claimed], pending["pending"],
+                await redis_client.xlen(redis_settings.submissions_stream))
+
+    attempt_ids, first, claimed, pending, length = asyncio.run(scenario())
+    assert first == claimed == attempt_ids
+    assert pending == 0
+    assert length == 0
+
+
+def test_failing_submission_is_marked_failed_and_the_rest_recorded(redis_client, monkeypatch):
+    service = FakeResultsService(ValueError)
+    monkeypatch.setattr(scoring, "results_service", lambda: service)
+    queue = SubmissionQueue()
+
+    async def scenario():
+        await queue.ensure_group(redis_client)
+        attempt_ids = [await queue.enqueue(redis_client, make_submission(user_id)) for user_id in (1, 13, 2)]
+        await scoring.score_batch(queue, "worker")
+        statuses = [await queue.get_status(redis_client, attempt_id, user_id)
+                    for attempt_id, user_id in zip(attempt_ids, (1, 13, 2))]
+        pending = await redis_client.xpending(redis_settings.submissions_stream, queue.group)
+        return statuses, pending["pending"]
+
+    statuses, pending = asyncio.run(scenario())
+    assert service.batches == [[1, 13, 2], [1], [13], [2]]
+    assert [status.status for status in statuses] == ["done", "failed", "done"]
+    assert statuses[1].detail == "the submission could not be recorded"
+    assert pending == 0
+
+
+def test_transient_failure_leaves_the_batch_pending(redis_client, monkeypatch):
+    service = FakeResultsService(lambda detail: OperationalError("INSERT", {}, ConnectionRefusedError()))
+    monkeypatch.setattr(scoring, "results_service", lambda: service)
+    queue = SubmissionQueue()
+
+    async def scenario():
+        await queue.ensure_group(redis_client)
+        attempt_id = await queue.enqueue(redis_client, make_submission(13))
+        with pytest.raises(OperationalError):
+            await scoring.score_batch(queue, "worker")
+        pending = await redis_client.xpending(redis_settings.submissions_stream, queue.group)
+        return (await queue.get_status(redis_client, attempt_id, 13)).status, pending["pending"]
+
+    assert asyncio.run(scenario()) == ("queued", 1)
+
+
+def test_entries_already_done_are_acked_without_scoring(redis_client, monkeypatch):
+    # a batch recorded and marked done whose acknowledgement was lost is claimed again
+    service = FakeResultsService(ValueError)
+    monkeypatch.setattr(scoring, "results_service", lambda: service)
+    queue = SubmissionQueue()
+
+    async def scenario():
+        await queue.ensure_group(redis_client)
+        attempt_ids = [await queue.enqueue(redis_client, make_submission(user_id)) for user_id in (1, 2)]
+        await queue.set_statuses(redis_client, {attempt_ids[0]: {"status": "done", "result_id": 7}})
+        await scoring.score_batch(queue, "worker")
+        pending = await redis_client.xpending(redis_settings.submissions_stream, queue.group)
+        return (await queue.get_status(redis_client, attempt_ids[0], 1)).result_id, pending["pending"]
+
+    assert asyncio.run(scenario()) == (7, 0)
+    assert service.batches == [[2]]
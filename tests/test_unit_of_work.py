@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+
+from app.main import app
+from app.services.dependencies import unit_of_work
+from app.utils.unit_of_work import UnitOfWork, current_unit_of_work
+from tests.fakes import FakeSession, session_factory
+
+
+def test_commits_and_runs_callbacks_on_success():
+    session = FakeSession()
+    events = []
+
+    async def scenario():
+        async with UnitOfWork(session_factory(session), read_session_factory=None) as uow:
+            assert current_unit_of_work.get() is uow
+
+            async def callback():
+                events.append(list(session.calls))
+
+            uow.on_commit(callback)
+        assert current_unit_of_work.get() is None
+
+    asyncio.run(scenario())
+    assert session.calls == ["commit", "close"]
+    # callbacks run after the commit
+    assert events == [["commit"]]
+
+
+def test_rolls_back_and_skips_callbacks_on_error():
+    session = FakeSession()
+    events = []
+
+    async def scenario():
+        async with UnitOfWork(session_factory(session), read_session_factory=None) as uow:
+            async def callback():
+                events.append("called")
+
+            uow.on_commit(callback)
+            raise ValueError("handler failed")
+
+    with pytest.raises(ValueError):
+        asyncio.run(scenario())
+    assert session.calls == ["rollback", "close"]
+    assert events == []
+
+
+def test_failed_commit_skips_callbacks():
+    session = FakeSession(fail_commit=True)
+    events = []
+
+    async def scenario():
+        async with UnitOfWork(session_factory(session), read_session_factory=None) as uow:
+            async def callback():
+                events.append("called")
+
+            uow.on_commit(callback)
+
+    with pytest.raises(OperationalError):
+        asyncio.run(scenario())
+    assert events == []
+    assert session.calls[-1] == "close"
+
+
+@pytest.mark.parametrize("fail_commit", [False, True])
+def test_rollback_callbacks_run_when_nothing_is_committed(fail_commit):
+    session = FakeSession(fail_commit=fail_commit)
+    events = []
+
+    async def scenario():
+        async with UnitOfWork(session_factory(session), read_session_factory=None) as uow:
+            async def broken():
+                raise RuntimeError("callback failed")
+
+            async def callback():
+                events.append("rolled back")
+
+            uow.on_rollback(broken)
+            uow.on_rollback(callback)
+            if not fail_commit:
+                raise ValueError("handler failed")
+
+    # the original error is kept even though a callback failed
+    with pytest.raises(OperationalError if fail_commit else ValueError):
+        asyncio.run(scenario())
+    assert events == ["rolled back"]
+
+
+def test_rollback_callbacks_skipped_on_commit():
+    events = []
+
+    async def scenario():
+        async with UnitOfWork(session_factory(FakeSession()), read_session_factory=None) as uow:
+            async def callback():
+                events.append("rolled back")
+
+            uow.on_rollback(callback)
+
+    asyncio.run(scenario())
+    assert events == []
+
+
+def test_failed_commit_is_an_error_response():
+    session = FakeSession(fail_commit=True)
+
+    async def failing_unit_of_work():
+        async with UnitOfWork(session_factory(session), read_session_factory=None) as uow:
+            yield uow
+
+    app.dependency_overrides[unit_of_work] = failing_unit_of_work
+    try:
+        response = TestClient(app, raise_server_exceptions=False).get("/")
+    finally:
+        app.dependency_overrides.pop(unit_of_work)
+    assert session.calls[0] == "commit"
+    assert response.status_code >= 500